@@ -0,0 +1,90 @@
+"""Benchmark Merkle tree construction throughput per hash algorithm.
+
+Builds a tree over synthetic records with every algorithm, both as a full
+``MerkleTree`` and with the constant-memory ``MerkleAccumulator``, and
+reports records/s, to choose the algorithm for a stream.
+
+Usage:
+    python benchmarks/bench_merkle.py
+    python benchmarks/bench_merkle.py --records 1000000 --record-size 1KB
+    python benchmarks/bench_merkle.py --leaf-algorithm blake3
+
+With ``--leaf-algorithm``, leaves use that algorithm and nodes the one on
+each row (recorded as ``leafHashAlgorithm`` in the predicate). ``blake3``
+rows are skipped unless the optional ``blake3`` package is installed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from collections.abc import Callable
+from functools import partial
+from typing import Any
+
+from makoto.merkle import MerkleAccumulator, MerkleTree, hash_function
+
+ALGORITHMS = ("sha256", "sha384", "sha512", "blake2b", "blake3")
+UNITS = {"KB": 1024, "MB": 1024**2}
+
+
+def parse_size(text: str) -> int:
+    """Parse a size such as ``1KB`` into bytes."""
+    text = text.strip().upper()
+    for suffix, factor in UNITS.items():
+        if text.endswith(suffix):
+            return int(float(text[: -len(suffix)]) * factor)
+    return int(text)
+
+
+def best_time(fn: Callable[[], Any], repeat: int) -> float:
+    """Return the fastest of ``repeat`` runs in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def accumulate(records: list[bytes], algorithm: Any, leaf_algorithm: Any) -> bytes | None:
+    """Compute the root with a ``MerkleAccumulator``."""
+    acc = MerkleAccumulator(algorithm, leaf_algorithm=leaf_algorithm)
+    acc.extend(records)
+    return acc.root()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=200_000, help="Records per tree")
+    parser.add_argument("--record-size", default="256", help="Bytes per record")
+    parser.add_argument("--algorithms", default=",".join(ALGORITHMS), help="Node algorithms")
+    parser.add_argument("--leaf-algorithm", default=None, help="Leaf algorithm for every row")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per algorithm and method")
+    args = parser.parse_args()
+
+    size = parse_size(args.record_size)
+    block = os.urandom(size + args.records)
+    records = [block[i : i + size] for i in range(args.records)]
+
+    print(f"{args.records} records of {size} bytes")
+    print(f"{'algorithm':>10}  {'tree':>16}  {'accumulator':>16}")
+    for algorithm in args.algorithms.split(","):
+        leaf_algorithm = args.leaf_algorithm or algorithm
+        try:
+            hash_function(algorithm)  # type: ignore[arg-type]
+            hash_function(leaf_algorithm)
+        except ImportError as e:
+            print(f"{algorithm:>10}  skipped: {e}")
+            continue
+        methods: list[Callable[[], Any]] = [
+            partial(MerkleTree.from_records, records, algorithm, leaf_algorithm=leaf_algorithm),
+            partial(accumulate, records, algorithm, leaf_algorithm),
+        ]
+        rates = [args.records / best_time(fn, args.repeat) for fn in methods]
+        print(f"{algorithm:>10}  " + "  ".join(f"{rate:>10,.0f} rec/s" for rate in rates))
+
+
+if __name__ == "__main__":
+    main()
@@ -6,12 +6,23 @@ in-toto compatible attestations with Makoto predicates.
 
 from __future__ import annotations
 
-import hashlib
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import TYPE_CHECKING
-
+from typing import IO, TYPE_CHECKING, Literal
+
+from ..hashing import (
+    chunked_digest,
+    digest_buffer,
+    digest_directory,
+    digest_file,
+    digest_files,
+    hash_file,
+)
+from ..hashing.aio import map_concurrently, run_hashing
+from ..hashing.directory import DIR_HASH_KEY, filter_digests
+from ..hashing.incremental import AppendState, append_digest
+from ..hashing.streams import HashingReader, HashingWriter, hashing_iter
 from ..models import origin as origin_module
 from ..models import stream_window as stream_window_module
 from ..models import transform as transform_module
@@ -22,6 +33,7 @@ from ..models.stream_window import (
     MerkleTree,
     Stream,
     StreamCollector,
+    StreamVerification,
     StreamWindowPredicate,
     Window,
 )
@@ -29,19 +41,30 @@ from ..models.transform import Executor, Transform, TransformInput, TransformPre
 from .statement import InTotoStatement, Subject
 
 if TYPE_CHECKING:
+    import threading
+    from collections.abc import Iterable, Iterator, Mapping, Sequence
+
+    from ..hashing import DigestCache
+    from ..hashing.buffers import BufferData
+    from ..merkle import KeyedMerkleTree, MerkleAccumulator, MerkleTreeWriter
+    from ..merkle import MerkleTree as RecordMerkleTree
     from ..models.common import MakotoLevel
+    from ..models.stream_window import LeafEncoding, LeafOrder
 
 
-def compute_sha256(data: bytes) -> str:
+def compute_sha256(data: BufferData) -> str:
     """Compute SHA-256 hash of data.
 
+    Any buffer-protocol object is hashed without copying; see
+    ``makoto.hashing.buffers`` for the byte order of non-contiguous arrays.
+
     Args:
-        data: Bytes to hash
+        data: Bytes-like object, or a list of them hashed as one stream
 
     Returns:
         Lowercase hex digest
     """
-    return hashlib.sha256(data).hexdigest()
+    return digest_buffer(data)["sha256"]
 
 
 def compute_file_sha256(path: Path | str) -> str:
@@ -53,11 +76,27 @@ def compute_file_sha256(path: Path | str) -> str:
     Returns:
         Lowercase hex digest
     """
-    h = hashlib.sha256()
-    with open(path, "rb") as f:
-        for chunk in iter(lambda: f.read(8192), b""):
-            h.update(chunk)
-    return h.hexdigest()
+    return hash_file(path, "sha256")
+
+
+def compute_files_sha256(paths: Iterable[Path | str], *, workers: int | None = None) -> list[str]:
+    """Compute SHA-256 hashes of several files concurrently.
+
+    Files are hashed on a bounded thread pool; hashlib releases the GIL
+    while digesting, so this scales with the number of cores.
+
+    Args:
+        paths: Paths to the files
+        workers: Maximum number of hashing threads (defaults to the
+            ThreadPoolExecutor default)
+
+    Returns:
+        Lowercase hex digests, in the same order as ``paths``
+
+    Raises:
+        ValueError: If workers is less than 1
+    """
+    return [digests["sha256"] for digests in digest_files(paths, workers=workers)]
 
 
 @dataclass
@@ -101,6 +140,11 @@ class _StreamWindowConfig:
     collector_id: str
     topic: str | None = None
     alignment: str | None = None
+    tree_height: int | None = None
+    leaf_hash_algorithm: str | None = None
+    leaf_order: LeafOrder | None = None
+    leaf_encoding: LeafEncoding | None = None
+    proof_endpoint: str | None = None
 
 
 class AttestationBuilder:
@@ -136,8 +180,13 @@ class AttestationBuilder:
         ```
     """
 
-    def __init__(self) -> None:
-        """Initialize a new attestation builder."""
+    def __init__(self, *, digest_cache: DigestCache | None = None) -> None:
+        """Initialize a new attestation builder.
+
+        Args:
+            digest_cache: Optional cache consulted before hashing files
+        """
+        self._digest_cache = digest_cache
         self._subjects: list[Subject] = []
         self._config: _OriginConfig | _TransformConfig | _StreamWindowConfig | None = None
         self._predicate_type: str | None = None
@@ -262,6 +311,62 @@ class AttestationBuilder:
         self._predicate_type = stream_window_module.PREDICATE_TYPE
         return self
 
+    def with_merkle_tree(
+        self,
+        tree: RecordMerkleTree | MerkleAccumulator | MerkleTreeWriter | KeyedMerkleTree,
+    ) -> AttestationBuilder:
+        """Record a computed Merkle tree in a stream window attestation.
+
+        Replaces the algorithm, root and leaf count passed to
+        ``stream_window()`` and records the tree height (and the leaf hash
+        algorithm when it differs, the leaf order of keyed trees and the
+        leaf encoding when records were canonicalized).
+
+        Args:
+            tree: Tree, accumulator, closed tree file writer or keyed tree
+                over the window's records (see ``makoto.merkle``)
+
+        Returns:
+            Self for chaining
+
+        Raises:
+            ValueError: If not building a stream window attestation, or the
+                tree is empty
+        """
+        if not isinstance(self._config, _StreamWindowConfig):
+            raise ValueError("with_merkle_tree() can only be used with stream window attestations")
+        model = tree.to_model()
+        self._config.merkle_algorithm = model.algorithm
+        self._config.merkle_root = model.root
+        self._config.leaf_count = model.leaf_count
+        self._config.tree_height = model.tree_height
+        self._config.leaf_hash_algorithm = model.leaf_hash_algorithm
+        self._config.leaf_order = model.leaf_order
+        self._config.leaf_encoding = model.leaf_encoding
+        return self
+
+    def with_proof_endpoint(self, url: str) -> AttestationBuilder:
+        """Record where Merkle proofs for the window's records are served.
+
+        Sets ``verification.proofEndpoint`` (and ``merkleProofAvailable``),
+        e.g. to ``ProofServer.endpoint(window_id)``.
+
+        Args:
+            url: The window's proof endpoint URL
+
+        Returns:
+            Self for chaining
+
+        Raises:
+            ValueError: If not building a stream window attestation
+        """
+        if not isinstance(self._config, _StreamWindowConfig):
+            raise ValueError(
+                "with_proof_endpoint() can only be used with stream window attestations"
+            )
+        self._config.proof_endpoint = url
+        return self
+
     def with_input(
         self,
         name: str,
@@ -284,18 +389,12 @@ class AttestationBuilder:
         Raises:
             ValueError: If not building a transform attestation
         """
-        if not isinstance(self._config, _TransformConfig):
-            raise ValueError("with_input() can only be used with transform attestations")
-
-        self._config.inputs.append(
-            TransformInput(
-                name=name,
-                digest=DigestSet(sha256=sha256),
-                attestation_ref=attestation_ref,
-                makoto_level=makoto_level,
-            )
+        return self._add_input(
+            name,
+            {"sha256": sha256},
+            attestation_ref=attestation_ref,
+            makoto_level=makoto_level,
         )
-        return self
 
     def with_input_file(
         self,
@@ -304,6 +403,7 @@ class AttestationBuilder:
         name: str | None = None,
         attestation_ref: str | None = None,
         makoto_level: MakotoLevel | None = None,
+        algorithms: Sequence[str] = ("sha256",),
     ) -> AttestationBuilder:
         """Add an input dataset from a file (for transform attestations).
 
@@ -312,19 +412,54 @@ class AttestationBuilder:
             name: Optional name (defaults to filename)
             attestation_ref: Reference to the input's attestation
             makoto_level: Makoto level of the input
+            algorithms: Digest algorithms to compute in a single read
 
         Returns:
             Self for chaining
+
+        Raises:
+            ValueError: If not building a transform attestation
         """
+        self._transform_config("with_input_file")
         path = Path(path)
-        sha256 = compute_file_sha256(path)
-        return self.with_input(
-            name=name or path.name,
-            sha256=sha256,
+        return self._add_input(
+            name or path.name,
+            digest_file(path, algorithms, cache=self._digest_cache),
             attestation_ref=attestation_ref,
             makoto_level=makoto_level,
         )
 
+    def with_input_files(
+        self,
+        paths: Iterable[Path | str],
+        *,
+        workers: int | None = None,
+        makoto_level: MakotoLevel | None = None,
+        algorithms: Sequence[str] = ("sha256",),
+    ) -> AttestationBuilder:
+        """Add several input datasets from files (for transform attestations).
+
+        Files are hashed concurrently; inputs are added in the order given.
+
+        Args:
+            paths: Paths to the input files (named by filename)
+            workers: Maximum number of hashing threads
+            makoto_level: Makoto level applied to every input
+            algorithms: Digest algorithms to compute in a single read per file
+
+        Returns:
+            Self for chaining
+
+        Raises:
+            ValueError: If not building a transform attestation
+        """
+        self._transform_config("with_input_files")
+        file_paths = [Path(p) for p in paths]
+        results = digest_files(file_paths, algorithms, workers=workers, cache=self._digest_cache)
+        for path, digests in zip(file_paths, results, strict=True):
+            self._add_input(path.name, digests, makoto_level=makoto_level)
+        return self
+
     def with_subject(self, name: str, sha256: str) -> AttestationBuilder:
         """Add a subject to the attestation.
 
@@ -338,32 +473,412 @@ class AttestationBuilder:
         self._subjects.append(Subject.from_file(name, sha256))
         return self
 
-    def with_subject_file(self, path: Path | str, *, name: str | None = None) -> AttestationBuilder:
+    def with_subject_digests(self, name: str, digests: Mapping[str, str]) -> AttestationBuilder:
+        """Add a subject with several digests.
+
+        Args:
+            name: Identifier for the subject
+            digests: Mapping of algorithm name to lowercase hex digest
+
+        Returns:
+            Self for chaining
+        """
+        self._subjects.append(Subject.from_digests(name, digests))
+        return self
+
+    def with_subject_file(
+        self,
+        path: Path | str,
+        *,
+        name: str | None = None,
+        algorithms: Sequence[str] = ("sha256",),
+        merkle_chunk_size: int | None = None,
+        workers: int | None = None,
+    ) -> AttestationBuilder:
         """Add a subject from a file.
 
         Args:
             path: Path to the file
             name: Optional name (defaults to filename)
+            algorithms: Digest algorithms to compute in a single read
+                (e.g. ``("sha256", "sha512")``); may be empty when a
+                chunked Merkle digest is requested
+            merkle_chunk_size: Also emit a chunked Merkle digest
+                (``merkleRoot``) with this chunk size, hashed in parallel
+            workers: Maximum number of threads for chunked hashing
 
         Returns:
             Self for chaining
         """
         path = Path(path)
-        sha256 = compute_file_sha256(path)
-        return self.with_subject(name=name or path.name, sha256=sha256)
+        digests = self._file_digests(path, algorithms, merkle_chunk_size, workers)
+        return self.with_subject_digests(name or path.name, digests)
 
-    def with_subject_data(self, name: str, data: bytes) -> AttestationBuilder:
+    def with_subject_files(
+        self,
+        paths: Iterable[Path | str],
+        *,
+        workers: int | None = None,
+        algorithms: Sequence[str] = ("sha256",),
+        merkle_chunk_size: int | None = None,
+    ) -> AttestationBuilder:
+        """Add several subjects from files, hashing them concurrently.
+
+        Subjects are added in the order given, regardless of which file
+        finishes hashing first.
+
+        Args:
+            paths: Paths to the files (named by filename)
+            workers: Maximum number of hashing threads
+            algorithms: Digest algorithms to compute in a single read per file
+            merkle_chunk_size: Also emit chunked Merkle digests with this chunk size
+
+        Returns:
+            Self for chaining
+        """
+        if not algorithms and merkle_chunk_size is None:
+            raise ValueError("At least one digest algorithm or a merkle_chunk_size is required")
+        file_paths = [Path(p) for p in paths]
+        if algorithms:
+            results = digest_files(
+                file_paths, algorithms, workers=workers, cache=self._digest_cache
+            )
+        else:
+            results = [{} for _ in file_paths]
+        for path, digests in zip(file_paths, results, strict=True):
+            if merkle_chunk_size is not None:
+                digests.update(self._chunked_digests(path, merkle_chunk_size, workers))
+            self.with_subject_digests(path.name, digests)
+        return self
+
+    def with_subject_appending_file(
+        self,
+        path: Path | str,
+        state_path: Path | str,
+        *,
+        name: str | None = None,
+        chunk_size: int | None = None,
+    ) -> AttestationBuilder:
+        """Add a subject for an append-only file, hashing only what was appended.
+
+        The chunked Merkle frontier from the previous attestation is loaded
+        from ``state_path`` (if it exists), extended with the new tail of the
+        file and saved back. The subject carries ``merkleRoot``,
+        ``merkleChunkSize`` and ``merkleSize``; see
+        ``makoto.hashing.incremental``.
+
+        Args:
+            path: Path to the file
+            state_path: Where the append state is persisted between calls
+            name: Optional name (defaults to filename)
+            chunk_size: Chunk size for a new state (defaults to
+                ``DEFAULT_CHUNK_SIZE``; must match an existing state)
+
+        Returns:
+            Self for chaining
+
+        Raises:
+            ValueError: If the file shrank or was modified before the
+                previously attested size
+        """
+        path = Path(path)
+        state_path = Path(state_path)
+        state = AppendState.load(state_path) if state_path.exists() else None
+        digest, state = append_digest(path, state, chunk_size=chunk_size)
+        state.save(state_path)
+        return self.with_subject_digests(name or path.name, digest.to_digests())
+
+    def with_subject_directory(
+        self,
+        path: Path | str,
+        *,
+        include: Sequence[str] | None = None,
+        exclude: Sequence[str] | None = None,
+        mode: Literal["manifest", "files"] = "manifest",
+        name: str | None = None,
+        algorithms: Sequence[str] = ("sha256",),
+        workers: int | None = None,
+    ) -> AttestationBuilder:
+        """Add a directory tree (e.g. a partitioned table) as subjects.
+
+        The tree is walked and hashed in parallel. In ``"manifest"`` mode a
+        single subject is added whose ``dirHash`` digest covers every
+        (relative path, sha256) pair, with the filters recorded next to it
+        (``dirInclude``, ``dirExclude``); in ``"files"`` mode one subject is
+        added per file, named ``<name>/<relative path>``. Ordering is
+        canonical (see ``makoto.hashing.directory``), so the result is the
+        same on every filesystem.
+
+        Args:
+            path: Directory to hash
+            include: Glob patterns matched against relative paths (``*``
+                also matches ``/``); only matching files are included
+            exclude: Glob patterns for relative paths to leave out
+            mode: ``"manifest"`` for one aggregate subject, ``"files"`` for
+                one subject per file
+            name: Subject name, or name prefix in ``"files"`` mode
+                (defaults to the directory name)
+            algorithms: Digest algorithms per file (``"files"`` mode)
+            workers: Maximum number of listing and hashing threads
+
+        Returns:
+            Self for chaining
+
+        Raises:
+            ValueError: If mode is unknown
+        """
+        if mode not in ("manifest", "files"):
+            raise ValueError(f"Unknown directory subject mode: {mode}")
+        path = Path(path)
+        name = name or path.name
+        result = digest_directory(
+            path,
+            include=include,
+            exclude=exclude,
+            algorithms=algorithms if mode == "files" else ("sha256",),
+            workers=workers,
+            cache=self._digest_cache,
+        )
+        if mode == "manifest":
+            digests = {DIR_HASH_KEY: result.dir_hash, **filter_digests(include, exclude)}
+            return self.with_subject_digests(name, digests)
+        for relative_path, digests in result.files:
+            self.with_subject_digests(f"{name}/{relative_path}", digests)
+        return self
+
+    async def with_subject_file_async(
+        self,
+        path: Path | str,
+        *,
+        name: str | None = None,
+        algorithms: Sequence[str] = ("sha256",),
+        merkle_chunk_size: int | None = None,
+        workers: int | None = None,
+    ) -> AttestationBuilder:
+        """Add a subject from a file without blocking the event loop.
+
+        Hashing runs in the event loop's default executor. Cancelling the
+        awaiting task stops hashing at the next block and adds no subject.
+        Subjects are appended when hashing finishes, so use
+        ``with_subject_files_async`` when the subject order matters.
+
+        Args:
+            path: Path to the file
+            name: Optional name (defaults to filename)
+            algorithms: Digest algorithms to compute in a single read
+            merkle_chunk_size: Also emit a chunked Merkle digest with this chunk size
+            workers: Maximum number of threads for chunked hashing
+
+        Returns:
+            Self for chaining
+        """
+        path = Path(path)
+        digests = await run_hashing(
+            self._file_digests, path, algorithms, merkle_chunk_size, workers
+        )
+        return self.with_subject_digests(name or path.name, digests)
+
+    async def with_subject_files_async(
+        self,
+        paths: Iterable[Path | str],
+        *,
+        concurrency: int | None = None,
+        algorithms: Sequence[str] = ("sha256",),
+        merkle_chunk_size: int | None = None,
+    ) -> AttestationBuilder:
+        """Add several subjects from files without blocking the event loop.
+
+        Files are hashed concurrently in the event loop's default executor
+        and added in the order given. If any file fails or the awaiting task
+        is cancelled, hashing stops and no subjects are added.
+
+        Args:
+            paths: Paths to the files (named by filename)
+            concurrency: Maximum number of files hashed at once
+            algorithms: Digest algorithms to compute in a single read per file
+            merkle_chunk_size: Also emit chunked Merkle digests with this chunk size
+
+        Returns:
+            Self for chaining
+        """
+        file_paths = [Path(p) for p in paths]
+
+        async def digest(path: Path) -> dict[str, str]:
+            return await run_hashing(self._file_digests, path, algorithms, merkle_chunk_size, None)
+
+        results = await map_concurrently(digest, file_paths, concurrency=concurrency)
+        for path, digests in zip(file_paths, results, strict=True):
+            self.with_subject_digests(path.name, digests)
+        return self
+
+    def with_subject_data(
+        self,
+        name: str,
+        data: BufferData,
+        *,
+        algorithms: Sequence[str] = ("sha256",),
+    ) -> AttestationBuilder:
         """Add a subject from in-memory data.
 
+        Any buffer-protocol object (``bytes``, ``memoryview``, NumPy arrays,
+        Arrow buffers, ...) is hashed in place without a copy. A list of
+        buffers is hashed as one logical stream.
+
         Args:
             name: Identifier for the subject
             data: The data to hash
+            algorithms: Digest algorithms to compute
 
         Returns:
             Self for chaining
         """
-        sha256 = compute_sha256(data)
-        return self.with_subject(name, sha256)
+        return self.with_subject_digests(name, digest_buffer(data, algorithms))
+
+    def hashing_writer(
+        self,
+        name: str,
+        destination: IO[bytes] | None = None,
+        *,
+        algorithms: Sequence[str] = ("sha256",),
+        close_destination: bool = False,
+    ) -> HashingWriter:
+        """Hash data as it is written and add it as a subject on close.
+
+        The data is hashed on its way to ``destination``, so it is read
+        once instead of being written out and read back for hashing. The
+        subject is only added if the writer is closed without an error.
+
+        Example:
+            ```python
+            with open("upload.csv", "wb") as f, builder.hashing_writer("upload.csv", f) as w:
+                for chunk in request.iter_chunks():
+                    w.write(chunk)
+            ```
+
+        Args:
+            name: Identifier for the subject
+            destination: Binary stream receiving the data (hash only if None)
+            algorithms: Digest algorithms to compute
+            close_destination: Also close ``destination`` when closing
+
+        Returns:
+            A writable binary stream
+        """
+        return HashingWriter(
+            destination,
+            algorithms,
+            on_complete=lambda digests: self.with_subject_digests(name, digests),
+            close_destination=close_destination,
+        )
+
+    def hashing_reader(
+        self,
+        name: str,
+        source: IO[bytes],
+        *,
+        algorithms: Sequence[str] = ("sha256",),
+        close_source: bool = False,
+    ) -> HashingReader:
+        """Hash data as it is read and add it as a subject on close.
+
+        The subject is only added if the source was read to the end.
+
+        Args:
+            name: Identifier for the subject
+            source: Binary stream to read from
+            algorithms: Digest algorithms to compute
+            close_source: Also close ``source`` when closing
+
+        Returns:
+            A readable binary stream
+        """
+        return HashingReader(
+            source,
+            algorithms,
+            on_complete=lambda digests: self.with_subject_digests(name, digests),
+            close_source=close_source,
+        )
+
+    def hashing_iter(
+        self,
+        name: str,
+        chunks: Iterable[bytes],
+        *,
+        algorithms: Sequence[str] = ("sha256",),
+    ) -> Iterator[bytes]:
+        """Pass chunks through while hashing them, adding a subject when exhausted.
+
+        Args:
+            name: Identifier for the subject
+            chunks: Bytes-like chunks, e.g. from a generator pipeline
+            algorithms: Digest algorithms to compute
+
+        Returns:
+            Iterator yielding the same chunks
+        """
+        return hashing_iter(
+            chunks,
+            algorithms,
+            on_complete=lambda digests: self.with_subject_digests(name, digests),
+        )
+
+    def _file_digests(
+        self,
+        path: Path,
+        algorithms: Sequence[str],
+        merkle_chunk_size: int | None,
+        workers: int | None,
+        cancel: threading.Event | None = None,
+    ) -> dict[str, str]:
+        """Compute the requested sequential and chunked digests of a file."""
+        if not algorithms and merkle_chunk_size is None:
+            raise ValueError("At least one digest algorithm or a merkle_chunk_size is required")
+        digests = (
+            digest_file(path, algorithms, cache=self._digest_cache, cancel=cancel)
+            if algorithms
+            else {}
+        )
+        if merkle_chunk_size is not None:
+            digests.update(self._chunked_digests(path, merkle_chunk_size, workers, cancel))
+        return digests
+
+    def _chunked_digests(
+        self,
+        path: Path,
+        chunk_size: int,
+        workers: int | None,
+        cancel: threading.Event | None = None,
+    ) -> dict[str, str]:
+        """Compute the chunked Merkle digest entries of a file."""
+        digest = chunked_digest(
+            path, chunk_size=chunk_size, workers=workers, cache=self._digest_cache, cancel=cancel
+        )
+        return digest.to_digests()
+
+    def _transform_config(self, method: str) -> _TransformConfig:
+        """Return the transform config, or raise if not building a transform."""
+        if not isinstance(self._config, _TransformConfig):
+            raise ValueError(f"{method}() can only be used with transform attestations")
+        return self._config
+
+    def _add_input(
+        self,
+        name: str,
+        digests: Mapping[str, str],
+        *,
+        attestation_ref: str | None = None,
+        makoto_level: MakotoLevel | None = None,
+    ) -> AttestationBuilder:
+        """Append a transform input with the given digests."""
+        self._transform_config("with_input").inputs.append(
+            TransformInput(
+                name=name,
+                digest=DigestSet(**digests),
+                attestation_ref=attestation_ref,
+                makoto_level=makoto_level,
+            )
+        )
+        return self
 
     def _build_origin_predicate(self, config: _OriginConfig) -> OriginPredicate:
         """Build an origin predicate from config."""
@@ -418,9 +933,20 @@ class AttestationBuilder:
                     algorithm=config.merkle_algorithm,  # type: ignore[arg-type]
                     leaf_count=config.leaf_count,
                     root=config.merkle_root,
+                    tree_height=config.tree_height,
+                    leaf_hash_algorithm=config.leaf_hash_algorithm,
+                    leaf_order=config.leaf_order,
+                    leaf_encoding=config.leaf_encoding,
                 )
             ),
             collector=StreamCollector(id=config.collector_id),
+            verification=(
+                StreamVerification(
+                    merkle_proof_available=True, proof_endpoint=config.proof_endpoint
+                )
+                if config.proof_endpoint
+                else None
+            ),
         )
 
     def build(self) -> InTotoStatement:
@@ -6,12 +6,15 @@ Makoto predicates, following the in-toto attestation framework.
 
 from __future__ import annotations
 
-from typing import Annotated, Any, Literal
+from typing import TYPE_CHECKING, Annotated, Any, Literal
 
 from pydantic import BaseModel, ConfigDict, Field
 
 from ..models.common import DigestSet
 
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+
 IN_TOTO_STATEMENT_TYPE = "https://in-toto.io/Statement/v1"
 """The type URI for in-toto Statement v1."""
 
@@ -38,6 +41,20 @@ class Subject(BaseModel):
         """
         return cls(name=name, digest=DigestSet(sha256=sha256))
 
+    @classmethod
+    def from_digests(cls, name: str, digests: Mapping[str, str]) -> Subject:
+        """Create a subject from several digests of the same artifact.
+
+        Args:
+            name: Name or path of the artifact
+            digests: Mapping of algorithm name (sha256, sha512, blake2b, ...)
+                to lowercase hex digest
+
+        Returns:
+            A new Subject instance
+        """
+        return cls(name=name, digest=DigestSet(**digests))
+
 
 class InTotoStatement(BaseModel):
     """In-toto Statement v1 wrapper for Makoto predicates.
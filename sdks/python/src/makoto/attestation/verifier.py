@@ -6,17 +6,52 @@ including hash verification and chain validation.
 
 from __future__ import annotations
 
-import hashlib
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any, NamedTuple
 
+from ..hashing import DIGEST_ALGORITHMS, chunked_digest, digest_directory, digest_file
+from ..hashing.aio import map_concurrently, run_hashing
+from ..hashing.chunked import (
+    MERKLE_CHUNK_COUNT_KEY,
+    MERKLE_CHUNK_SIZE_KEY,
+    MERKLE_ROOT_KEY,
+    MERKLE_SIZE_KEY,
+)
+from ..hashing.directory import DIR_HASH_KEY, recorded_filters
+from ..hashing.incremental import prefix_roots
+from ..merkle import (
+    ConsistencyProof,
+    KeyedProof,
+    MerkleAccumulator,
+    MerkleMultiproof,
+    MerkleProof,
+    NonInclusionProof,
+    encode_records,
+    hash_leaf,
+    pane_composed_root,
+)
 from ..models import origin, stream_window, transform
-from .statement import InTotoStatement
+from .statement import InTotoStatement, Subject
 
 if TYPE_CHECKING:
-    from ..models.common import MakotoLevel
+    import threading
+    from collections.abc import Iterable
+
+    from typing_extensions import Buffer
+
+    from ..hashing import DigestCache
+    from ..models.common import DigestSet, MakotoLevel
+
+
+class _ChainLink(NamedTuple):
+    """What a stream window claims about the window before it."""
+
+    window_id: str
+    previous_root: str | None
+    length: int | None
+    genesis: str | None
 
 
 @dataclass
@@ -79,6 +114,14 @@ class AttestationVerifier:
         stream_window.PREDICATE_TYPE,
     }
 
+    def __init__(self, *, digest_cache: DigestCache | None = None) -> None:
+        """Initialize a verifier.
+
+        Args:
+            digest_cache: Optional cache consulted before hashing files
+        """
+        self._digest_cache = digest_cache
+
     def verify(self, statement: InTotoStatement) -> VerificationResult:
         """Verify an attestation statement structure.
 
@@ -104,8 +147,10 @@ class AttestationVerifier:
 
         # Check subjects have digests
         for i, subject in enumerate(statement.subjects):
-            if not subject.digest.sha256:
-                errors.append(f"Subject {i} ({subject.name}) missing sha256 digest")
+            extra = subject.digest.model_extra or {}
+            has_aggregate = MERKLE_ROOT_KEY in extra or DIR_HASH_KEY in extra
+            if not self._expected_digests(subject.digest) and not has_aggregate:
+                errors.append(f"Subject {i} ({subject.name}) missing digest")
 
         # Validate predicate structure based on type
         if predicate_type == origin.PREDICATE_TYPE:
@@ -128,12 +173,16 @@ class AttestationVerifier:
         self,
         statement: InTotoStatement,
         files: dict[str, Path | str],
+        *,
+        rehash: bool = False,
     ) -> VerificationResult:
         """Verify an attestation with file hash checking.
 
         Args:
             statement: The attestation statement to verify
-            files: Mapping of subject names to file paths
+            files: Mapping of subject names to file (or directory) paths
+            rehash: Re-hash every file even if the digest cache has an entry
+                for it (for audits; the cache is refreshed with the results)
 
         Returns:
             Verification result with hash verification
@@ -144,7 +193,7 @@ class AttestationVerifier:
         warnings = list(result.warnings)
         subjects_verified = 0
 
-        # Verify file hashes
+        # Verify file hashes, reading each file once for all of its digests
         for subject in statement.subjects:
             if subject.name in files:
                 file_path = Path(files[subject.name])
@@ -152,16 +201,10 @@ class AttestationVerifier:
                     errors.append(f"File not found: {file_path}")
                     continue
 
-                expected_hash = subject.digest.sha256
-                if expected_hash:
-                    actual_hash = self._compute_file_hash(file_path)
-                    if actual_hash == expected_hash:
-                        subjects_verified += 1
-                    else:
-                        errors.append(
-                            f"Hash mismatch for {subject.name}: "
-                            f"expected {expected_hash[:16]}..., got {actual_hash[:16]}..."
-                        )
+                checked, file_errors = self._check_file(subject, file_path, rehash)
+                errors.extend(file_errors)
+                if checked and not file_errors:
+                    subjects_verified += 1
             else:
                 warnings.append(f"No file provided for subject: {subject.name}")
 
@@ -175,6 +218,64 @@ class AttestationVerifier:
             warnings=warnings,
         )
 
+    async def verify_with_files_async(
+        self,
+        statement: InTotoStatement,
+        files: dict[str, Path | str],
+        *,
+        rehash: bool = False,
+        concurrency: int | None = None,
+    ) -> VerificationResult:
+        """Verify an attestation with file hash checking without blocking the event loop.
+
+        Files are hashed concurrently in the event loop's default executor.
+        Cancelling the awaiting task stops all in-flight hashing.
+
+        Args:
+            statement: The attestation statement to verify
+            files: Mapping of subject names to file (or directory) paths
+            rehash: Re-hash every file even if the digest cache has an entry
+            concurrency: Maximum number of files hashed at once
+
+        Returns:
+            Verification result with hash verification
+        """
+        result = self.verify(statement)
+        errors = list(result.errors)
+        warnings = list(result.warnings)
+
+        to_check: list[tuple[Subject, Path]] = []
+        for subject in statement.subjects:
+            if subject.name not in files:
+                warnings.append(f"No file provided for subject: {subject.name}")
+                continue
+            file_path = Path(files[subject.name])
+            if not file_path.exists():
+                errors.append(f"File not found: {file_path}")
+            else:
+                to_check.append((subject, file_path))
+
+        async def check(item: tuple[Subject, Path]) -> tuple[bool, list[str]]:
+            subject, file_path = item
+            return await run_hashing(self._check_file, subject, file_path, rehash)
+
+        outcomes = await map_concurrently(check, to_check, concurrency=concurrency)
+        subjects_verified = 0
+        for checked, file_errors in outcomes:
+            errors.extend(file_errors)
+            if checked and not file_errors:
+                subjects_verified += 1
+
+        return VerificationResult(
+            valid=len(errors) == 0,
+            predicate_type=result.predicate_type,
+            makoto_level="L1" if len(errors) == 0 else None,
+            subjects_verified=subjects_verified,
+            subjects_total=len(statement.subjects),
+            errors=errors,
+            warnings=warnings,
+        )
+
     def verify_chain(
         self,
         statements: list[InTotoStatement],
@@ -232,6 +333,503 @@ class AttestationVerifier:
             warnings=warnings,
         )
 
+    def verify_window_chain(self, statements: Iterable[InTotoStatement]) -> VerificationResult:
+        """Verify the ``integrity.chain`` links between stream windows.
+
+        Windows are identified by their (first) subject name and may come in
+        any order. Each is visited once and only its ID, Merkle root, chain
+        length and genesis are kept, so a long history can be streamed from
+        disk. Every window's ``previousWindowId`` and ``previousMerkleRoot``
+        must match a window given, its ``chainLength`` must be one more than
+        that window's, and all windows of a chain must name the same
+        ``genesisWindowId``. Gaps (a missing previous window, except before
+        the first window given of each chain) and forks (two windows
+        following the same one, or one ID with two roots) are errors.
+
+        Only the chain is checked; use ``verify`` for each window's structure.
+
+        Args:
+            statements: Stream window attestations (any iterable)
+
+        Returns:
+            Verification result; ``subjects_total`` counts the windows and
+            ``subjects_verified`` those without errors
+        """
+        errors: list[str] = []
+        warnings: list[str] = []
+        failed: set[str] = set()
+        windows: dict[str, tuple[str | None, int | None, str | None]] = {}
+        successors: dict[str, str] = {}
+        # Links to previous windows not seen yet, by previous window ID
+        waiting: dict[str, list[_ChainLink]] = {}
+        # Lowest chain length given of each chain, by genesis window ID
+        lowest: dict[str | None, int] = {}
+        total = 0
+
+        def fail(window_id: str, message: str) -> None:
+            errors.append(message)
+            failed.add(window_id)
+
+        def check(link: _ChainLink, previous_id: str) -> None:
+            root, length, genesis = windows[previous_id]
+            if link.previous_root is not None and link.previous_root != root:
+                fail(
+                    link.window_id,
+                    self._format_mismatch(
+                        link.window_id, "previousMerkleRoot", link.previous_root, root or ""
+                    ),
+                )
+            if link.length is not None and length is not None and link.length != length + 1:
+                fail(
+                    link.window_id,
+                    f"Window {link.window_id} has chainLength {link.length} "
+                    f"but follows {previous_id} with chainLength {length}",
+                )
+            if link.genesis is not None and genesis is not None and link.genesis != genesis:
+                fail(
+                    link.window_id,
+                    f"Window {link.window_id} has genesisWindowId {link.genesis} "
+                    f"but follows {previous_id} with genesisWindowId {genesis}",
+                )
+
+        for i, statement in enumerate(statements):
+            if statement.predicate_type != stream_window.PREDICATE_TYPE or not statement.subjects:
+                errors.append(f"Statement {i} is not a stream window attestation")
+                continue
+            total += 1
+            window_id = statement.subjects[0].name
+            integrity = statement.predicate.get("integrity") or {}
+            root = (integrity.get("merkleTree") or {}).get("root")
+            chain = integrity.get("chain") or {}
+            length = chain.get("chainLength")
+            genesis = chain.get("genesisWindowId")
+            previous_id = chain.get("previousWindowId")
+
+            if window_id in windows:
+                if windows[window_id][0] == root:
+                    warnings.append(f"Window {window_id} is listed more than once")
+                else:
+                    fail(window_id, f"Fork: window {window_id} is attested with two roots")
+                continue
+            windows[window_id] = (root, length, genesis)
+            if isinstance(length, int) and length < lowest.get(genesis, length + 1):
+                lowest[genesis] = length
+            if not chain:
+                fail(window_id, f"Window {window_id} has no integrity.chain")
+            elif previous_id is None:
+                if length not in (None, 1):
+                    fail(
+                        window_id,
+                        f"Window {window_id} has chainLength {length} but no previousWindowId",
+                    )
+                if genesis not in (None, window_id):
+                    fail(
+                        window_id,
+                        f"Window {window_id} starts a chain but has genesisWindowId {genesis}",
+                    )
+            else:
+                other = successors.setdefault(previous_id, window_id)
+                if other != window_id:
+                    fail(
+                        window_id,
+                        f"Fork: windows {other} and {window_id} both follow {previous_id}",
+                    )
+                link = _ChainLink(window_id, chain.get("previousMerkleRoot"), length, genesis)
+                if previous_id in windows:
+                    check(link, previous_id)
+                else:
+                    waiting.setdefault(previous_id, []).append(link)
+            for link in waiting.pop(window_id, ()):
+                check(link, window_id)
+
+        # The earliest window given of each chain may follow a window not given
+        starts: dict[str | None, tuple[str, _ChainLink]] = {}
+        for previous_id, links in waiting.items():
+            for link in links:
+                first = link.length is not None and link.length == lowest.get(link.genesis)
+                if first and link.genesis not in starts:
+                    starts[link.genesis] = (previous_id, link)
+                else:
+                    fail(
+                        link.window_id,
+                        f"Gap: window {link.window_id} follows missing window {previous_id}",
+                    )
+        warnings.extend(
+            f"Chain starts at window {link.window_id} (chainLength {link.length}), "
+            f"after window {previous_id} which was not given"
+            for previous_id, link in starts.values()
+        )
+
+        return VerificationResult(
+            valid=len(errors) == 0,
+            predicate_type=stream_window.PREDICATE_TYPE,
+            makoto_level="L1" if len(errors) == 0 else None,
+            subjects_total=total,
+            subjects_verified=total - len(failed),
+            errors=errors,
+            warnings=warnings,
+        )
+
+    def verify_append_only(
+        self,
+        old: InTotoStatement,
+        new: InTotoStatement,
+        files: dict[str, Path | str] | None = None,
+    ) -> VerificationResult:
+        """Verify that a later attestation only appended to earlier subjects.
+
+        Subjects with append-mode digests (``merkleSize``) present in both
+        statements are compared. Without files only the recorded sizes are
+        checked; with a file, the old and new roots are both recomputed as
+        prefixes of it in a single pass, which proves the old attested data
+        is an unchanged prefix of the new.
+
+        Args:
+            old: The earlier attestation statement
+            new: The later attestation statement
+            files: Optional mapping of subject names to file paths
+
+        Returns:
+            Verification result; ``subjects_verified`` counts subjects whose
+            prefix consistency was checked against a file
+        """
+        errors: list[str] = []
+        warnings: list[str] = []
+        files = files or {}
+        old_subjects = {subject.name: subject for subject in old.subjects}
+        compared = 0
+        subjects_verified = 0
+
+        for subject in new.subjects:
+            previous = old_subjects.get(subject.name)
+            if previous is None:
+                continue
+            old_digest = self._append_digest(previous)
+            new_digest = self._append_digest(subject)
+            if old_digest is None or new_digest is None:
+                warnings.append(f"Subject {subject.name} has no append-mode digest in both")
+                continue
+            compared += 1
+            old_root, old_chunk, old_size = old_digest
+            new_root, new_chunk, new_size = new_digest
+            if old_chunk != new_chunk:
+                errors.append(f"Subject {subject.name} changed merkleChunkSize")
+                continue
+            if new_size < old_size:
+                errors.append(f"Subject {subject.name} shrank from {old_size} to {new_size} bytes")
+                continue
+            if new_size == old_size and new_root != old_root:
+                errors.append(f"Subject {subject.name} changed without growing")
+                continue
+            if subject.name not in files:
+                continue
+
+            file_path = Path(files[subject.name])
+            try:
+                actual_old, actual_new = prefix_roots(
+                    file_path, [old_size, new_size], chunk_size=new_chunk
+                )
+            except (OSError, ValueError) as e:
+                errors.append(f"Cannot check {subject.name}: {e}")
+                continue
+            if actual_old != old_root:
+                errors.append(
+                    self._format_mismatch(subject.name, "attested prefix", old_root, actual_old)
+                )
+            elif actual_new != new_root:
+                errors.append(
+                    self._format_mismatch(subject.name, "merkleRoot", new_root, actual_new)
+                )
+            else:
+                subjects_verified += 1
+
+        if compared == 0:
+            errors.append("No append-mode subjects in common between the attestations")
+
+        return VerificationResult(
+            valid=len(errors) == 0,
+            predicate_type=new.predicate_type,
+            makoto_level="L1" if len(errors) == 0 else None,
+            subjects_verified=subjects_verified,
+            subjects_total=compared,
+            errors=errors,
+            warnings=warnings,
+        )
+
+    def verify_inclusion(
+        self,
+        statement: InTotoStatement,
+        proofs: MerkleProof | MerkleMultiproof | Iterable[MerkleProof | MerkleMultiproof],
+        records: dict[int, Any] | None = None,
+    ) -> VerificationResult:
+        """Verify that records are leaves of a stream window's Merkle tree.
+
+        Each proof is checked against ``integrity.merkleTree`` (root,
+        algorithm and leaf count) of the statement, so a proof for a
+        different leaf position or tree size is rejected.
+
+        Args:
+            statement: A stream window attestation
+            proofs: Inclusion proofs and/or multiproofs
+            records: Optional records by leaf index (bytes, or records in the
+                input format of the tree's ``leafEncoding``); their leaf
+                hashes must match the proven ones
+
+        Returns:
+            Verification result; ``subjects_total`` counts the proven leaves
+            and ``subjects_verified`` those that verified
+        """
+        errors: list[str] = []
+        merkle = self._merkle_tree(statement)
+        if merkle is None:
+            return VerificationResult(
+                valid=False,
+                predicate_type=statement.predicate_type,
+                errors=["Inclusion proofs need a stream window with a Merkle tree"],
+            )
+        if merkle.get("paneLeafCounts"):
+            return VerificationResult(
+                valid=False,
+                predicate_type=statement.predicate_type,
+                errors=[
+                    "Inclusion proofs against pane-composed trees are not supported; "
+                    "use verify_window_records"
+                ],
+            )
+        root = merkle["root"]
+        algorithm = merkle.get("algorithm", "sha256")
+        leaf_algorithm = merkle.get("leafHashAlgorithm") or algorithm
+        leaf_count = merkle.get("leafCount", 0)
+        if isinstance(proofs, (MerkleProof, MerkleMultiproof)):
+            proofs = [proofs]
+        records = records or {}
+        try:
+            encoded = dict(
+                zip(
+                    records,
+                    encode_records(records.values(), merkle.get("leafEncoding") or "raw"),
+                    strict=True,
+                )
+            )
+        except ValueError as e:
+            return VerificationResult(
+                valid=False,
+                predicate_type=statement.predicate_type,
+                errors=[f"Records cannot be encoded: {e}"],
+            )
+        leaves_total = 0
+        leaves_verified = 0
+
+        for proof in proofs:
+            if isinstance(proof, MerkleProof):
+                leaves = {proof.leaf_index: proof.leaf_hash}
+                valid = proof.verify(root, algorithm, leaf_count=leaf_count)
+            else:
+                leaves = dict(zip(proof.leaf_indices, proof.leaf_hashes, strict=False))
+                valid = proof.leaf_count == leaf_count and proof.verify(root, algorithm)
+            leaves_total += len(leaves)
+            if not valid:
+                errors.append(f"Inclusion proof for leaves {sorted(leaves)} does not match root")
+                continue
+            mismatched = [
+                index
+                for index, leaf in leaves.items()
+                if index in encoded and hash_leaf(encoded[index], leaf_algorithm) != leaf
+            ]
+            errors.extend(f"Record {index} does not match its leaf hash" for index in mismatched)
+            leaves_verified += len(leaves) - len(mismatched)
+
+        if leaves_total == 0:
+            errors.append("No inclusion proofs to verify")
+
+        return VerificationResult(
+            valid=len(errors) == 0,
+            predicate_type=statement.predicate_type,
+            makoto_level="L1" if len(errors) == 0 else None,
+            subjects_verified=leaves_verified,
+            subjects_total=leaves_total,
+            errors=errors,
+        )
+
+    def verify_window_records(
+        self, statement: InTotoStatement, records: Iterable[Any]
+    ) -> VerificationResult:
+        """Recompute a stream window's Merkle root from all of its records.
+
+        Flat trees and pane-composed sliding windows (``paneLeafCounts``)
+        are both supported; the records of a pane-composed window are given
+        pane by pane.
+
+        Args:
+            statement: A stream window attestation
+            records: Every record of the window, in the order hashed (bytes,
+                or records in the input format of the tree's ``leafEncoding``)
+
+        Returns:
+            Verification result; ``subjects_total`` counts the records
+        """
+        merkle = self._merkle_tree(statement)
+        if merkle is None:
+            return VerificationResult(
+                valid=False,
+                predicate_type=statement.predicate_type,
+                errors=["Recomputing a root needs a stream window with a Merkle tree"],
+            )
+        records = list(records)
+        errors: list[str] = []
+        try:
+            tree = stream_window.MerkleTree.model_validate(merkle)
+            encoding = tree.leaf_encoding or "raw"
+            if tree.pane_leaf_counts:
+                root: str | None = pane_composed_root(
+                    records, tree.pane_leaf_counts, tree.algorithm, encoding=encoding
+                ).hex()
+            else:
+                accumulator = MerkleAccumulator(
+                    tree.algorithm,
+                    leaf_algorithm=merkle.get("leafHashAlgorithm"),
+                    encoding=encoding,
+                )
+                accumulator.extend(records)
+                root = accumulator.root_hex()
+        except ValueError as e:
+            errors.append(f"Records cannot be hashed into the window's tree: {e}")
+        else:
+            if len(records) != tree.leaf_count:
+                errors.append(f"Window has {tree.leaf_count} records, got {len(records)}")
+            elif root != tree.root:
+                errors.append("Records do not match the window's Merkle root")
+
+        return VerificationResult(
+            valid=len(errors) == 0,
+            predicate_type=statement.predicate_type,
+            makoto_level="L1" if len(errors) == 0 else None,
+            subjects_verified=len(records) if not errors else 0,
+            subjects_total=len(records),
+            errors=errors,
+        )
+
+    def verify_key_proofs(
+        self,
+        statement: InTotoStatement,
+        proofs: KeyedProof | NonInclusionProof | Iterable[KeyedProof | NonInclusionProof],
+        records: dict[bytes, Buffer] | None = None,
+    ) -> VerificationResult:
+        """Verify proofs by record key against a keyed stream window tree.
+
+        The window's ``integrity.merkleTree`` must have ``leafOrder: key``
+        (see ``makoto.merkle.KeyedMerkleTree``).
+
+        Args:
+            statement: A stream window attestation
+            proofs: Inclusion (``KeyedProof``) and non-inclusion proofs
+            records: Optional record bytes by key, checked against the
+                record hashes of inclusion proofs
+
+        Returns:
+            Verification result; ``subjects_total`` counts the proofs and
+            ``subjects_verified`` those that verified
+        """
+        errors: list[str] = []
+        merkle = self._merkle_tree(statement)
+        if merkle is None or merkle.get("leafOrder") != "key":
+            return VerificationResult(
+                valid=False,
+                predicate_type=statement.predicate_type,
+                errors=["Key proofs need a stream window with a keyed Merkle tree"],
+            )
+        root = merkle["root"]
+        algorithm = merkle.get("algorithm", "sha256")
+        leaf_algorithm = merkle.get("leafHashAlgorithm") or algorithm
+        leaf_count = merkle.get("leafCount", 0)
+        if isinstance(proofs, (KeyedProof, NonInclusionProof)):
+            proofs = [proofs]
+        records = records or {}
+        total = 0
+        verified = 0
+
+        for proof in proofs:
+            total += 1
+            if isinstance(proof, KeyedProof):
+                valid = proof.verify(
+                    root,
+                    leaf_count,
+                    algorithm,
+                    leaf_algorithm=leaf_algorithm,
+                    record=records.get(proof.key),
+                )
+                kind = "Inclusion"
+            else:
+                valid = proof.verify(root, leaf_count, algorithm, leaf_algorithm=leaf_algorithm)
+                kind = "Non-inclusion"
+            if valid:
+                verified += 1
+            else:
+                errors.append(f"{kind} proof for key {proof.key!r} does not match root")
+
+        if total == 0:
+            errors.append("No key proofs to verify")
+
+        return VerificationResult(
+            valid=len(errors) == 0,
+            predicate_type=statement.predicate_type,
+            makoto_level="L1" if len(errors) == 0 else None,
+            subjects_verified=verified,
+            subjects_total=total,
+            errors=errors,
+        )
+
+    def verify_consistency(
+        self,
+        old: InTotoStatement,
+        new: InTotoStatement,
+        proof: ConsistencyProof,
+    ) -> VerificationResult:
+        """Verify that a later window's Merkle tree extends an earlier one.
+
+        Checks, in O(log n) hashes, that the records of ``old`` are an
+        unchanged prefix of the records of ``new`` (e.g. a window
+        re-attested with late records, or a rollup of windows).
+
+        Args:
+            old: The earlier stream window attestation
+            new: The later stream window attestation
+            proof: Consistency proof between the two trees
+
+        Returns:
+            Verification result for the pair
+        """
+        errors: list[str] = []
+        old_merkle = self._merkle_tree(old)
+        new_merkle = self._merkle_tree(new)
+        if old_merkle is None or new_merkle is None:
+            errors.append("Consistency proofs need two stream windows with Merkle trees")
+        elif any(
+            old_merkle.get(key) != new_merkle.get(key) for key in ("algorithm", "leafHashAlgorithm")
+        ):
+            errors.append("Merkle trees use different algorithms")
+        elif (proof.old_size, proof.new_size) != (
+            old_merkle.get("leafCount"),
+            new_merkle.get("leafCount"),
+        ):
+            errors.append(
+                f"Proof is for {proof.old_size} -> {proof.new_size} leaves, attestations record "
+                f"{old_merkle.get('leafCount')} -> {new_merkle.get('leafCount')}"
+            )
+        elif not proof.verify(
+            old_merkle["root"], new_merkle["root"], old_merkle.get("algorithm", "sha256")
+        ):
+            errors.append("Consistency proof does not match the Merkle roots")
+
+        return VerificationResult(
+            valid=len(errors) == 0,
+            predicate_type=new.predicate_type,
+            makoto_level="L1" if len(errors) == 0 else None,
+            subjects_verified=2 if len(errors) == 0 else 0,
+            subjects_total=2,
+            errors=errors,
+        )
+
     def _verify_origin_predicate(self, predicate: dict[str, object]) -> list[str]:
         """Verify origin predicate structure."""
         errors: list[str] = []
@@ -325,11 +923,136 @@ class AttestationVerifier:
 
         return errors
 
+    def _check_file(
+        self,
+        subject: Subject,
+        file_path: Path,
+        rehash: bool,
+        cancel: threading.Event | None = None,
+    ) -> tuple[bool, list[str]]:
+        """Check a file against every digest of a subject that can be recomputed.
+
+        A directory is checked against the subject's ``dirHash``, hashing the
+        files selected by the filters recorded with it.
+
+        Returns:
+            Whether any digest was checked, and the mismatch errors
+        """
+        errors: list[str] = []
+        extra = subject.digest.model_extra or {}
+        if file_path.is_dir():
+            expected_dir_hash = extra.get(DIR_HASH_KEY)
+            if expected_dir_hash is None:
+                return True, [f"Subject {subject.name} is a directory but has no dirHash digest"]
+            try:
+                include, exclude = recorded_filters(extra)
+            except ValueError as e:
+                return True, [f"Subject {subject.name}: {e}"]
+            actual_dir_hash = digest_directory(
+                file_path,
+                include=include,
+                exclude=exclude,
+                cache=self._digest_cache,
+                refresh=rehash,
+            ).dir_hash
+            if actual_dir_hash != expected_dir_hash:
+                errors.append(
+                    self._format_mismatch(
+                        subject.name, DIR_HASH_KEY, expected_dir_hash, actual_dir_hash
+                    )
+                )
+            return True, errors
+
+        expected = self._expected_digests(subject.digest)
+        if expected:
+            actual = digest_file(
+                file_path, expected, cache=self._digest_cache, refresh=rehash, cancel=cancel
+            )
+            errors.extend(
+                self._format_mismatch(subject.name, algorithm, digest, actual[algorithm])
+                for algorithm, digest in expected.items()
+                if actual[algorithm] != digest
+            )
+
+        merkle_root = extra.get(MERKLE_ROOT_KEY)
+        if merkle_root is None:
+            return bool(expected), errors
+
+        chunk_size = extra.get(MERKLE_CHUNK_SIZE_KEY)
+        if chunk_size is None or not str(chunk_size).isdigit() or int(chunk_size) < 1:
+            errors.append(f"Subject {subject.name} has merkleRoot without a valid merkleChunkSize")
+            return True, errors
+        append_digest = self._append_digest(subject)
+        if append_digest is not None:
+            # The file may have grown since; check the attested prefix
+            _, _, size = append_digest
+            if file_path.stat().st_size < size:
+                errors.append(f"File {file_path} is shorter than the attested {size} bytes")
+                return True, errors
+            (actual_root,) = prefix_roots(
+                file_path, [size], chunk_size=int(chunk_size), cancel=cancel
+            )
+        else:
+            # The root alone does not fix the number of chunks (an odd last
+            # node is paired with itself), so the count must match too
+            chunk_count = str(extra.get(MERKLE_CHUNK_COUNT_KEY, ""))
+            if not chunk_count.isdigit():
+                errors.append(
+                    f"Subject {subject.name} has merkleRoot without a valid merkleChunkCount"
+                )
+                return True, errors
+            chunked = chunked_digest(
+                file_path,
+                chunk_size=int(chunk_size),
+                cache=self._digest_cache,
+                refresh=rehash,
+                cancel=cancel,
+            )
+            if chunked.chunk_count != int(chunk_count):
+                errors.append(
+                    f"Chunk count mismatch for {subject.name}: expected {chunk_count}, "
+                    f"got {chunked.chunk_count}"
+                )
+                return True, errors
+            actual_root = chunked.root
+        if actual_root != merkle_root:
+            errors.append(
+                self._format_mismatch(subject.name, "merkleRoot", merkle_root, actual_root)
+            )
+        return True, errors
+
+    @staticmethod
+    def _merkle_tree(statement: InTotoStatement) -> dict[str, Any] | None:
+        """Return ``integrity.merkleTree`` of a stream window, if it has a root."""
+        if statement.predicate_type != stream_window.PREDICATE_TYPE:
+            return None
+        merkle = statement.predicate.get("integrity", {}).get("merkleTree", {})
+        return merkle if "root" in merkle else None
+
+    @staticmethod
+    def _append_digest(subject: Subject) -> tuple[str, int, int] | None:
+        """Return (merkleRoot, merkleChunkSize, merkleSize) of an append-mode digest."""
+        extra = subject.digest.model_extra or {}
+        values = (
+            extra.get(MERKLE_ROOT_KEY),
+            extra.get(MERKLE_CHUNK_SIZE_KEY),
+            extra.get(MERKLE_SIZE_KEY),
+        )
+        root, chunk_size, size = (str(v) if v is not None else "" for v in values)
+        if not root or not chunk_size.isdigit() or not size.isdigit() or int(chunk_size) < 1:
+            return None
+        return root, int(chunk_size), int(size)
+
+    @staticmethod
+    def _expected_digests(digest: DigestSet) -> dict[str, str]:
+        """Collect the digests of a subject that can be checked against a file."""
+        values = digest.model_dump(exclude_none=True)
+        return {
+            algorithm: values[algorithm] for algorithm in DIGEST_ALGORITHMS if algorithm in values
+        }
+
     @staticmethod
-    def _compute_file_hash(path: Path) -> str:
-        """Compute SHA-256 hash of a file."""
-        h = hashlib.sha256()
-        with open(path, "rb") as f:
-            for chunk in iter(lambda: f.read(8192), b""):
-                h.update(chunk)
-        return h.hexdigest()
+    def _format_mismatch(name: str, algorithm: str, expected: str, actual: str) -> str:
+        """Format a hash mismatch error."""
+        label = name if algorithm == "sha256" else f"{name} ({algorithm})"
+        return f"Hash mismatch for {label}: expected {expected[:16]}..., got {actual[:16]}..."
@@ -0,0 +1,57 @@
+"""Hashing utilities for Makoto attestations.
+
+This package provides the shared hashing engine used by the attestation
+builder and verifier to compute artifact digests (from files or, without
+copying, from in-memory buffers), parallel chunked Merkle digests for very
+large files with an incremental mode for append-only files, deterministic
+directory digests, wrappers that hash streamed data in transit, and an
+optional persistent cache of digests keyed by file identity.
+"""
+
+from .aio import map_concurrently, run_hashing
+from .buffers import buffer_blocks, digest_buffer
+from .cache import DigestCache, file_identity
+from .chunked import DEFAULT_CHUNK_SIZE, ChunkedDigest, chunk_hashes, chunked_digest
+from .directory import DirectoryDigest, DirectoryEntry, digest_directory, dir_hash, walk_directory
+from .files import (
+    DIGEST_ALGORITHMS,
+    HashingCancelledError,
+    buffer_size_for,
+    digest_file,
+    digest_files,
+    hash_file,
+    read_blocks,
+)
+from .incremental import AppendState, append_digest, prefix_roots
+from .streams import HashingReader, HashingWriter, hashing_iter
+
+__all__ = [
+    "AppendState",
+    "DEFAULT_CHUNK_SIZE",
+    "DIGEST_ALGORITHMS",
+    "ChunkedDigest",
+    "DigestCache",
+    "DirectoryDigest",
+    "DirectoryEntry",
+    "HashingCancelledError",
+    "HashingReader",
+    "HashingWriter",
+    "append_digest",
+    "buffer_blocks",
+    "buffer_size_for",
+    "chunk_hashes",
+    "chunked_digest",
+    "digest_file",
+    "digest_buffer",
+    "digest_directory",
+    "digest_files",
+    "dir_hash",
+    "file_identity",
+    "hash_file",
+    "hashing_iter",
+    "map_concurrently",
+    "prefix_roots",
+    "read_blocks",
+    "run_hashing",
+    "walk_directory",
+]
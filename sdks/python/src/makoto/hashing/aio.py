@@ -0,0 +1,84 @@
+"""asyncio helpers for hashing without blocking the event loop.
+
+Hashing runs in the event loop's default executor. Each call gets a
+``threading.Event`` that is set when the awaiting task is cancelled, so the
+worker thread stops at the next block instead of hashing to the end.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import threading
+from typing import TYPE_CHECKING, Any, TypeVar
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable, Iterable
+
+T = TypeVar("T")
+A = TypeVar("A")
+
+
+async def run_hashing(func: Callable[..., T], /, *args: Any, **kwargs: Any) -> T:
+    """Run a blocking hashing function in the default executor.
+
+    ``func`` is called with an extra ``cancel`` keyword argument holding a
+    ``threading.Event``; the event is set if the awaiting task is cancelled.
+
+    Args:
+        func: Blocking function accepting a ``cancel`` keyword argument
+        *args: Positional arguments for ``func``
+        **kwargs: Keyword arguments for ``func``
+
+    Returns:
+        The return value of ``func``
+    """
+    cancel = threading.Event()
+    loop = asyncio.get_running_loop()
+    call = functools.partial(func, *args, cancel=cancel, **kwargs)
+    try:
+        return await loop.run_in_executor(None, call)
+    except asyncio.CancelledError:
+        cancel.set()
+        raise
+
+
+async def map_concurrently(
+    func: Callable[[A], Awaitable[T]],
+    items: Iterable[A],
+    *,
+    concurrency: int | None = None,
+) -> list[T]:
+    """Await ``func`` over items with bounded concurrency, preserving order.
+
+    If any call fails or the caller is cancelled, the remaining calls are
+    cancelled before the exception propagates.
+
+    Args:
+        func: Coroutine function applied to each item
+        items: Items to process
+        concurrency: Maximum number of calls in flight (unbounded if None)
+
+    Returns:
+        Results in the same order as ``items``
+
+    Raises:
+        ValueError: If concurrency is less than 1
+    """
+    if concurrency is not None and concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    semaphore = asyncio.Semaphore(concurrency) if concurrency is not None else None
+
+    async def run(item: A) -> T:
+        if semaphore is None:
+            return await func(item)
+        async with semaphore:
+            return await func(item)
+
+    tasks = [asyncio.ensure_future(run(item)) for item in items]
+    try:
+        return list(await asyncio.gather(*tasks))
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
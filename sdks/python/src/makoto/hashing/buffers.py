@@ -0,0 +1,92 @@
+"""Zero-copy hashing of in-memory buffers.
+
+Any object supporting the buffer protocol (``bytes``, ``bytearray``,
+``memoryview``, ``array.array``, NumPy arrays, Arrow buffers, ...) is
+hashed in place, without a ``.tobytes()`` copy.
+
+Canonical byte order: the digest of a buffer is the digest of its elements
+in C (row-major) order, i.e. the same bytes as ``memoryview(obj).tobytes()``.
+For C-contiguous buffers these are the buffer's memory as-is. Non-contiguous
+buffers (strided slices, transposed or Fortran-ordered arrays) are traversed
+along their first axis in blocks of about ``COPY_BLOCK_SIZE`` bytes: a
+block that is contiguous is hashed in place, one that is not is copied.
+First-axis slices larger than the block size form a block on their own, so
+large rows of a row-strided matrix are hashed without copying, and at
+most one slice (or ``COPY_BLOCK_SIZE`` bytes) is copied at a time.
+
+A list or tuple of buffers is hashed as one logical stream, the
+concatenation of the buffers' canonical bytes.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from .files import new_hashers
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator, Sequence
+    from typing import TypeAlias
+
+    from typing_extensions import Buffer
+
+    BufferData: TypeAlias = Buffer | Sequence[Buffer]
+
+COPY_BLOCK_SIZE = 1024 * 1024
+"""Maximum size of the copies made for non-contiguous buffers (1 MiB)."""
+
+
+def buffer_blocks(data: BufferData) -> Iterator[memoryview | bytes]:
+    """Yield the canonical bytes of one or more buffers as hashable blocks.
+
+    Views are released once the next block is requested, so each block
+    should be processed immediately and not kept.
+
+    Args:
+        data: A buffer-protocol object, or a list or tuple of them
+
+    Yields:
+        Blocks whose concatenation is the canonical byte stream
+    """
+    buffers = data if isinstance(data, (list, tuple)) else (data,)
+    for buffer in buffers:
+        with memoryview(buffer) as view:
+            yield from _view_blocks(view)
+
+
+def _view_blocks(view: memoryview) -> Iterator[memoryview | bytes]:
+    """Split a memoryview into contiguous views or bounded copies, in C order."""
+    if view.c_contiguous:
+        yield view
+        return
+    rows = view.shape[0] if view.shape else 0
+    row_bytes = view.nbytes // rows if rows else 0
+    rows_per_block = max(1, COPY_BLOCK_SIZE // max(row_bytes, 1))
+    for start in range(0, rows, rows_per_block):
+        with view[start : start + rows_per_block] as block:
+            if block.c_contiguous:
+                yield block
+            else:
+                yield block.tobytes()
+
+
+def digest_buffer(data: BufferData, algorithms: Iterable[str] = ("sha256",)) -> dict[str, str]:
+    """Compute digests of in-memory data without copying it.
+
+    Args:
+        data: A buffer-protocol object, or a list or tuple of them hashed as
+            one stream
+        algorithms: Algorithm names from ``DIGEST_ALGORITHMS``
+
+    Returns:
+        Mapping of algorithm name to lowercase hex digest
+
+    Raises:
+        ValueError: If an algorithm is unsupported or no algorithm is given
+        TypeError: If data does not support the buffer protocol
+    """
+    hashers = new_hashers(algorithms)
+    for block in buffer_blocks(data):
+        for hasher in hashers.values():
+            hasher.update(block)
+    return {algorithm: hasher.hexdigest() for algorithm, hasher in hashers.items()}
@@ -0,0 +1,204 @@
+"""Persistent digest cache keyed by file identity.
+
+Hashing the same unchanged file again produces the same digest, so the
+cache remembers digests by (device, inode, size, mtime_ns, algorithm). A
+cache hit costs one ``stat`` call instead of a full read of the file.
+
+The cache trusts file metadata: a file rewritten in place with the same
+size and a restored modification time would be reported with its old
+digest. Audits should bypass the cache (see ``refresh`` on
+``digest_file`` and ``rehash`` on ``AttestationVerifier.verify_with_files``).
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from types import TracebackType
+
+DEFAULT_MAX_ENTRIES = 1_000_000
+"""Default maximum number of cached digests."""
+
+FileIdentity = tuple[int, int, int, int]
+"""(device, inode, size, mtime_ns) of a file."""
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS digests (
+    device INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    algorithm TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    last_used INTEGER NOT NULL,
+    PRIMARY KEY (device, inode, size, mtime_ns, algorithm)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS digests_last_used ON digests (last_used);
+"""
+
+
+def file_identity(st: os.stat_result) -> FileIdentity:
+    """Build the cache identity of a file from its stat result.
+
+    Args:
+        st: Result of ``os.stat`` for the file
+
+    Returns:
+        (device, inode, size, mtime_ns) tuple
+    """
+    return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+class DigestCache:
+    """SQLite-backed cache of file digests with LRU eviction.
+
+    The cache is safe to share between threads, so it can be used with
+    concurrent hashing. Entries beyond ``max_entries`` are evicted least
+    recently used first; eviction runs after every ``max_entries // 100``
+    insertions, so the cache can briefly exceed its bound by about 1%.
+
+    Example:
+        ```python
+        with DigestCache("~/.cache/makoto/digests.db") as cache:
+            builder = AttestationBuilder(digest_cache=cache)
+            builder.origin(...).with_subject_files(paths).build()
+
+            verifier = AttestationVerifier(digest_cache=cache)
+            verifier.verify_with_files(statement, files)  # stat-only if unchanged
+        ```
+    """
+
+    def __init__(self, path: Path | str, *, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        """Open (or create) a digest cache.
+
+        Args:
+            path: Path to the SQLite database file (``":memory:"`` for a
+                process-local cache)
+            max_entries: Maximum number of cached digests
+
+        Raises:
+            ValueError: If max_entries is less than 1
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        if str(path) != ":memory:":
+            path = Path(path).expanduser()
+            path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.max_entries = max_entries
+        self._evict_every = max(1, max_entries // 100)
+        self._inserts = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def get(self, identity: FileIdentity, algorithms: Iterable[str]) -> dict[str, str]:
+        """Look up cached digests for a file.
+
+        Hits are marked as recently used.
+
+        Args:
+            identity: File identity from ``file_identity``
+            algorithms: Algorithms to look up
+
+        Returns:
+            Mapping of algorithm to digest for the algorithms found
+        """
+        algorithms = list(algorithms)
+        placeholders = ", ".join("?" * len(algorithms))
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT algorithm, digest FROM digests "
+                "WHERE device = ? AND inode = ? AND size = ? AND mtime_ns = ? "
+                f"AND algorithm IN ({placeholders})",
+                (*identity, *algorithms),
+            ).fetchall()
+            if rows:
+                self._conn.execute(
+                    "UPDATE digests SET last_used = ? "
+                    "WHERE device = ? AND inode = ? AND size = ? AND mtime_ns = ? "
+                    f"AND algorithm IN ({placeholders})",
+                    (time.time_ns(), *identity, *algorithms),
+                )
+        return dict(rows)
+
+    def put(self, identity: FileIdentity, digests: dict[str, str]) -> None:
+        """Store digests for a file.
+
+        Args:
+            identity: File identity from ``file_identity``
+            digests: Mapping of algorithm to digest
+        """
+        now = time.time_ns()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO digests "
+                "(device, inode, size, mtime_ns, algorithm, digest, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(*identity, algorithm, digest, now) for algorithm, digest in digests.items()],
+            )
+            self._inserts += len(digests)
+            if self._inserts >= self._evict_every:
+                self._evict()
+
+    def invalidate(self, path: Path | str) -> None:
+        """Forget every cached digest for a file's current inode.
+
+        Args:
+            path: Path to the file
+        """
+        st = os.stat(path)
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM digests WHERE device = ? AND inode = ?", (st.st_dev, st.st_ino)
+            )
+
+    def clear(self) -> None:
+        """Remove every cached digest."""
+        with self._lock:
+            self._conn.execute("DELETE FROM digests")
+
+    def close(self) -> None:
+        """Evict down to the size bound and close the database."""
+        with self._lock:
+            self._evict()
+            self._conn.close()
+
+    def __len__(self) -> int:
+        """Return the number of cached digests."""
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM digests").fetchone()
+        return int(count)
+
+    def __enter__(self) -> DigestCache:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def _evict(self) -> None:
+        """Delete least recently used entries beyond max_entries (lock held)."""
+        self._inserts = 0
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM digests").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM digests WHERE (device, inode, size, mtime_ns, algorithm) IN ("
+                "SELECT device, inode, size, mtime_ns, algorithm FROM digests "
+                "ORDER BY last_used LIMIT ?)",
+                (excess,),
+            )
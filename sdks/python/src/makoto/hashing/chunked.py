@@ -0,0 +1,200 @@
+"""Chunked Merkle digests for large files.
+
+A plain SHA-256 of a file is inherently sequential. A chunked digest splits
+the file into fixed-size chunks, hashes the chunks in parallel and combines
+the chunk hashes into a Merkle root, so hashing scales with the number of
+cores.
+
+Construction (``merkleRoot`` in a subject digest):
+
+- Leaves are ``SHA-256(chunk)`` for consecutive ``chunk_size`` byte chunks;
+  the last chunk may be shorter. An empty file has a single empty chunk.
+- Internal nodes are ``SHA-256(left || right)``; when a level has an odd
+  number of nodes the last node is paired with itself.
+
+A file no larger than one chunk therefore has ``merkleRoot == sha256``.
+The chunk size is recorded next to the root as ``merkleChunkSize`` so the
+digest can be recomputed by a verifier.
+
+Pairing an odd node with itself means the root alone does not fix the
+number of leaves: chunks ``A|B|C`` and ``A|B|C|C`` have the same root. The
+chunk count is therefore recorded as ``merkleChunkCount`` and a verifier
+must compare it along with the root.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import mmap
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from ..merkle import MerkleTree
+from .cache import file_identity
+from .files import check_cancelled
+
+if TYPE_CHECKING:
+    import threading
+    from pathlib import Path
+
+    from .cache import DigestCache
+
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+"""Default chunk size for chunked digests (4 MiB)."""
+
+MERKLE_ROOT_KEY = "merkleRoot"
+"""Digest key holding the chunked Merkle root."""
+
+MERKLE_CHUNK_SIZE_KEY = "merkleChunkSize"
+"""Digest key holding the chunk size used for the Merkle root."""
+
+MERKLE_CHUNK_COUNT_KEY = "merkleChunkCount"
+"""Digest key holding the number of chunks (leaves) under the Merkle root."""
+
+MERKLE_SIZE_KEY = "merkleSize"
+"""Digest key holding the number of bytes covered by an append-mode digest."""
+
+
+@dataclass(frozen=True)
+class ChunkedDigest:
+    """A chunked Merkle digest of a file.
+
+    Attributes:
+        root: Lowercase hex Merkle root
+        chunk_size: Chunk size in bytes
+        chunk_count: Number of chunks (leaves)
+        size: Number of bytes covered, recorded for append-mode digests
+            (see ``makoto.hashing.incremental``)
+    """
+
+    root: str
+    chunk_size: int
+    chunk_count: int
+    size: int | None = None
+
+    def to_digests(self) -> dict[str, str]:
+        """Return the digest entries for a subject's digest set."""
+        digests = {
+            MERKLE_ROOT_KEY: self.root,
+            MERKLE_CHUNK_SIZE_KEY: str(self.chunk_size),
+            MERKLE_CHUNK_COUNT_KEY: str(self.chunk_count),
+        }
+        if self.size is not None:
+            digests[MERKLE_SIZE_KEY] = str(self.size)
+        return digests
+
+
+def merkle_root(leaves: list[bytes]) -> bytes:
+    """Combine leaf hashes into a SHA-256 Merkle root.
+
+    Args:
+        leaves: Leaf hashes (at least one)
+
+    Returns:
+        The raw root hash
+
+    Raises:
+        ValueError: If there are no leaves
+    """
+    root = MerkleTree.from_leaf_hashes(leaves).root()
+    if root is None:
+        raise ValueError("At least one leaf is required")
+    return root
+
+
+def chunk_hashes(
+    path: Path | str,
+    *,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: int | None = None,
+    cancel: threading.Event | None = None,
+) -> list[bytes]:
+    """Hash each chunk of a file in parallel.
+
+    The file is memory-mapped and each chunk is hashed straight from the
+    map on a thread pool; hashlib releases the GIL while digesting.
+
+    Args:
+        path: Path to the file
+        chunk_size: Chunk size in bytes
+        workers: Maximum number of hashing threads
+        cancel: Event checked before each chunk; when set, hashing stops
+
+    Returns:
+        SHA-256 of every chunk, in file order
+
+    Raises:
+        ValueError: If chunk_size or workers is less than 1
+        HashingCancelledError: If ``cancel`` was set
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    if workers is not None and workers < 1:
+        raise ValueError("workers must be at least 1")
+
+    with open(path, "rb", buffering=0) as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return [hashlib.sha256(b"").digest()]
+
+        with mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as mm:
+            view = memoryview(mm)
+            try:
+
+                def hash_chunk(offset: int) -> bytes:
+                    check_cancelled(cancel)
+                    with view[offset : offset + chunk_size] as chunk:
+                        return hashlib.sha256(chunk).digest()
+
+                offsets = range(0, size, chunk_size)
+                if len(offsets) == 1 or workers == 1:
+                    return [hash_chunk(offset) for offset in offsets]
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    return list(executor.map(hash_chunk, offsets))
+            finally:
+                view.release()
+
+
+def chunked_digest(
+    path: Path | str,
+    *,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: int | None = None,
+    cache: DigestCache | None = None,
+    refresh: bool = False,
+    cancel: threading.Event | None = None,
+) -> ChunkedDigest:
+    """Compute the chunked Merkle digest of a file.
+
+    Args:
+        path: Path to the file
+        chunk_size: Chunk size in bytes
+        workers: Maximum number of hashing threads
+        cache: Digest cache to consult before hashing and update afterwards
+        refresh: Ignore a cached digest and re-hash
+        cancel: Event checked before each chunk; when set, hashing stops
+
+    Returns:
+        The chunked digest
+
+    Raises:
+        ValueError: If chunk_size or workers is less than 1
+        HashingCancelledError: If ``cancel`` was set
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    key = f"{MERKLE_ROOT_KEY}:{chunk_size}"
+    identity = file_identity(os.stat(path))
+    chunk_count = max(1, -(-identity[2] // chunk_size))
+    if cache is not None and not refresh:
+        cached = cache.get(identity, [key])
+        if key in cached:
+            return ChunkedDigest(cached[key], chunk_size, chunk_count)
+
+    leaves = chunk_hashes(path, chunk_size=chunk_size, workers=workers, cancel=cancel)
+    digest = ChunkedDigest(merkle_root(leaves).hex(), chunk_size, len(leaves))
+    if cache is not None and file_identity(os.stat(path)) == identity:
+        cache.put(identity, {key: digest.root})
+    return digest
@@ -0,0 +1,259 @@
+"""Directory (dataset) hashing with a deterministic aggregate digest.
+
+Directory trees such as Hive-partitioned tables are walked in parallel,
+every regular file is hashed, and the results can be combined into a single
+canonical manifest digest.
+
+Ordering and naming rules, which make the result independent of the
+filesystem the tree is stored on:
+
+- Paths are relative to the root, use ``/`` separators and are normalized
+  to Unicode NFC (macOS filesystems may return decomposed names).
+- Entries are sorted by the UTF-8 bytes of their relative path.
+- Symlinks to files are hashed as the file they point to; symlinks to
+  directories are not descended into.
+
+The aggregate digest uses the ``dirHash`` in-toto digest format (the
+``h1:`` scheme of ``golang.org/x/mod/sumdb/dirhash``): the SHA-256 of the
+manifest formed by one ``"<sha256 hex>  <relative path>\\n"`` line per file,
+encoded as ``"h1:" + base64``.
+
+A digest over a filtered tree records its ``include`` and ``exclude``
+patterns next to the ``dirHash`` as ``dirInclude`` and ``dirExclude``
+(JSON arrays), so a verifier hashes the same files.
+"""
+
+from __future__ import annotations
+
+import base64
+import fnmatch
+import hashlib
+import json
+import os
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .files import digest_files
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Mapping, Sequence
+
+    from .cache import DigestCache
+
+DIR_HASH_KEY = "dirHash"
+"""Digest key holding the aggregate directory digest."""
+
+DIR_INCLUDE_KEY = "dirInclude"
+"""Digest key holding the include patterns of a filtered ``dirHash``."""
+
+DIR_EXCLUDE_KEY = "dirExclude"
+"""Digest key holding the exclude patterns of a filtered ``dirHash``."""
+
+
+@dataclass(frozen=True)
+class DirectoryEntry:
+    """A file found under a directory.
+
+    Attributes:
+        relative_path: Canonical relative path (``/`` separators, NFC)
+        path: Filesystem path of the file
+    """
+
+    relative_path: str
+    path: Path
+
+
+@dataclass(frozen=True)
+class DirectoryDigest:
+    """Digests of every file under a directory plus the aggregate digest.
+
+    Attributes:
+        files: (relative path, digests) pairs in canonical order
+        dir_hash: Aggregate ``h1:`` digest over the sha256 of every file
+    """
+
+    files: list[tuple[str, dict[str, str]]]
+    dir_hash: str
+
+
+def walk_directory(
+    root: Path | str,
+    *,
+    include: Sequence[str] | None = None,
+    exclude: Sequence[str] | None = None,
+    workers: int | None = None,
+) -> list[DirectoryEntry]:
+    """List the files under a directory in canonical order.
+
+    Directories at the same depth are listed concurrently, which helps on
+    network filesystems where each listing is a round trip.
+
+    Args:
+        root: Directory to walk
+        include: Glob patterns a relative path must match (all files if None)
+        exclude: Glob patterns removing matching relative paths
+        workers: Maximum number of listing threads
+
+    Returns:
+        Entries sorted by the UTF-8 bytes of their relative path
+
+    Raises:
+        NotADirectoryError: If root is not a directory
+        ValueError: If a file name contains a newline
+    """
+    root = Path(root)
+    if not root.is_dir():
+        raise NotADirectoryError(f"Not a directory: {root}")
+
+    files: list[tuple[str, Path]] = []
+    pending = [(root, "")]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while pending:
+            next_pending: list[tuple[Path, str]] = []
+            listings = executor.map(_scan, [directory for directory, _ in pending])
+            for (_, prefix), listing in zip(pending, listings, strict=True):
+                for name, path, is_dir in listing:
+                    relative = f"{prefix}{name}"
+                    if is_dir:
+                        next_pending.append((path, f"{relative}/"))
+                    else:
+                        files.append((relative, path))
+            pending = next_pending
+
+    entries = []
+    for relative, path in files:
+        relative = unicodedata.normalize("NFC", relative)
+        if "\n" in relative:
+            raise ValueError(f"File name contains a newline: {relative!r}")
+        if include is not None and not _matches(relative, include):
+            continue
+        if exclude is not None and _matches(relative, exclude):
+            continue
+        entries.append(DirectoryEntry(relative, path))
+    entries.sort(key=lambda entry: entry.relative_path.encode("utf-8"))
+    return entries
+
+
+def _scan(directory: Path) -> list[tuple[str, Path, bool]]:
+    """List one directory as (name, path, is_dir) for files and subdirectories."""
+    listing = []
+    with os.scandir(directory) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                listing.append((entry.name, Path(entry.path), True))
+            elif entry.is_file():
+                listing.append((entry.name, Path(entry.path), False))
+    return listing
+
+
+def _matches(relative: str, patterns: Iterable[str]) -> bool:
+    """Check a relative path against glob patterns (``*`` also matches ``/``)."""
+    return any(fnmatch.fnmatchcase(relative, pattern) for pattern in patterns)
+
+
+def filter_digests(include: Sequence[str] | None, exclude: Sequence[str] | None) -> dict[str, str]:
+    """Return the digest entries recording the filters of a ``dirHash``.
+
+    Args:
+        include: Include patterns (not recorded if None)
+        exclude: Exclude patterns (not recorded if None)
+
+    Returns:
+        ``dirInclude`` and ``dirExclude`` entries, as JSON arrays
+    """
+    digests = {}
+    if include is not None:
+        digests[DIR_INCLUDE_KEY] = json.dumps(list(include))
+    if exclude is not None:
+        digests[DIR_EXCLUDE_KEY] = json.dumps(list(exclude))
+    return digests
+
+
+def recorded_filters(digests: Mapping[str, object]) -> tuple[list[str] | None, list[str] | None]:
+    """Read the include and exclude patterns recorded next to a ``dirHash``.
+
+    Args:
+        digests: Digest entries of a subject
+
+    Returns:
+        The include and exclude patterns (None when not recorded)
+
+    Raises:
+        ValueError: If a recorded filter is not a JSON array of strings
+    """
+    filters: list[list[str] | None] = []
+    for key in (DIR_INCLUDE_KEY, DIR_EXCLUDE_KEY):
+        value = digests.get(key)
+        if value is None:
+            filters.append(None)
+            continue
+        try:
+            patterns = json.loads(str(value))
+        except json.JSONDecodeError:
+            patterns = None
+        if not isinstance(patterns, list) or not all(isinstance(p, str) for p in patterns):
+            raise ValueError(f"{key} must be a JSON array of glob patterns")
+        filters.append(patterns)
+    return filters[0], filters[1]
+
+
+def dir_hash(files: Iterable[tuple[str, str]]) -> str:
+    """Compute the aggregate ``h1:`` digest of a set of files.
+
+    Args:
+        files: (relative path, sha256 hex) pairs; sorted canonically here
+
+    Returns:
+        The ``h1:`` digest string
+
+    Raises:
+        ValueError: If a path contains a newline
+    """
+    manifest = hashlib.sha256()
+    for relative, sha256 in sorted(files, key=lambda item: item[0].encode("utf-8")):
+        if "\n" in relative:
+            raise ValueError(f"File name contains a newline: {relative!r}")
+        manifest.update(f"{sha256}  {relative}\n".encode())
+    return "h1:" + base64.b64encode(manifest.digest()).decode("ascii")
+
+
+def digest_directory(
+    root: Path | str,
+    *,
+    include: Sequence[str] | None = None,
+    exclude: Sequence[str] | None = None,
+    algorithms: Sequence[str] = ("sha256",),
+    workers: int | None = None,
+    cache: DigestCache | None = None,
+    refresh: bool = False,
+) -> DirectoryDigest:
+    """Hash every file under a directory and compute the aggregate digest.
+
+    Args:
+        root: Directory to hash
+        include: Glob patterns a relative path must match (all files if None)
+        exclude: Glob patterns removing matching relative paths
+        algorithms: Digest algorithms per file (sha256 is always included,
+            since the aggregate digest is built from it)
+        workers: Maximum number of listing and hashing threads
+        cache: Digest cache to consult before hashing files
+        refresh: Ignore cached digests and re-hash every file
+
+    Returns:
+        Per-file digests in canonical order and the aggregate digest
+    """
+    entries = walk_directory(root, include=include, exclude=exclude, workers=workers)
+    algorithms = tuple(dict.fromkeys(("sha256", *algorithms)))
+    results = digest_files(
+        [entry.path for entry in entries], algorithms, workers=workers, cache=cache, refresh=refresh
+    )
+    files = [
+        (entry.relative_path, digests) for entry, digests in zip(entries, results, strict=True)
+    ]
+    return DirectoryDigest(
+        files=files,
+        dir_hash=dir_hash((relative, digests["sha256"]) for relative, digests in files),
+    )
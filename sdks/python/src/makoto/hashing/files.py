@@ -0,0 +1,293 @@
+"""High-throughput file hashing.
+
+This module is the single place where the SDK reads files to hash them.
+Small and medium files are read with ``readinto`` into one reused buffer
+whose size adapts to the file; large files are memory-mapped so the hash
+consumes pages straight from the page cache without intermediate copies.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import mmap
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+from .cache import file_identity
+
+if TYPE_CHECKING:
+    import threading
+    from collections.abc import Iterable, Iterator
+    from pathlib import Path
+
+    from .cache import DigestCache
+
+DIGEST_ALGORITHMS = ("sha256", "sha384", "sha512", "blake2b")
+"""Algorithms that can be computed for artifact digests (in-toto DigestSet names)."""
+
+MIN_BUFFER_SIZE = 64 * 1024
+"""Smallest read buffer used for non-empty files (64 KiB)."""
+
+MAX_BUFFER_SIZE = 4 * 1024 * 1024
+"""Largest read buffer; bigger buffers stop paying off (4 MiB)."""
+
+MMAP_THRESHOLD = 64 * 1024 * 1024
+"""Files at least this large are memory-mapped by default (64 MiB)."""
+
+MMAP_BLOCK_SIZE = 16 * 1024 * 1024
+"""Size of the slices fed to the hash when memory-mapping (16 MiB)."""
+
+
+class HashingCancelledError(Exception):
+    """Raised when hashing stops because its cancel event was set."""
+
+
+def check_cancelled(cancel: threading.Event | None) -> None:
+    """Raise if a cancel event has been set.
+
+    Args:
+        cancel: Event set by the caller to request cancellation
+
+    Raises:
+        HashingCancelledError: If the event is set
+    """
+    if cancel is not None and cancel.is_set():
+        raise HashingCancelledError("Hashing was cancelled")
+
+
+def buffer_size_for(file_size: int) -> int:
+    """Pick a read buffer size for a file.
+
+    Small files are read in a single call; larger files use a buffer that
+    grows with the file up to ``MAX_BUFFER_SIZE``.
+
+    Args:
+        file_size: Size of the file in bytes
+
+    Returns:
+        Buffer size in bytes, a multiple of the page size
+    """
+    size = max(MIN_BUFFER_SIZE, min(MAX_BUFFER_SIZE, file_size // 16))
+    # Round up to a whole number of pages so reads stay aligned
+    return -(-size // mmap.PAGESIZE) * mmap.PAGESIZE
+
+
+def read_blocks(
+    path: Path | str,
+    *,
+    buffer_size: int | None = None,
+    use_mmap: bool | None = None,
+) -> Iterator[memoryview]:
+    """Yield the contents of a file as a sequence of memoryview blocks.
+
+    Blocks are views into a reused buffer (or into a memory map), so each
+    block is only valid until the next one is requested. Consumers such as
+    ``hashlib`` objects should process it immediately and not keep it.
+
+    Args:
+        path: Path to the file
+        buffer_size: Read buffer size (defaults to ``buffer_size_for``)
+        use_mmap: Force memory-mapping on or off (defaults to mapping files
+            of at least ``MMAP_THRESHOLD`` bytes)
+
+    Yields:
+        Consecutive blocks of the file contents
+    """
+    with open(path, "rb", buffering=0) as f:
+        size = os.fstat(f.fileno()).st_size
+        if use_mmap is None:
+            use_mmap = size >= MMAP_THRESHOLD
+        # Empty files cannot be mapped; the readinto path handles them
+        if use_mmap and size > 0:
+            yield from _mmap_blocks(f.fileno(), size, buffer_size or MMAP_BLOCK_SIZE)
+            return
+
+        buf = bytearray(buffer_size or buffer_size_for(size))
+        view = memoryview(buf)
+        try:
+            while True:
+                n = f.readinto(buf)
+                if not n:
+                    break
+                block = view[:n]
+                try:
+                    yield block
+                finally:
+                    block.release()
+        finally:
+            view.release()
+
+
+def _mmap_blocks(fileno: int, size: int, block_size: int) -> Iterator[memoryview]:
+    """Yield blocks of a memory-mapped file."""
+    with mmap.mmap(fileno, size, access=mmap.ACCESS_READ) as mm:
+        if hasattr(mm, "madvise"):
+            mm.madvise(mmap.MADV_SEQUENTIAL)
+        view = memoryview(mm)
+        try:
+            for offset in range(0, size, block_size):
+                block = view[offset : offset + block_size]
+                try:
+                    yield block
+                finally:
+                    # Views must be released before the map can be closed
+                    block.release()
+        finally:
+            view.release()
+
+
+def new_hashers(algorithms: Iterable[str]) -> dict[str, hashlib._Hash]:
+    """Create one hash object per algorithm.
+
+    Args:
+        algorithms: Algorithm names from ``DIGEST_ALGORITHMS``
+
+    Returns:
+        Mapping of algorithm name to a fresh hash object
+
+    Raises:
+        ValueError: If an algorithm is unsupported or no algorithm is given
+    """
+    hashers: dict[str, hashlib._Hash] = {}
+    for algorithm in algorithms:
+        if algorithm not in DIGEST_ALGORITHMS:
+            raise ValueError(
+                f"Unsupported digest algorithm: {algorithm} "
+                f"(expected one of {', '.join(DIGEST_ALGORITHMS)})"
+            )
+        hashers[algorithm] = hashlib.new(algorithm)
+    if not hashers:
+        raise ValueError("At least one digest algorithm is required")
+    return hashers
+
+
+def digest_file(
+    path: Path | str,
+    algorithms: Iterable[str] = ("sha256",),
+    *,
+    buffer_size: int | None = None,
+    use_mmap: bool | None = None,
+    cache: DigestCache | None = None,
+    refresh: bool = False,
+    cancel: threading.Event | None = None,
+) -> dict[str, str]:
+    """Compute several digests of a file in a single read.
+
+    Every block read from the file is fed to each requested algorithm
+    before the next block is read, so the file is only read once no
+    matter how many digests are requested.
+
+    Args:
+        path: Path to the file
+        algorithms: Algorithm names from ``DIGEST_ALGORITHMS``
+        buffer_size: Read buffer size (defaults to ``buffer_size_for``)
+        use_mmap: Force memory-mapping on or off (see ``read_blocks``)
+        cache: Digest cache to consult before hashing and update afterwards
+        refresh: Ignore cached digests and re-hash (the cache is still updated)
+        cancel: Event checked between blocks; when set, hashing stops
+
+    Returns:
+        Mapping of algorithm name to lowercase hex digest
+
+    Raises:
+        ValueError: If an algorithm is unsupported
+        HashingCancelledError: If ``cancel`` was set
+    """
+    hashers = new_hashers(algorithms)
+    if cache is None:
+        return _digest_with(path, hashers, buffer_size, use_mmap, cancel)
+
+    identity = file_identity(os.stat(path))
+    cached = {} if refresh else cache.get(identity, list(hashers))
+    missing = {name: h for name, h in hashers.items() if name not in cached}
+    if not missing:
+        return {name: cached[name] for name in hashers}
+
+    computed = _digest_with(path, missing, buffer_size, use_mmap, cancel)
+    # Only cache if the file did not change while it was being read
+    if file_identity(os.stat(path)) == identity:
+        cache.put(identity, computed)
+    digests = {**cached, **computed}
+    return {name: digests[name] for name in hashers}
+
+
+def _digest_with(
+    path: Path | str,
+    hashers: dict[str, hashlib._Hash],
+    buffer_size: int | None,
+    use_mmap: bool | None,
+    cancel: threading.Event | None,
+) -> dict[str, str]:
+    """Feed a file through the given hash objects in one read."""
+    updates = [h.update for h in hashers.values()]
+    for block in read_blocks(path, buffer_size=buffer_size, use_mmap=use_mmap):
+        check_cancelled(cancel)
+        for update in updates:
+            update(block)
+    return {name: h.hexdigest() for name, h in hashers.items()}
+
+
+def digest_files(
+    paths: Iterable[Path | str],
+    algorithms: Iterable[str] = ("sha256",),
+    *,
+    workers: int | None = None,
+    cache: DigestCache | None = None,
+    refresh: bool = False,
+) -> list[dict[str, str]]:
+    """Compute digests of several files concurrently.
+
+    Files are hashed on a bounded thread pool; hashlib releases the GIL
+    while digesting, so this scales with the number of cores.
+
+    Args:
+        paths: Paths to the files
+        algorithms: Algorithm names from ``DIGEST_ALGORITHMS``
+        workers: Maximum number of hashing threads (defaults to the
+            ThreadPoolExecutor default)
+        cache: Digest cache to consult before hashing and update afterwards
+        refresh: Ignore cached digests and re-hash
+
+    Returns:
+        One digest mapping per file, in the same order as ``paths``
+
+    Raises:
+        ValueError: If workers is less than 1 or an algorithm is unsupported
+    """
+    file_paths = list(paths)
+    algorithms = tuple(algorithms)
+    new_hashers(algorithms)  # Validate before starting any work
+    if workers is not None and workers < 1:
+        raise ValueError("workers must be at least 1")
+
+    def digest(path: Path | str) -> dict[str, str]:
+        return digest_file(path, algorithms, cache=cache, refresh=refresh)
+
+    if len(file_paths) <= 1 or workers == 1:
+        return [digest(path) for path in file_paths]
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(digest, file_paths))
+
+
+def hash_file(
+    path: Path | str,
+    algorithm: str = "sha256",
+    *,
+    buffer_size: int | None = None,
+    use_mmap: bool | None = None,
+) -> str:
+    """Compute the hash of a file.
+
+    Args:
+        path: Path to the file
+        algorithm: Algorithm name from ``DIGEST_ALGORITHMS``
+        buffer_size: Read buffer size (defaults to ``buffer_size_for``)
+        use_mmap: Force memory-mapping on or off (see ``read_blocks``)
+
+    Returns:
+        Lowercase hex digest
+    """
+    digests = digest_file(path, (algorithm,), buffer_size=buffer_size, use_mmap=use_mmap)
+    return digests[algorithm]
@@ -0,0 +1,254 @@
+"""Incremental chunked Merkle digests for append-only files.
+
+Collectors that append to a log and re-attest it periodically should not
+re-read the whole file every time. The chunked Merkle root (see
+``makoto.hashing.chunked``) can be extended: the hashes of all complete
+chunks are summarized by a *frontier*, the roots of the perfect subtrees
+covering them (one per set bit of the chunk count, like a binary counter).
+The frontier is persisted as an ``AppendState``; re-attesting a grown file
+only hashes the chunks after it, and the root over the current size is
+derived from the frontier without revisiting earlier chunks.
+
+An append-mode digest records the number of bytes it covers as
+``merkleSize``, so a file that keeps growing after attestation can still be
+verified, and an earlier attestation of the same file can be checked to be
+a prefix of a later one (``prefix_roots``).
+
+The frontier does not detect rewrites of data it has already summarized.
+As a cheap guard, the last complete chunk is re-hashed on every update and
+a shrinking file is rejected; a full audit should use ``chunked_digest``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from ..merkle import MerkleAccumulator
+from .chunked import DEFAULT_CHUNK_SIZE, ChunkedDigest
+from .files import check_cancelled
+
+if TYPE_CHECKING:
+    import threading
+    from collections.abc import Sequence
+
+
+@dataclass(frozen=True)
+class AppendState:
+    """Persistable state of an append-mode digest.
+
+    Attributes:
+        chunk_size: Chunk size in bytes
+        chunk_count: Number of complete chunks summarized
+        peaks: Hex subtree roots by height
+        last_chunk: Hex SHA-256 of the last complete chunk (None if none)
+    """
+
+    chunk_size: int
+    chunk_count: int = 0
+    peaks: tuple[tuple[int, str], ...] = ()
+    last_chunk: str | None = None
+
+    @property
+    def size(self) -> int:
+        """Number of bytes covered by the complete chunks."""
+        return self.chunk_count * self.chunk_size
+
+    def frontier(self) -> MerkleAccumulator:
+        """Rebuild the Merkle frontier."""
+        return MerkleAccumulator(
+            count=self.chunk_count,
+            peaks={height: bytes.fromhex(peak) for height, peak in self.peaks},
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        """Serialize to a JSON-compatible dict."""
+        return {
+            "chunkSize": self.chunk_size,
+            "chunkCount": self.chunk_count,
+            "peaks": {str(height): peak for height, peak in self.peaks},
+            "lastChunk": self.last_chunk,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> AppendState:
+        """Deserialize from a dict produced by ``to_dict``."""
+        state = cls(
+            chunk_size=int(data["chunkSize"]),
+            chunk_count=int(data["chunkCount"]),
+            peaks=tuple(sorted((int(h), str(p)) for h, p in data["peaks"].items())),
+            last_chunk=data.get("lastChunk"),
+        )
+        state.frontier()  # Validate the peaks
+        return state
+
+    def save(self, path: Path | str) -> None:
+        """Atomically write the state as JSON."""
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(self.to_dict()))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path | str) -> AppendState:
+        """Read a state written by ``save``."""
+        return cls.from_dict(json.loads(Path(path).read_text()))
+
+
+def append_digest(
+    path: Path | str,
+    state: AppendState | None = None,
+    *,
+    chunk_size: int | None = None,
+    cancel: threading.Event | None = None,
+) -> tuple[ChunkedDigest, AppendState]:
+    """Compute the chunked Merkle digest of an append-only file incrementally.
+
+    Only the bytes after ``state.size`` are read (plus the last complete
+    chunk, re-hashed as a guard against rewrites).
+
+    Args:
+        path: Path to the file
+        state: State returned by a previous call for the same file (None to
+            start from the beginning)
+        chunk_size: Chunk size in bytes (defaults to the state's chunk size,
+            or ``DEFAULT_CHUNK_SIZE``)
+        cancel: Event checked before each chunk; when set, hashing stops
+
+    Returns:
+        The digest over the file's current size (with ``size`` set), and the
+        state to pass to the next call
+
+    Raises:
+        ValueError: If chunk_size is invalid or differs from the state's, or
+            if the file shrank or its last summarized chunk changed
+        HashingCancelledError: If ``cancel`` was set
+    """
+    if state is None:
+        state = AppendState(DEFAULT_CHUNK_SIZE if chunk_size is None else chunk_size)
+    elif chunk_size is not None and chunk_size != state.chunk_size:
+        raise ValueError(f"chunk_size {chunk_size} does not match the state's {state.chunk_size}")
+    chunk_size = state.chunk_size
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+
+    frontier = state.frontier()
+    last_chunk = state.last_chunk
+    buffer = bytearray(chunk_size)
+    with open(path, "rb", buffering=0) as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < state.size:
+            raise ValueError(f"File shrank below its attested size: {path}")
+        if last_chunk is not None:
+            f.seek(state.size - chunk_size)
+            _read_exact(f, buffer, chunk_size)
+            if hashlib.sha256(buffer).hexdigest() != last_chunk:
+                raise ValueError(f"File was modified before its attested size: {path}")
+
+        offset = state.size
+        f.seek(offset)
+        tail: bytes | None = None
+        with memoryview(buffer) as view:
+            while offset < size or frontier.count == 0:
+                check_cancelled(cancel)
+                length = min(chunk_size, size - offset)
+                with view[:length] as chunk:
+                    _read_exact(f, chunk, length)
+                    leaf = hashlib.sha256(chunk).digest()
+                if length < chunk_size:
+                    tail = leaf
+                    break
+                frontier.append_leaf_hash(leaf)
+                last_chunk = leaf.hex()
+                offset += length
+
+    digest = ChunkedDigest(
+        _root(frontier, tail).hex(),
+        chunk_size,
+        frontier.count + (tail is not None),
+        size=size,
+    )
+    new_state = AppendState(
+        chunk_size,
+        frontier.count,
+        tuple(sorted((height, peak.hex()) for height, peak in frontier.peaks.items())),
+        last_chunk,
+    )
+    return digest, new_state
+
+
+def prefix_roots(
+    path: Path | str,
+    sizes: Sequence[int],
+    *,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    cancel: threading.Event | None = None,
+) -> list[str]:
+    """Compute the chunked Merkle roots of several prefixes of a file in one pass.
+
+    Used to check that an earlier append-mode digest is consistent with a
+    later one: both must be roots of prefixes of the same file.
+
+    Args:
+        path: Path to the file
+        sizes: Prefix lengths in bytes
+        chunk_size: Chunk size in bytes
+        cancel: Event checked before each chunk; when set, hashing stops
+
+    Returns:
+        Hex root of each prefix, in the order of ``sizes``
+
+    Raises:
+        ValueError: If chunk_size is invalid or a size exceeds the file size
+        HashingCancelledError: If ``cancel`` was set
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    wanted = sorted(set(sizes))
+    roots: dict[int, str] = {}
+    frontier = MerkleAccumulator()
+    buffer = bytearray(chunk_size)
+    with open(path, "rb", buffering=0) as f, memoryview(buffer) as view:
+        file_size = os.fstat(f.fileno()).st_size
+        if wanted and wanted[-1] > file_size:
+            raise ValueError(f"Prefix of {wanted[-1]} bytes exceeds the file size of {path}")
+        offset = 0
+        for size in wanted:
+            while offset + chunk_size <= size:
+                check_cancelled(cancel)
+                _read_exact(f, view, chunk_size)
+                frontier.append_leaf_hash(hashlib.sha256(view).digest())
+                offset += chunk_size
+            length = size - offset
+            if length == 0 and frontier.count:
+                roots[size] = _root(frontier).hex()
+            else:
+                _read_exact(f, view, length)
+                f.seek(offset)
+                with view[:length] as chunk:
+                    roots[size] = _root(frontier, hashlib.sha256(chunk).digest()).hex()
+    return [roots[size] for size in sizes]
+
+
+def _root(frontier: MerkleAccumulator, tail: bytes | None = None) -> bytes:
+    """Compute the root of a frontier that has at least one leaf."""
+    root = frontier.root(tail)
+    if root is None:
+        raise ValueError("Cannot compute the root of an empty tree")
+    return root
+
+
+def _read_exact(f: Any, view: memoryview | bytearray, length: int) -> None:
+    """Fill the first ``length`` bytes of a buffer from a file."""
+    with memoryview(view) as target:
+        filled = 0
+        while filled < length:
+            with target[filled:length] as rest:
+                n = f.readinto(rest)
+            if not n:
+                raise ValueError("File ended before the expected size")
+            filled += n
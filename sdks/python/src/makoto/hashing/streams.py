@@ -0,0 +1,270 @@
+"""Hash data while it streams to or from somewhere else.
+
+Data produced as a stream (HTTP uploads, generator pipelines) can be hashed
+on its way to its destination instead of being written to disk and read
+back. The wrappers here are file objects that update their hashers with
+every block that passes through them and hand the final digests to a
+callback once the stream is complete.
+
+A digest only covers data that actually passed through the wrapper, so the
+callback is not invoked for incomplete streams: a writer closed by an
+exception, or a reader closed before the end of its source.
+"""
+
+from __future__ import annotations
+
+import io
+from typing import IO, TYPE_CHECKING, Any
+
+from .files import new_hashers
+
+if TYPE_CHECKING:
+    import hashlib
+    from collections.abc import Callable, Iterable, Iterator
+    from types import TracebackType
+
+
+class _HashingStream(io.RawIOBase):
+    """Common state of the hashing stream wrappers.
+
+    Attributes:
+        size: Number of bytes hashed so far
+    """
+
+    def __init__(
+        self,
+        algorithms: Iterable[str],
+        on_complete: Callable[[dict[str, str]], object] | None,
+        close_inner: bool,
+    ) -> None:
+        super().__init__()
+        self._hashers: dict[str, hashlib._Hash] = new_hashers(algorithms)
+        self._on_complete = on_complete
+        self._close_inner = close_inner
+        self._aborted = False
+        self.size = 0
+
+    def _update(self, data: memoryview) -> None:
+        for hasher in self._hashers.values():
+            hasher.update(data)
+        self.size += data.nbytes
+
+    def digests(self) -> dict[str, str]:
+        """Return the hex digests of the data hashed so far."""
+        return {algorithm: hasher.hexdigest() for algorithm, hasher in self._hashers.items()}
+
+    def abort(self) -> None:
+        """Close the stream without reporting its digests."""
+        self._aborted = True
+        self.close()
+
+    def __del__(self) -> None:
+        # A stream that is garbage collected was never completed explicitly
+        self._aborted = True
+        super().__del__()
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+
+
+class HashingWriter(_HashingStream):
+    """A writable stream that hashes everything written to it.
+
+    Data is passed on to ``destination`` (if any) and hashed; only the bytes
+    the destination accepted are hashed. When the writer is closed normally
+    the digests are passed to ``on_complete``.
+
+    Example:
+        ```python
+        with open("upload.csv", "wb") as f, HashingWriter(f, on_complete=print) as w:
+            for chunk in request.iter_chunks():
+                w.write(chunk)
+        ```
+    """
+
+    def __init__(
+        self,
+        destination: IO[bytes] | None = None,
+        algorithms: Iterable[str] = ("sha256",),
+        *,
+        on_complete: Callable[[dict[str, str]], object] | None = None,
+        close_destination: bool = False,
+    ) -> None:
+        """Create a hashing writer.
+
+        Args:
+            destination: Binary stream receiving the data (hash only if None)
+            algorithms: Digest algorithms to compute
+            on_complete: Called with the digests when the writer is closed
+                without error
+            close_destination: Also close ``destination`` when closing
+
+        Raises:
+            ValueError: If an algorithm is unsupported or no algorithm is given
+        """
+        super().__init__(algorithms, on_complete, close_destination)
+        self._destination = destination
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b: Any) -> int:
+        """Write and hash a bytes-like object.
+
+        Returns:
+            Number of bytes written (as reported by the destination)
+        """
+        if self.closed:
+            raise ValueError("write to closed stream")
+        with memoryview(b) as view, view.cast("B") as data:
+            written = data.nbytes
+            if self._destination is not None:
+                result = self._destination.write(data)
+                # Some file-like objects return None from write()
+                written = data.nbytes if result is None else result
+            with data[:written] as accepted:
+                self._update(accepted)
+        return written
+
+    def flush(self) -> None:
+        if self._destination is not None and not self.closed:
+            self._destination.flush()
+
+    def close(self) -> None:
+        """Flush the destination and report the digests unless aborted."""
+        if self.closed:
+            return
+        try:
+            if not self._aborted:
+                self.flush()
+                if self._on_complete is not None:
+                    self._on_complete(self.digests())
+        finally:
+            if self._close_inner and self._destination is not None:
+                self._destination.close()
+            super().close()
+
+
+class HashingReader(_HashingStream):
+    """A readable stream that hashes everything read through it.
+
+    The digests are passed to ``on_complete`` when the reader is closed
+    after reaching the end of ``source``.
+
+    Example:
+        ```python
+        with HashingReader(response.raw, on_complete=print) as r:
+            shutil.copyfileobj(r, destination)
+        ```
+    """
+
+    def __init__(
+        self,
+        source: IO[bytes],
+        algorithms: Iterable[str] = ("sha256",),
+        *,
+        on_complete: Callable[[dict[str, str]], object] | None = None,
+        close_source: bool = False,
+    ) -> None:
+        """Create a hashing reader.
+
+        Args:
+            source: Binary stream to read from
+            algorithms: Digest algorithms to compute
+            on_complete: Called with the digests when the reader is closed
+                after the end of the source
+            close_source: Also close ``source`` when closing
+
+        Raises:
+            ValueError: If an algorithm is unsupported or no algorithm is given
+        """
+        super().__init__(algorithms, on_complete, close_source)
+        self._source = source
+        self._eof = False
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b: Any) -> int:
+        """Read into a writable buffer and hash what was read.
+
+        Returns:
+            Number of bytes read (0 at the end of the source)
+        """
+        if self.closed:
+            raise ValueError("read from closed stream")
+        with memoryview(b) as view, view.cast("B") as target:
+            readinto = getattr(self._source, "readinto", None)
+            if readinto is not None:
+                count = readinto(target) or 0
+            else:
+                chunk = self._source.read(target.nbytes)
+                count = len(chunk)
+                target[:count] = chunk
+            if count == 0:
+                self._eof = True
+            else:
+                with target[:count] as data:
+                    self._update(data)
+        return count
+
+    def close(self) -> None:
+        """Report the digests if the whole source was read.
+
+        Raises:
+            ValueError: If closed before the end of the source (the digests
+                would not cover all of the data); use ``abort`` to discard
+        """
+        if self.closed:
+            return
+        try:
+            if not self._aborted and self._on_complete is not None:
+                if not self._eof:
+                    raise ValueError("Stream closed before the end of its source")
+                self._on_complete(self.digests())
+        finally:
+            if self._close_inner:
+                self._source.close()
+            super().close()
+
+
+def hashing_iter(
+    chunks: Iterable[bytes],
+    algorithms: Iterable[str] = ("sha256",),
+    *,
+    on_complete: Callable[[dict[str, str]], object],
+) -> Iterator[bytes]:
+    """Pass chunks through unchanged while hashing them.
+
+    ``on_complete`` is called with the digests once ``chunks`` is exhausted;
+    it is not called if the iteration is abandoned early.
+
+    Args:
+        chunks: Bytes-like chunks
+        algorithms: Digest algorithms to compute
+        on_complete: Called with the digests after the last chunk
+
+    Returns:
+        Iterator yielding the same chunks
+
+    Raises:
+        ValueError: If an algorithm is unsupported or no algorithm is given
+    """
+    hashers = new_hashers(algorithms)
+
+    def generate() -> Iterator[bytes]:
+        for chunk in chunks:
+            for hasher in hashers.values():
+                hasher.update(chunk)
+            yield chunk
+        on_complete({algorithm: hasher.hexdigest() for algorithm, hasher in hashers.items()})
+
+    return generate()
@@ -0,0 +1,57 @@
+"""Merkle trees for Makoto stream window attestations.
+
+This package computes the Merkle roots recorded in stream window
+predicates (``integrity.merkleTree``), bit-identical to the Rust SDK,
+either from a full in-memory tree or with a constant-memory accumulator,
+and generates and checks inclusion and consistency proofs against those
+roots. Keyed trees order leaves by record key for lookups and
+non-inclusion proofs by key. Trees too large for memory are written to and served from
+memory-mapped tree files, and served over HTTP by ``ProofServer``.
+Records can be canonicalized into leaf bytes (``leafEncoding``) so that
+every collector hashes them identically.
+"""
+
+from .accumulator import MerkleAccumulator, pane_composed_root
+from .algorithms import hash_function, hash_leaf, hash_pair
+from .client import ProofClient
+from .encoding import (
+    JcsEncoder,
+    LeafEncoder,
+    LengthPrefixedEncoder,
+    RawEncoder,
+    encode_records,
+    leaf_encoder,
+)
+from .keyed import KeyedMerkleTree, KeyedProof, NonInclusionProof, keyed_leaf_hash
+from .proofs import ConsistencyProof, MerkleMultiproof, MerkleProof
+from .server import ProofServer, TreeStore
+from .storage import MappedMerkleTree, MerkleTreeWriter, save_tree
+from .tree import MerkleTree
+
+__all__ = [
+    "ConsistencyProof",
+    "JcsEncoder",
+    "KeyedMerkleTree",
+    "KeyedProof",
+    "LeafEncoder",
+    "LengthPrefixedEncoder",
+    "MappedMerkleTree",
+    "MerkleAccumulator",
+    "MerkleMultiproof",
+    "MerkleProof",
+    "MerkleTree",
+    "MerkleTreeWriter",
+    "NonInclusionProof",
+    "ProofClient",
+    "ProofServer",
+    "RawEncoder",
+    "TreeStore",
+    "encode_records",
+    "hash_function",
+    "hash_leaf",
+    "hash_pair",
+    "keyed_leaf_hash",
+    "leaf_encoder",
+    "pane_composed_root",
+    "save_tree",
+]
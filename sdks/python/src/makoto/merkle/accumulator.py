@@ -0,0 +1,254 @@
+"""Constant-memory Merkle root computation for streams of records.
+
+``MerkleAccumulator`` computes the same root as ``MerkleTree`` while only
+keeping the *frontier*: the roots of the perfect subtrees covering the
+leaves so far, one per set bit of the leaf count (like a binary counter).
+Memory is O(log n) hashes regardless of the window size.
+
+The root of the full tree (where an odd last node is paired with itself)
+is derived from the frontier on demand: walking up from the lowest level,
+the incomplete right edge of the tree is carried along and combined with
+each frontier root it meets, or with itself where the tree has no sibling.
+
+``pane_composed_root`` recomputes the root of a pane-composed sliding
+window (``paneLeafCounts``): one tree per pane, and a tree over the pane
+roots.
+"""
+
+from __future__ import annotations
+
+import itertools
+from typing import TYPE_CHECKING, Any
+
+from ..models.stream_window import MerkleTree as MerkleTreeModel
+from .algorithms import build_level, hash_function
+from .encoding import encode_records, leaf_encoder
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Sequence
+
+    from typing_extensions import Buffer
+
+    from ..models.stream_window import HashAlgorithm, LeafEncoding
+
+
+# Records hashed per call to ``extend_leaf_hashes`` when extending
+_EXTEND_CHUNK = 4096
+
+_END = object()
+
+
+class MerkleAccumulator:
+    """Incremental Merkle tree builder keeping only the O(log n) frontier.
+
+    Example:
+        ```python
+        acc = MerkleAccumulator()
+        for batch in consumer:
+            acc.extend(batch)
+        integrity = Integrity(merkle_tree=acc.to_model())
+        ```
+    """
+
+    def __init__(
+        self,
+        algorithm: HashAlgorithm = "sha256",
+        *,
+        leaf_algorithm: HashAlgorithm | None = None,
+        encoding: LeafEncoding = "raw",
+        count: int = 0,
+        peaks: dict[int, bytes] | None = None,
+    ) -> None:
+        """Create an accumulator, optionally resuming from a saved frontier.
+
+        Args:
+            algorithm: Hash algorithm of the internal nodes
+            leaf_algorithm: Hash algorithm of the leaves (default: algorithm)
+            encoding: Leaf encoding applied to each record before hashing
+            count: Number of leaves already summarized
+            peaks: Subtree root by height, one for each set bit of count
+
+        Raises:
+            ValueError: If the peaks do not match the bits of count
+        """
+        peaks = dict(peaks or {})
+        if set(peaks) != {h for h in range(count.bit_length()) if count >> h & 1}:
+            raise ValueError("Frontier peaks do not match the leaf count")
+        self.algorithm: HashAlgorithm = algorithm
+        self.leaf_algorithm: HashAlgorithm = leaf_algorithm or algorithm
+        self.leaf_encoding: LeafEncoding = encoding
+        self._encoder = leaf_encoder(encoding)
+        self._new = hash_function(algorithm)
+        self._leaf_new = hash_function(self.leaf_algorithm)
+        self._leaf_size: int = self._leaf_new().digest_size
+        self.digest_size: int = self._new().digest_size
+        self.count = count
+        self.peaks = peaks
+
+    @property
+    def leaf_count(self) -> int:
+        """Number of leaves appended."""
+        return self.count
+
+    @property
+    def tree_height(self) -> int:
+        """Height of the equivalent ``MerkleTree`` (0 when empty)."""
+        return (self.count - 1).bit_length() + 1 if self.count else 0
+
+    def append(self, record: Any) -> None:
+        """Encode and hash a record and add it as the next leaf."""
+        if self.leaf_encoding != "raw":
+            record = self._encoder.encode(record)
+        self.append_leaf_hash(self._leaf_new(record).digest())
+
+    def extend(self, records: Iterable[Any]) -> None:
+        """Encode and hash a batch of records and add them as leaves."""
+        new = self._leaf_new
+        encoded = iter(encode_records(records, self.leaf_encoding))
+        while chunk := list(itertools.islice(encoded, _EXTEND_CHUNK)):
+            self.extend_leaf_hashes(b"".join([new(record).digest() for record in chunk]))
+
+    def append_leaf_hash(self, leaf: bytes) -> None:
+        """Add a precomputed leaf hash."""
+        self._append_node(leaf, 0)
+
+    def extend_leaf_hashes(self, leaves: Buffer) -> None:
+        """Add precomputed leaf hashes, concatenated in one buffer.
+
+        Aligned runs of 2**k leaves are folded into their subtree root a
+        level at a time before joining the frontier, which avoids the
+        per-leaf frontier walk of ``append_leaf_hash``.
+
+        Raises:
+            ValueError: If the buffer is not a multiple of the leaf digest size
+        """
+        size = self._leaf_size
+        with memoryview(leaves) as view:
+            if len(view) % size:
+                raise ValueError(f"Leaf buffer is not a multiple of {size} bytes")
+            remaining = len(view) // size
+            offset = 0
+            while remaining:
+                # The subtree must start at a multiple of its width
+                aligned = (self.count & -self.count).bit_length() - 1 if self.count else 63
+                height = min(aligned, remaining.bit_length() - 1)
+                width = 1 << height
+                level: bytes | memoryview = view[offset : offset + width * size]
+                node_size = size
+                for _ in range(height):
+                    level = build_level(level, node_size, self._new)
+                    node_size = self.digest_size
+                self._append_node(bytes(level), height)
+                offset += width * size
+                remaining -= width
+
+    def _append_node(self, node: bytes, height: int) -> None:
+        """Add the root of a perfect subtree of 2**height leaves."""
+        width = 1 << height
+        peaks = self.peaks
+        while self.count >> height & 1:
+            node = self._new(peaks.pop(height) + node).digest()
+            height += 1
+        peaks[height] = node
+        self.count += width
+
+    def root(self, tail: bytes | None = None) -> bytes | None:
+        """Compute the root of the leaves so far.
+
+        Args:
+            tail: Optional extra last leaf hash included in the root without
+                being added (e.g. a partial chunk that may still grow)
+
+        Returns:
+            The raw root hash, or None if there are no leaves
+        """
+        count, peaks = self.count, self.peaks
+        if tail is not None:
+            extended = MerkleAccumulator(
+                self.algorithm, leaf_algorithm=self.leaf_algorithm, count=count, peaks=peaks
+            )
+            extended.append_leaf_hash(tail)
+            count, peaks = extended.count, extended.peaks
+        if count == 0:
+            return None
+
+        new = self._new
+        carry: bytes | None = None
+        height = 0
+        while True:
+            complete = count >> height
+            if complete + (carry is not None) == 1:
+                return carry if carry is not None else peaks[height]
+            if complete & 1:
+                peak = peaks[height]
+                carry = new(peak + (carry if carry is not None else peak)).digest()
+            elif carry is not None:
+                carry = new(carry + carry).digest()
+            height += 1
+
+    def root_hex(self) -> str | None:
+        """Return the root as lowercase hex (None if there are no leaves)."""
+        root = self.root()
+        return root.hex() if root is not None else None
+
+    def to_model(self) -> MerkleTreeModel:
+        """Describe the tree for a stream window predicate.
+
+        Raises:
+            ValueError: If no leaves were appended
+        """
+        root = self.root_hex()
+        if root is None:
+            raise ValueError("An empty Merkle tree has no root")
+        return MerkleTreeModel(
+            algorithm=self.algorithm,
+            leaf_count=self.count,
+            root=root,
+            tree_height=self.tree_height,
+            leaf_hash_algorithm=(
+                self.leaf_algorithm if self.leaf_algorithm != self.algorithm else None
+            ),
+            leaf_encoding=self.leaf_encoding if self.leaf_encoding != "raw" else None,
+        )
+
+
+def pane_composed_root(
+    records: Iterable[Any],
+    pane_leaf_counts: Sequence[int],
+    algorithm: HashAlgorithm = "sha256",
+    *,
+    encoding: LeafEncoding = "raw",
+) -> bytes:
+    """Recompute the Merkle root of a pane-composed sliding window.
+
+    Args:
+        records: The window's records, pane by pane, in the order hashed
+        pane_leaf_counts: Number of records in each pane (``paneLeafCounts``)
+        algorithm: Hash algorithm of the leaves and nodes
+        encoding: Leaf encoding applied to each record before hashing
+
+    Returns:
+        The raw root hash
+
+    Raises:
+        ValueError: If there are no panes, a pane is empty, or the records
+            do not fill the panes exactly
+    """
+    if not pane_leaf_counts or min(pane_leaf_counts) < 1:
+        raise ValueError("Every pane must hold at least one record")
+    remaining = iter(records)
+    roots = []
+    for count in pane_leaf_counts:
+        pane = MerkleAccumulator(algorithm, encoding=encoding)
+        pane.extend(itertools.islice(remaining, count))
+        root = pane.root()
+        if pane.count != count or root is None:
+            raise ValueError("Fewer records than the panes hold")
+        roots.append(root)
+    if next(remaining, _END) is not _END:
+        raise ValueError("More records than the panes hold")
+    composed = MerkleAccumulator(algorithm)
+    composed.extend_leaf_hashes(b"".join(roots))
+    root = composed.root()
+    assert root is not None
+    return root
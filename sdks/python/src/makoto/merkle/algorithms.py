@@ -0,0 +1,88 @@
+"""Hash functions for Merkle trees.
+
+Every ``HashAlgorithm`` literal maps to a hashlib-style constructor.
+``blake3`` needs the optional ``blake3`` package. ``build_level`` hashes
+a whole level buffer into its parent level.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from typing_extensions import Buffer
+
+    from ..models.stream_window import HashAlgorithm
+
+_HASHLIB_ALGORITHMS: dict[str, Callable[..., Any]] = {
+    "sha256": hashlib.sha256,
+    "sha384": hashlib.sha384,
+    "sha512": hashlib.sha512,
+    "blake2b": hashlib.blake2b,
+}
+
+
+def hash_function(algorithm: HashAlgorithm) -> Callable[..., Any]:
+    """Return the hash constructor for a Merkle tree algorithm.
+
+    Args:
+        algorithm: A ``HashAlgorithm`` literal
+
+    Returns:
+        A hashlib-style constructor accepting the data to hash
+
+    Raises:
+        ValueError: If the algorithm is unknown
+        ImportError: If ``blake3`` is requested but not installed
+    """
+    if algorithm == "blake3":
+        try:
+            from blake3 import blake3
+        except ImportError as e:
+            raise ImportError(
+                "blake3 Merkle trees require the optional 'blake3' package "
+                "(pip install 'makoto[blake3]')"
+            ) from e
+        return blake3  # type: ignore[no-any-return]
+    try:
+        return _HASHLIB_ALGORITHMS[algorithm]
+    except KeyError:
+        raise ValueError(f"Unsupported Merkle hash algorithm: {algorithm}") from None
+
+
+def hash_leaf(data: Buffer, algorithm: HashAlgorithm = "sha256") -> bytes:
+    """Hash a record into a leaf."""
+    return bytes(hash_function(algorithm)(data).digest())
+
+
+def hash_pair(left: bytes, right: bytes, algorithm: HashAlgorithm = "sha256") -> bytes:
+    """Hash two child nodes into their parent."""
+    hasher = hash_function(algorithm)()
+    hasher.update(left)
+    hasher.update(right)
+    return bytes(hasher.digest())
+
+
+def build_level(level: bytes | memoryview, digest_size: int, new: Callable[..., Any]) -> bytes:
+    """Compute the parent level of a level buffer.
+
+    Args:
+        level: Contiguous node hashes
+        digest_size: Size of each node hash
+        new: Hash constructor
+
+    Returns:
+        Contiguous parent hashes (the last node is paired with itself when
+        the level has an odd number of nodes)
+    """
+    pair = 2 * digest_size
+    paired = len(level) - len(level) % pair
+    with memoryview(level) as view:
+        parents = [new(view[i : i + pair]).digest() for i in range(0, paired, pair)]
+    if paired < len(level):
+        last = bytes(level[paired:])
+        parents.append(new(last + last).digest())
+    return b"".join(parents)
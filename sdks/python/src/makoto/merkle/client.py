@@ -0,0 +1,105 @@
+"""Fetch Merkle proofs from a window's proof endpoint.
+
+``ProofClient`` talks to the routes served by ``ProofServer`` (see
+``makoto.merkle.server``) under a window's ``verification.proofEndpoint``
+and returns the proof objects, ready for ``AttestationVerifier``.
+"""
+
+from __future__ import annotations
+
+import json
+import urllib.error
+import urllib.request
+from typing import TYPE_CHECKING, Any
+from urllib.parse import urlencode
+
+from ..models.stream_window import MerkleTree as MerkleTreeModel
+from .proofs import ConsistencyProof, MerkleMultiproof, MerkleProof
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from ..attestation.statement import InTotoStatement
+
+
+class ProofClient:
+    """Client for one window's proof endpoint (standard library only).
+
+    Example:
+        ```python
+        client = ProofClient.for_statement(statement)
+        proof = client.proof(42)
+        result = AttestationVerifier().verify_inclusion(statement, proof)
+        ```
+    """
+
+    def __init__(self, endpoint: str, *, timeout: float = 10.0) -> None:
+        """Create a client.
+
+        Args:
+            endpoint: The window's proof endpoint URL
+            timeout: Seconds to wait for each response
+        """
+        self.endpoint = endpoint.rstrip("/")
+        self.timeout = timeout
+
+    @classmethod
+    def for_statement(cls, statement: InTotoStatement, *, timeout: float = 10.0) -> ProofClient:
+        """Create a client for the ``proofEndpoint`` of a stream window attestation.
+
+        Raises:
+            ValueError: If the attestation has no proof endpoint
+        """
+        verification = (statement.predicate or {}).get("verification") or {}
+        endpoint = verification.get("proofEndpoint")
+        if not endpoint:
+            raise ValueError("Attestation has no verification.proofEndpoint")
+        return cls(endpoint, timeout=timeout)
+
+    def _request(self, path: str, body: Any = None) -> Any:
+        """Send a request and decode the JSON response.
+
+        Raises:
+            ValueError: If the endpoint answers with an error
+        """
+        data = json.dumps(body).encode() if body is not None else None
+        request = urllib.request.Request(
+            self.endpoint + path,
+            data=data,
+            headers={"Content-Type": "application/json"} if data is not None else {},
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read())["error"]
+            except (ValueError, KeyError, TypeError):
+                message = e.reason
+            raise ValueError(f"Proof endpoint returned {e.code}: {message}") from None
+
+    def tree(self) -> MerkleTreeModel:
+        """Return the served tree's ``merkleTree`` descriptor."""
+        return MerkleTreeModel.model_validate(self._request(""))
+
+    def proof(self, leaf_index: int) -> MerkleProof:
+        """Fetch the inclusion proof of one leaf."""
+        return MerkleProof.from_dict(self._request("/proof?" + urlencode({"leaf": leaf_index})))
+
+    def proofs(self, leaf_indices: Iterable[int]) -> list[MerkleProof]:
+        """Fetch inclusion proofs of several leaves in one request."""
+        response = self._request("/proofs", {"leaves": list(leaf_indices)})
+        return [MerkleProof.from_dict(proof) for proof in response["proofs"]]
+
+    def multiproof(self, leaf_indices: Iterable[int]) -> MerkleMultiproof:
+        """Fetch a multiproof of several leaves."""
+        leaves = ",".join(str(index) for index in leaf_indices)
+        return MerkleMultiproof.from_dict(
+            self._request("/multiproof?" + urlencode({"leaves": leaves}))
+        )
+
+    def consistency_proof(self, old_size: int) -> ConsistencyProof:
+        """Fetch a proof that the tree extends its first ``old_size`` leaves."""
+        return ConsistencyProof.from_dict(
+            self._request("/consistency?" + urlencode({"old_size": old_size}))
+        )
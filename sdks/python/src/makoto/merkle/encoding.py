@@ -0,0 +1,287 @@
+"""Canonical leaf encodings: how a record becomes the bytes of its leaf.
+
+Two collectors hashing the same record must produce the same leaf, so the
+encoding is recorded in the predicate (``integrity.merkleTree.leafEncoding``):
+
+- ``raw``: the record bytes as received.
+- ``json-jcs``: the JSON Canonicalization Scheme (RFC 8785): object keys
+  sorted by UTF-16 code units, no whitespace, minimal string escaping and
+  ECMAScript number formatting, UTF-8 encoded. Duplicate and non-string
+  object keys are rejected.
+- ``length-prefixed``: a sequence of fields, each as its length (4 bytes,
+  big-endian) followed by its bytes (strings are UTF-8 encoded).
+
+Encoders work on batches. ``JcsEncoder.encode_batch`` decodes and
+serializes a batch with the C-accelerated ``json`` decoder and encoder
+through ``map`` (numbers are formatted as they are parsed, into markers),
+then fixes all numbers with a single regex pass over the joined output, so
+little Python code runs per record. Values the fast path cannot prove canonical (non-BMP
+characters, which sort differently in UTF-16, or NUL escapes, which the
+number markers use) fall back to a straightforward recursive encoder.
+"""
+
+from __future__ import annotations
+
+import itertools
+import json
+import math
+import re
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator, Sequence
+
+    from typing_extensions import Buffer
+
+    from ..models.stream_window import LeafEncoding
+
+# Integers beyond 2**53 are not exact IEEE doubles and are formatted as
+# doubles, like floats
+_MAX_SAFE_INTEGER = 2**53
+# Records encoded per batch when encoding an unbounded iterable
+_BATCH_RECORDS = 4096
+_NUMBER_MARKER = re.compile(r'"\\u0000([^"\\]*)\\u0000"')
+_FAST_PATH_UNSAFE = re.compile(r"[^\x00-\uffff]|[\ud800-\udfff]|\\u[dD][89abAB]|\\u0000")
+_C_ENCODER = json.JSONEncoder(
+    ensure_ascii=False, allow_nan=False, sort_keys=True, separators=(",", ":")
+)
+
+
+def format_number(value: float) -> str:
+    """Format a number as ECMAScript ``Number.prototype.toString`` does.
+
+    Args:
+        value: A finite number
+
+    Returns:
+        The RFC 8785 serialization
+
+    Raises:
+        ValueError: If the number is not finite
+    """
+    value = float(value)
+    if not math.isfinite(value):
+        raise ValueError("JSON numbers must be finite")
+    if value == 0:
+        return "0"
+    sign = "-" if value < 0 else ""
+    # repr gives the shortest round-tripping digits, as ECMAScript requires
+    mantissa, _, exponent_text = repr(abs(value)).partition("e")
+    whole, _, fraction = mantissa.partition(".")
+    digits = (whole + fraction).lstrip("0")
+    exponent = int(exponent_text or 0) - len(fraction)
+    stripped = digits.rstrip("0")
+    exponent += len(digits) - len(stripped)
+    digits = stripped
+    k = len(digits)
+    n = exponent + k  # value = 0.<digits> * 10**n
+    if k <= n <= 21:
+        text = digits + "0" * (n - k)
+    elif 0 < n <= 21:
+        text = digits[:n] + "." + digits[n:]
+    elif -6 < n <= 0:
+        text = "0." + "0" * -n + digits
+    else:
+        e = n - 1
+        text = (digits[0] + "." + digits[1:] if k > 1 else digits) + ("e+" if e > 0 else "e-")
+        text += str(abs(e))
+    return sign + text
+
+
+def _canonical(value: Any) -> str:
+    """Serialize a JSON value canonically (recursive reference encoder)."""
+    if value is None or value is True or value is False:
+        return _C_ENCODER.encode(value)
+    if isinstance(value, str):
+        _check_unicode(value)
+        return _C_ENCODER.encode(value)
+    if isinstance(value, int):
+        if abs(value) > _MAX_SAFE_INTEGER:
+            return format_number(value)
+        return str(value)
+    if isinstance(value, float):
+        return format_number(value)
+    if isinstance(value, dict):
+        items = []
+        for key in value:
+            if not isinstance(key, str):
+                raise ValueError(f"JSON object keys must be strings, got {type(key).__name__}")
+            _check_unicode(key)
+        for key in sorted(value, key=lambda k: k.encode("utf-16-be")):
+            items.append(_C_ENCODER.encode(key) + ":" + _canonical(value[key]))
+        return "{" + ",".join(items) + "}"
+    if isinstance(value, (list, tuple)):
+        return "[" + ",".join(_canonical(item) for item in value) + "]"
+    raise ValueError(f"Value of type {type(value).__name__} is not JSON")
+
+
+def _check_unicode(text: str) -> None:
+    """Reject lone surrogates, which cannot be encoded as UTF-8."""
+    try:
+        text.encode("utf-8")
+    except UnicodeEncodeError:
+        raise ValueError("JSON strings must be valid Unicode") from None
+
+
+def _parse_float(text: str) -> str:
+    return "\0" + format_number(float(text)) + "\0"
+
+
+def _reject_constant(text: str) -> None:
+    raise ValueError(f"JSON numbers must be finite, got {text}")
+
+
+def _parse_int(text: str) -> int | str:
+    value = int(text)
+    if abs(value) > _MAX_SAFE_INTEGER:
+        return "\0" + format_number(value) + "\0"
+    return value
+
+
+def _unique_keys(pairs: list[tuple[str, Any]]) -> dict[str, Any]:
+    """Build a JSON object, rejecting duplicate keys as RFC 8785 requires."""
+    value = dict(pairs)
+    if len(value) != len(pairs):
+        raise ValueError("JSON objects must not have duplicate keys")
+    return value
+
+
+_FAST_DECODER = json.JSONDecoder(
+    parse_float=_parse_float,
+    parse_int=_parse_int,
+    parse_constant=_reject_constant,
+    object_pairs_hook=_unique_keys,
+)
+
+
+class LeafEncoder:
+    """Base class for leaf encoders."""
+
+    name: LeafEncoding
+
+    def encode(self, record: Any) -> bytes:
+        """Encode one record."""
+        return self.encode_batch([record])[0]
+
+    def encode_batch(self, records: Sequence[Any]) -> list[bytes]:
+        """Encode a batch of records.
+
+        Args:
+            records: Records in the encoder's input format
+
+        Returns:
+            The leaf bytes of each record
+        """
+        raise NotImplementedError
+
+
+class RawEncoder(LeafEncoder):
+    """Records are already bytes (any buffer-protocol object)."""
+
+    name: LeafEncoding = "raw"
+
+    def encode_batch(self, records: Sequence[Buffer]) -> list[bytes]:
+        return list(map(bytes, records))
+
+
+class JcsEncoder(LeafEncoder):
+    """RFC 8785 canonical JSON.
+
+    Records are JSON texts (``str`` or UTF-8 ``bytes``, as consumed from a
+    stream) or already-decoded values (dicts, lists, ...).
+    """
+
+    name: LeafEncoding = "json-jcs"
+
+    def encode_batch(self, records: Sequence[Any]) -> list[bytes]:
+        """Encode a batch of JSON records.
+
+        Raises:
+            ValueError: If a record is not valid JSON (or has duplicate or
+                non-string object keys, non-finite numbers or invalid Unicode)
+        """
+        if not records:
+            return []
+        texts = [
+            record.decode("utf-8") if isinstance(record, (bytes, bytearray)) else record
+            for record in records
+        ]
+        if not all(isinstance(text, str) for text in texts):
+            # Decoded values are serialized directly, so their keys are checked
+            encoded = iter(self.encode_batch([text for text in texts if isinstance(text, str)]))
+            return [
+                next(encoded) if isinstance(text, str) else _canonical(text).encode("utf-8")
+                for text in texts
+            ]
+        if any(map(_FAST_PATH_UNSAFE.search, texts)):
+            return [self._encode_slow(text) for text in texts]
+        try:
+            values = list(map(_FAST_DECODER.decode, texts))
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON record: {e}") from None
+        # Canonical JSON never contains a raw newline, so it separates records
+        output = "\n".join(map(_C_ENCODER.encode, values))
+        output = _NUMBER_MARKER.sub(r"\1", output)
+        return output.encode("utf-8").split(b"\n")
+
+    @staticmethod
+    def _encode_slow(text: str) -> bytes:
+        try:
+            value = json.loads(
+                text, parse_constant=_reject_constant, object_pairs_hook=_unique_keys
+            )
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON record: {e}") from None
+        return _canonical(value).encode("utf-8")
+
+
+class LengthPrefixedEncoder(LeafEncoder):
+    """Records are sequences of fields (``bytes`` or ``str``)."""
+
+    name: LeafEncoding = "length-prefixed"
+
+    def encode_batch(self, records: Sequence[Iterable[bytes | str]]) -> list[bytes]:
+        out = []
+        for record in records:
+            fields = [f.encode("utf-8") if isinstance(f, str) else bytes(f) for f in record]
+            out.append(b"".join(len(f).to_bytes(4, "big") + f for f in fields))
+        return out
+
+
+_ENCODERS: dict[str, LeafEncoder] = {
+    encoder.name: encoder for encoder in (RawEncoder(), JcsEncoder(), LengthPrefixedEncoder())
+}
+
+
+def leaf_encoder(name: LeafEncoding) -> LeafEncoder:
+    """Return the encoder for a ``leafEncoding`` name.
+
+    Raises:
+        ValueError: If the encoding is unknown
+    """
+    try:
+        return _ENCODERS[name]
+    except KeyError:
+        raise ValueError(f"Unsupported leaf encoding: {name}") from None
+
+
+def encode_records(records: Iterable[Any], encoding: LeafEncoding) -> Iterator[Buffer]:
+    """Encode records into leaf bytes, in batches.
+
+    Args:
+        records: Records in the encoding's input format
+        encoding: Leaf encoding
+
+    Yields:
+        The leaf bytes of each record, in order (``raw`` records unchanged)
+
+    Raises:
+        ValueError: If the encoding is unknown or a record cannot be encoded
+    """
+    encoder = leaf_encoder(encoding)
+    if encoding == "raw":
+        yield from records
+        return
+    iterator = iter(records)
+    while batch := list(itertools.islice(iterator, _BATCH_RECORDS)):
+        yield from encoder.encode_batch(batch)
@@ -0,0 +1,360 @@
+"""Keyed Merkle trees: leaves sorted by record key.
+
+In a keyed tree (``leafOrder: "key"``) the leaves are ordered by a
+record key, such as a sensor ID and timestamp, instead of by arrival.
+Each leaf commits to its key and to the record hash:
+
+    leaf = H_leaf(len(key) as 4-byte big-endian || key || H_leaf(record))
+
+The nodes above the leaves are built as in ``MerkleTree``. A record can
+then be proven by key without knowing its position:
+
+- Inclusion: the key, the record hash and an ordinary inclusion proof.
+- Non-inclusion: inclusion proofs for the neighbouring leaves, adjacent
+  in the tree, whose keys bracket the missing key (or the first or last
+  leaf when the key sorts before or after every leaf).
+
+Both proofs are checked with the leaf count, so neighbour positions are
+bound to their indices. Lookups are a binary search over the sorted keys.
+"""
+
+from __future__ import annotations
+
+import bisect
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+from .algorithms import hash_function
+from .proofs import MerkleProof
+from .tree import MerkleTree
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+
+    from typing_extensions import Buffer
+
+    from ..models.stream_window import HashAlgorithm
+    from ..models.stream_window import MerkleTree as MerkleTreeModel
+
+
+def keyed_leaf_hash(key: bytes, record_hash: bytes, algorithm: HashAlgorithm = "sha256") -> bytes:
+    """Hash a key and a record hash into a keyed leaf.
+
+    Args:
+        key: Record key
+        record_hash: Hash of the record (with the leaf algorithm)
+        algorithm: Leaf hash algorithm
+
+    Returns:
+        The leaf hash
+    """
+    hasher = hash_function(algorithm)()
+    hasher.update(len(key).to_bytes(4, "big"))
+    hasher.update(key)
+    hasher.update(record_hash)
+    return bytes(hasher.digest())
+
+
+@dataclass(frozen=True)
+class KeyedProof:
+    """Proof that a record with a key is in a keyed tree.
+
+    Attributes:
+        key: Record key
+        record_hash: Hash of the record
+        proof: Inclusion proof of the keyed leaf
+    """
+
+    key: bytes
+    record_hash: bytes
+    proof: MerkleProof
+
+    def verify(
+        self,
+        root: bytes | str,
+        leaf_count: int,
+        algorithm: HashAlgorithm = "sha256",
+        *,
+        leaf_algorithm: HashAlgorithm | None = None,
+        record: Buffer | None = None,
+    ) -> bool:
+        """Check the proof against a keyed tree's root.
+
+        Args:
+            root: Expected root (raw or hex)
+            leaf_count: Number of leaves in the tree
+            algorithm: Hash algorithm of the internal nodes
+            leaf_algorithm: Hash algorithm of the leaves (default: algorithm)
+            record: Optional record bytes, checked against ``record_hash``
+
+        Returns:
+            Whether the proof is valid
+        """
+        leaf_algorithm = leaf_algorithm or algorithm
+        if record is not None and hash_function(leaf_algorithm)(record).digest() != (
+            self.record_hash
+        ):
+            return False
+        if keyed_leaf_hash(self.key, self.record_hash, leaf_algorithm) != self.proof.leaf_hash:
+            return False
+        return self.proof.verify(root, algorithm, leaf_count=leaf_count)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Serialize to a JSON-compatible dict."""
+        return {
+            "key": self.key.hex(),
+            "record_hash": self.record_hash.hex(),
+            "proof": self.proof.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> KeyedProof:
+        """Deserialize from a dict produced by ``to_dict``."""
+        return cls(
+            key=bytes.fromhex(data["key"]),
+            record_hash=bytes.fromhex(data["record_hash"]),
+            proof=MerkleProof.from_dict(data["proof"]),
+        )
+
+
+@dataclass(frozen=True)
+class NonInclusionProof:
+    """Proof that no record with a key is in a keyed tree.
+
+    Attributes:
+        key: The absent key
+        left: Proof of the greatest smaller key (None if the key sorts first)
+        right: Proof of the smallest greater key (None if the key sorts last)
+    """
+
+    key: bytes
+    left: KeyedProof | None
+    right: KeyedProof | None
+
+    def verify(
+        self,
+        root: bytes | str,
+        leaf_count: int,
+        algorithm: HashAlgorithm = "sha256",
+        *,
+        leaf_algorithm: HashAlgorithm | None = None,
+    ) -> bool:
+        """Check the proof against a keyed tree's root.
+
+        Args:
+            root: Expected root (raw or hex)
+            leaf_count: Number of leaves in the tree
+            algorithm: Hash algorithm of the internal nodes
+            leaf_algorithm: Hash algorithm of the leaves (default: algorithm)
+
+        Returns:
+            Whether the neighbours are proven, adjacent and bracket the key
+        """
+        left, right = self.left, self.right
+        if left is None and right is None:
+            return False
+        if left is not None:
+            expected_right = left.proof.leaf_index + 1
+            if not left.key < self.key:
+                return False
+        else:
+            expected_right = 0
+        if right is not None:
+            if right.proof.leaf_index != expected_right or not self.key < right.key:
+                return False
+        elif expected_right != leaf_count:
+            return False
+        return all(
+            neighbour.verify(root, leaf_count, algorithm, leaf_algorithm=leaf_algorithm)
+            for neighbour in (left, right)
+            if neighbour is not None
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        """Serialize to a JSON-compatible dict."""
+        return {
+            "key": self.key.hex(),
+            "left": self.left.to_dict() if self.left else None,
+            "right": self.right.to_dict() if self.right else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> NonInclusionProof:
+        """Deserialize from a dict produced by ``to_dict``."""
+        return cls(
+            key=bytes.fromhex(data["key"]),
+            left=KeyedProof.from_dict(data["left"]) if data.get("left") else None,
+            right=KeyedProof.from_dict(data["right"]) if data.get("right") else None,
+        )
+
+
+class KeyedMerkleTree:
+    """A Merkle tree over records sorted by key.
+
+    Example:
+        ```python
+        # Kafka messages keyed by "<sensor_id>|<timestamp>"
+        tree = KeyedMerkleTree.from_records(
+            messages, key=lambda m: m.key(), encode=lambda m: m.value()
+        )
+        builder.stream_window(...).with_merkle_tree(tree)
+        proof = tree.proof(b"sensor-7|2024-01-15T10:30:00Z")
+        ```
+    """
+
+    def __init__(
+        self,
+        keys: list[bytes],
+        record_hashes: list[bytes],
+        algorithm: HashAlgorithm = "sha256",
+        *,
+        leaf_algorithm: HashAlgorithm | None = None,
+    ) -> None:
+        """Build the tree over keys sorted ascending; use ``from_items``.
+
+        Args:
+            keys: Unique keys in ascending order
+            record_hashes: Record hash for each key
+            algorithm: Hash algorithm of the internal nodes
+            leaf_algorithm: Hash algorithm of the leaves (default: algorithm)
+        """
+        self.keys = keys
+        self.record_hashes = record_hashes
+        leaf_algorithm = leaf_algorithm or algorithm
+        leaves = [
+            keyed_leaf_hash(key, record_hash, leaf_algorithm)
+            for key, record_hash in zip(keys, record_hashes, strict=True)
+        ]
+        self.tree = MerkleTree.from_leaf_hashes(leaves, algorithm, leaf_algorithm=leaf_algorithm)
+        self.tree.leaf_order = "key"
+
+    @classmethod
+    def from_items(
+        cls,
+        items: Iterable[tuple[bytes, Buffer]],
+        algorithm: HashAlgorithm = "sha256",
+        *,
+        leaf_algorithm: HashAlgorithm | None = None,
+    ) -> KeyedMerkleTree:
+        """Build a tree from ``(key, record)`` pairs in any order.
+
+        Args:
+            items: Keys and record bytes
+            algorithm: Hash algorithm of the internal nodes
+            leaf_algorithm: Hash algorithm of the leaves (default: algorithm)
+
+        Returns:
+            The tree
+
+        Raises:
+            ValueError: If a key appears more than once
+        """
+        new = hash_function(leaf_algorithm or algorithm)
+        entries = sorted((bytes(key), new(record).digest()) for key, record in items)
+        keys = [key for key, _ in entries]
+        for previous, key in zip(keys, keys[1:], strict=False):
+            if previous == key:
+                raise ValueError(f"Duplicate record key: {key!r}")
+        return cls(
+            keys,
+            [record_hash for _, record_hash in entries],
+            algorithm,
+            leaf_algorithm=leaf_algorithm,
+        )
+
+    @classmethod
+    def from_records(
+        cls,
+        records: Iterable[Any],
+        key: Callable[[Any], bytes],
+        algorithm: HashAlgorithm = "sha256",
+        *,
+        leaf_algorithm: HashAlgorithm | None = None,
+        encode: Callable[[Any], Buffer] = bytes,
+    ) -> KeyedMerkleTree:
+        """Build a tree from records and a key function.
+
+        Args:
+            records: Records
+            key: Returns the key bytes of a record
+            algorithm: Hash algorithm of the internal nodes
+            leaf_algorithm: Hash algorithm of the leaves (default: algorithm)
+            encode: Returns the bytes hashed for a record (default: ``bytes``)
+
+        Returns:
+            The tree
+
+        Raises:
+            ValueError: If a key appears more than once
+        """
+        items = ((key(record), encode(record)) for record in records)
+        return cls.from_items(items, algorithm, leaf_algorithm=leaf_algorithm)
+
+    @property
+    def algorithm(self) -> HashAlgorithm:
+        """Hash algorithm of the internal nodes."""
+        return self.tree.algorithm
+
+    @property
+    def leaf_algorithm(self) -> HashAlgorithm:
+        """Hash algorithm of the leaves."""
+        return self.tree.leaf_algorithm
+
+    @property
+    def leaf_count(self) -> int:
+        """Number of records."""
+        return len(self.keys)
+
+    def root(self) -> bytes | None:
+        """Return the root hash (None for an empty tree)."""
+        return self.tree.root()
+
+    def root_hex(self) -> str | None:
+        """Return the root hash as lowercase hex (None for an empty tree)."""
+        return self.tree.root_hex()
+
+    def index(self, key: bytes) -> int | None:
+        """Return the leaf index of a key (None if absent), in O(log n)."""
+        index = bisect.bisect_left(self.keys, key)
+        if index < len(self.keys) and self.keys[index] == key:
+            return index
+        return None
+
+    def _keyed_proof(self, index: int) -> KeyedProof:
+        return KeyedProof(self.keys[index], self.record_hashes[index], self.tree.proof(index))
+
+    def proof(self, key: bytes) -> KeyedProof:
+        """Prove that a key is in the tree.
+
+        Raises:
+            KeyError: If the key is absent
+        """
+        index = self.index(key)
+        if index is None:
+            raise KeyError(key)
+        return self._keyed_proof(index)
+
+    def non_inclusion_proof(self, key: bytes) -> NonInclusionProof:
+        """Prove that a key is not in the tree.
+
+        Raises:
+            ValueError: If the key is present, or the tree is empty
+        """
+        if not self.keys:
+            raise ValueError("An empty Merkle tree has no root to prove against")
+        index = bisect.bisect_left(self.keys, key)
+        if index < len(self.keys) and self.keys[index] == key:
+            raise ValueError(f"Key {key!r} is in the tree")
+        return NonInclusionProof(
+            key=key,
+            left=self._keyed_proof(index - 1) if index > 0 else None,
+            right=self._keyed_proof(index) if index < len(self.keys) else None,
+        )
+
+    def to_model(self) -> MerkleTreeModel:
+        """Describe the tree for a stream window predicate (``leafOrder: key``).
+
+        Raises:
+            ValueError: If the tree is empty
+        """
+        return self.tree.to_model()
@@ -0,0 +1,118 @@
+"""Parallel Merkle tree construction.
+
+The leaves are split into aligned subtrees of ``2**k`` leaves. Every
+subtree is built independently in a worker, up to level ``k``; because
+the subtrees are aligned, each of their levels is a contiguous slice of
+the corresponding level of the whole tree, so the levels are joined and
+only the top ``log2(n) - k`` levels are built sequentially.
+
+A partial last subtree is carried up to level ``k`` by pairing its root
+with itself, exactly as the sequential construction does for the last
+node of an odd level, so the result is identical.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import repeat
+from typing import TYPE_CHECKING
+
+from .algorithms import build_level, hash_function
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    from ..models.stream_window import HashAlgorithm
+
+DEFAULT_SUBTREE_LEAVES = 65536
+"""Default number of leaves per subtree built by one worker task."""
+
+
+def build_subtree(
+    records: Sequence[bytes],
+    algorithm: HashAlgorithm,
+    height: int,
+    leaf_algorithm: HashAlgorithm | None = None,
+) -> list[bytes]:
+    """Build the levels of one aligned subtree.
+
+    Args:
+        records: Records of the subtree (at most ``2**height``)
+        algorithm: Hash algorithm of the internal nodes
+        height: Level of the subtree root
+        leaf_algorithm: Hash algorithm of the leaves (default: algorithm)
+
+    Returns:
+        ``height + 1`` level buffers; the last holds the subtree root
+    """
+    leaf_new = hash_function(leaf_algorithm or algorithm)
+    new = hash_function(algorithm)
+    node_size = leaf_new().digest_size
+    levels = [b"".join([leaf_new(record).digest() for record in records])]
+    for _ in range(height):
+        # A single node is paired with itself, carrying a partial subtree up
+        levels.append(build_level(levels[-1], node_size, new))
+        node_size = new().digest_size
+    return levels
+
+
+def build_levels_parallel(
+    records: Sequence[bytes],
+    algorithm: HashAlgorithm = "sha256",
+    *,
+    leaf_algorithm: HashAlgorithm | None = None,
+    workers: int | None = None,
+    processes: bool = True,
+    subtree_leaves: int = DEFAULT_SUBTREE_LEAVES,
+) -> list[bytes]:
+    """Build every level of a tree with a pool of workers.
+
+    Args:
+        records: Record bytes (picklable when ``processes`` is True)
+        algorithm: Hash algorithm of the internal nodes
+        leaf_algorithm: Hash algorithm of the leaves (default: algorithm)
+        workers: Maximum number of workers (executor default if None)
+        processes: Use a process pool; with False, a thread pool, which
+            only scales for records large enough for hashlib to release
+            the GIL (over 2 KiB)
+        subtree_leaves: Leaves per worker task, a power of two
+
+    Returns:
+        Level buffers from the leaves up to the root (empty for no records)
+
+    Raises:
+        ValueError: If subtree_leaves is not a power of two
+    """
+    if subtree_leaves < 1 or subtree_leaves & (subtree_leaves - 1):
+        raise ValueError("subtree_leaves must be a power of two")
+    new = hash_function(algorithm)
+    height = subtree_leaves.bit_length() - 1
+    if len(records) <= subtree_leaves:
+        levels = build_subtree(records, algorithm, 0, leaf_algorithm) if records else []
+        height = 0
+    else:
+        subtrees = [
+            records[start : start + subtree_leaves]
+            for start in range(0, len(records), subtree_leaves)
+        ]
+        pool = ProcessPoolExecutor if processes else ThreadPoolExecutor
+        with pool(max_workers=workers) as executor:
+            results = list(
+                executor.map(
+                    build_subtree,
+                    subtrees,
+                    repeat(algorithm),
+                    repeat(height),
+                    repeat(leaf_algorithm),
+                )
+            )
+        levels = [b"".join(result[level] for result in results) for level in range(height + 1)]
+    digest_size = new().digest_size
+    # Level ``height`` is the leaf level when the records were not split
+    node_size = (
+        hash_function(leaf_algorithm or algorithm)().digest_size if not height else digest_size
+    )
+    while levels and len(levels[-1]) > node_size:
+        levels.append(build_level(levels[-1], node_size, new))
+        node_size = digest_size
+    return levels
@@ -0,0 +1,398 @@
+"""Merkle inclusion proofs and compact multiproofs.
+
+A single-leaf proof has the same shape as ``MerkleProof`` in the Rust SDK:
+the leaf hash and its sibling hashes from the leaf up to the root, each
+with the side (``"left"``/``"right"``) it is hashed on. Where a level has
+an odd number of nodes and the path goes through the last one, the sibling
+is that node itself, on the right.
+
+A multiproof proves many leaves at once. Walking up the tree level by
+level, it only contains the sibling hashes that cannot be computed from
+the proven leaves, in ascending node order per level, so leaves close to
+each other share most of their path. Verification recomputes the root
+consuming the hashes in the same order.
+
+A consistency proof shows that a later tree extends an earlier one (the
+earlier leaves are an unchanged prefix). It lists the earlier tree's
+peaks, the roots of the perfect subtrees covering its leaves, which are
+nodes of both trees: they give the earlier root (as in
+``MerkleAccumulator``) and, with O(log n) more siblings, the later root.
+This follows RFC 6962 but for this SDK's tree shape, where an odd last
+node is paired with itself rather than promoted.
+
+Verifiers should pass ``leaf_count`` (``integrity.merkleTree.leafCount``):
+positions are then derived from the leaf index instead of being trusted,
+so a proof cannot claim a leaf sits at a different index.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Literal
+
+from .accumulator import MerkleAccumulator
+from .algorithms import hash_function
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator, Mapping
+
+    from ..models.stream_window import HashAlgorithm
+
+SiblingPosition = Literal["left", "right"]
+"""Side a sibling hash is on when combined with the running hash."""
+
+
+def level_sizes(leaf_count: int) -> list[int]:
+    """Return the number of nodes on every level, from the leaves to the root.
+
+    Args:
+        leaf_count: Number of leaves (at least one)
+
+    Returns:
+        Node counts per level; the last is always 1
+    """
+    sizes = [leaf_count]
+    while sizes[-1] > 1:
+        sizes.append((sizes[-1] + 1) // 2)
+    return sizes
+
+
+@dataclass(frozen=True)
+class MerkleProof:
+    """Inclusion proof for a single leaf.
+
+    Attributes:
+        leaf_index: Index of the proven leaf
+        leaf_hash: Hash of the leaf
+        siblings: Sibling hashes from the leaf up to the root
+        positions: Side of each sibling
+    """
+
+    leaf_index: int
+    leaf_hash: bytes
+    siblings: tuple[bytes, ...]
+    positions: tuple[SiblingPosition, ...]
+
+    def compute_root(self, algorithm: HashAlgorithm = "sha256") -> bytes:
+        """Compute the root implied by the proof."""
+        new = hash_function(algorithm)
+        current = self.leaf_hash
+        for sibling, position in zip(self.siblings, self.positions, strict=True):
+            current = new(sibling + current if position == "left" else current + sibling).digest()
+        return bytes(current)
+
+    def verify(
+        self,
+        root: bytes | str,
+        algorithm: HashAlgorithm = "sha256",
+        *,
+        leaf_count: int | None = None,
+    ) -> bool:
+        """Check the proof against a root.
+
+        Args:
+            root: Expected root (raw or hex)
+            algorithm: Hash algorithm of the tree
+            leaf_count: Number of leaves in the tree; when given, the path
+                length, positions and self-paired nodes must match the leaf
+                index instead of being taken from the proof
+
+        Returns:
+            Whether the proof is valid
+        """
+        if isinstance(root, str):
+            root = bytes.fromhex(root)
+        if len(self.siblings) != len(self.positions):
+            return False
+        if leaf_count is None:
+            return self.compute_root(algorithm) == root
+
+        sizes = level_sizes(leaf_count) if 0 <= self.leaf_index < leaf_count else []
+        if len(sizes) - 1 != len(self.siblings):
+            return False
+        new = hash_function(algorithm)
+        current = self.leaf_hash
+        index = self.leaf_index
+        for size, sibling, position in zip(sizes, self.siblings, self.positions, strict=False):
+            if index % 2:
+                if position != "left":
+                    return False
+                current = new(sibling + current).digest()
+            else:
+                if position != "right" or (index + 1 == size and sibling != current):
+                    return False
+                current = new(current + sibling).digest()
+            index //= 2
+        return bytes(current) == root
+
+    def to_dict(self) -> dict[str, Any]:
+        """Serialize in the Rust SDK's ``MerkleProofHex`` format."""
+        return {
+            "leaf_index": self.leaf_index,
+            "leaf_hash": self.leaf_hash.hex(),
+            "siblings": [sibling.hex() for sibling in self.siblings],
+            "positions": list(self.positions),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> MerkleProof:
+        """Deserialize from the ``MerkleProofHex`` format.
+
+        Raises:
+            ValueError: If a field is malformed
+        """
+        positions = tuple(data["positions"])
+        if any(position not in ("left", "right") for position in positions):
+            raise ValueError("Proof positions must be 'left' or 'right'")
+        return cls(
+            leaf_index=int(data["leaf_index"]),
+            leaf_hash=bytes.fromhex(data["leaf_hash"]),
+            siblings=tuple(bytes.fromhex(sibling) for sibling in data["siblings"]),
+            positions=positions,
+        )
+
+
+@dataclass(frozen=True)
+class MerkleMultiproof:
+    """Compact inclusion proof for several leaves.
+
+    Attributes:
+        leaf_count: Number of leaves in the tree
+        leaf_indices: Indices of the proven leaves, ascending and unique
+        leaf_hashes: Hashes of the proven leaves, in the same order
+        hashes: Sibling hashes not derivable from the proven leaves
+    """
+
+    leaf_count: int
+    leaf_indices: tuple[int, ...]
+    leaf_hashes: tuple[bytes, ...]
+    hashes: tuple[bytes, ...]
+
+    def compute_root(self, algorithm: HashAlgorithm = "sha256") -> bytes:
+        """Compute the root implied by the proof.
+
+        Raises:
+            ValueError: If the proof is malformed (indices out of order or
+                range, or too few or too many hashes)
+        """
+        if len(self.leaf_indices) != len(self.leaf_hashes) or not self.leaf_indices:
+            raise ValueError("Multiproof needs one leaf hash per leaf index")
+        if any(a >= b for a, b in zip(self.leaf_indices, self.leaf_indices[1:], strict=False)):
+            raise ValueError("Multiproof leaf indices must be ascending and unique")
+        if self.leaf_indices[0] < 0 or self.leaf_indices[-1] >= self.leaf_count:
+            raise ValueError("Multiproof leaf index out of range")
+
+        hashes = iter(self.hashes)
+        nodes = {0: dict(zip(self.leaf_indices, self.leaf_hashes, strict=True))}
+        root = fold_nodes(hash_function(algorithm), self.leaf_count, nodes, hashes)
+        if next(hashes, None) is not None:
+            raise ValueError("Multiproof has unused hashes")
+        return root
+
+    def verify(self, root: bytes | str, algorithm: HashAlgorithm = "sha256") -> bool:
+        """Check the proof against a root.
+
+        Args:
+            root: Expected root (raw or hex)
+            algorithm: Hash algorithm of the tree
+
+        Returns:
+            Whether the proof is well-formed and valid
+        """
+        if isinstance(root, str):
+            root = bytes.fromhex(root)
+        try:
+            return self.compute_root(algorithm) == root
+        except ValueError:
+            return False
+
+    def to_dict(self) -> dict[str, Any]:
+        """Serialize to a JSON-compatible dict."""
+        return {
+            "leaf_count": self.leaf_count,
+            "leaf_indices": list(self.leaf_indices),
+            "leaf_hashes": [leaf.hex() for leaf in self.leaf_hashes],
+            "hashes": [node.hex() for node in self.hashes],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> MerkleMultiproof:
+        """Deserialize from a dict produced by ``to_dict``."""
+        return cls(
+            leaf_count=int(data["leaf_count"]),
+            leaf_indices=tuple(int(index) for index in data["leaf_indices"]),
+            leaf_hashes=tuple(bytes.fromhex(leaf) for leaf in data["leaf_hashes"]),
+            hashes=tuple(bytes.fromhex(node) for node in data["hashes"]),
+        )
+
+
+@dataclass(frozen=True)
+class ConsistencyProof:
+    """Proof that a tree of ``new_size`` leaves extends one of ``old_size``.
+
+    Attributes:
+        old_size: Number of leaves in the earlier tree
+        new_size: Number of leaves in the later tree
+        hashes: The earlier tree's peaks (largest first), then the sibling
+            hashes needed to extend them to the later root
+    """
+
+    old_size: int
+    new_size: int
+    hashes: tuple[bytes, ...]
+
+    def compute_roots(self, algorithm: HashAlgorithm = "sha256") -> tuple[bytes, bytes]:
+        """Compute the earlier and later roots implied by the proof.
+
+        Raises:
+            ValueError: If the proof is malformed (sizes out of order, or
+                too few or too many hashes)
+        """
+        if not 0 < self.old_size <= self.new_size:
+            raise ValueError("Consistency proof sizes must satisfy 0 < old_size <= new_size")
+        heights = old_peak_heights(self.old_size)
+        if len(self.hashes) < len(heights):
+            raise ValueError("Consistency proof has too few hashes")
+        peaks = dict(zip(heights, self.hashes, strict=False))
+        old_root = MerkleAccumulator(algorithm, count=self.old_size, peaks=peaks).root() or b""
+        if self.old_size == self.new_size:
+            if len(self.hashes) != len(heights):
+                raise ValueError("Consistency proof has unused hashes")
+            return old_root, old_root
+
+        hashes = iter(self.hashes[len(heights) :])
+        nodes = {height: {(self.old_size >> height) - 1: peak} for height, peak in peaks.items()}
+        new_root = fold_nodes(hash_function(algorithm), self.new_size, nodes, hashes)
+        if next(hashes, None) is not None:
+            raise ValueError("Consistency proof has unused hashes")
+        return old_root, new_root
+
+    def verify(
+        self,
+        old_root: bytes | str,
+        new_root: bytes | str,
+        algorithm: HashAlgorithm = "sha256",
+    ) -> bool:
+        """Check that the later root extends the earlier one.
+
+        Args:
+            old_root: Root of the earlier tree (raw or hex)
+            new_root: Root of the later tree (raw or hex)
+            algorithm: Hash algorithm of both trees
+
+        Returns:
+            Whether the proof is well-formed and both roots match
+        """
+        if isinstance(old_root, str):
+            old_root = bytes.fromhex(old_root)
+        if isinstance(new_root, str):
+            new_root = bytes.fromhex(new_root)
+        try:
+            return self.compute_roots(algorithm) == (old_root, new_root)
+        except ValueError:
+            return False
+
+    def to_dict(self) -> dict[str, Any]:
+        """Serialize to a JSON-compatible dict."""
+        return {
+            "old_size": self.old_size,
+            "new_size": self.new_size,
+            "hashes": [node.hex() for node in self.hashes],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> ConsistencyProof:
+        """Deserialize from a dict produced by ``to_dict``."""
+        return cls(
+            old_size=int(data["old_size"]),
+            new_size=int(data["new_size"]),
+            hashes=tuple(bytes.fromhex(node) for node in data["hashes"]),
+        )
+
+
+def old_peak_heights(size: int) -> list[int]:
+    """Return the heights of the perfect subtrees covering ``size`` leaves.
+
+    One per set bit of ``size``, largest (leftmost) first. The peak of
+    height ``h`` is node ``(size >> h) - 1`` on level ``h`` and is identical
+    in every larger tree over the same leaves.
+    """
+    return [height for height in reversed(range(size.bit_length())) if size >> height & 1]
+
+
+def fold_nodes(
+    new: Callable[..., Any],
+    leaf_count: int,
+    nodes: dict[int, dict[int, bytes]],
+    hashes: Iterator[bytes],
+) -> bytes:
+    """Compute a root from known nodes, consuming missing siblings in order.
+
+    Args:
+        new: Hash constructor
+        leaf_count: Number of leaves in the tree
+        nodes: Known node hashes by level, then by index
+        hashes: Sibling hashes in the order produced by ``sibling_hashes``
+
+    Returns:
+        The root hash
+
+    Raises:
+        ValueError: If ``hashes`` runs out
+    """
+    current: dict[int, bytes] = {}
+    for level, size in enumerate(level_sizes(leaf_count)):
+        current.update(nodes.get(level, {}))
+        if size == 1:
+            break
+        parents: dict[int, bytes] = {}
+        for index in sorted(current):
+            parent = index // 2
+            if parent in parents:
+                continue
+            left_index = parent * 2
+            left = current.get(left_index)
+            if left is None:
+                left = next(hashes, None)
+            right = current.get(left_index + 1) if left_index + 1 < size else left
+            if right is None:
+                right = next(hashes, None)
+            if left is None or right is None:
+                raise ValueError("Proof has too few hashes")
+            parents[parent] = new(left + right).digest()
+        current = parents
+    return bytes(current[0])
+
+
+def sibling_hashes(
+    node: Callable[[int, int], bytes], leaf_count: int, known: Mapping[int, Iterable[int]]
+) -> list[bytes]:
+    """Collect the hashes needed to compute the root from known nodes.
+
+    Args:
+        node: Callable ``(level, index) -> bytes`` returning a node hash
+        leaf_count: Number of leaves in the tree
+        known: Indices of the nodes the verifier already has, by level
+
+    Returns:
+        The hashes in the order ``fold_nodes`` consumes them
+    """
+    hashes: list[bytes] = []
+    current: set[int] = set()
+    for level, size in enumerate(level_sizes(leaf_count)):
+        current.update(known.get(level, ()))
+        if size == 1:
+            break
+        parents: set[int] = set()
+        for index in sorted(current):
+            parent = index // 2
+            if parent in parents:
+                continue
+            parents.add(parent)
+            left_index = parent * 2
+            if left_index not in current:
+                hashes.append(node(level, left_index))
+            if left_index + 1 < size and left_index + 1 not in current:
+                hashes.append(node(level, left_index + 1))
+        current = parents
+    return hashes
@@ -0,0 +1,522 @@
+"""Serve Merkle proofs over HTTP from stored tree files.
+
+``ProofServer`` is a small asyncio HTTP/1.1 server (standard library only)
+that answers proof requests for windows whose trees were stored with a
+``TreeStore``, so the URL recorded as ``verification.proofEndpoint`` can
+be served locally, e.g. for audits and tests run offline. Routes, all
+answering JSON in the ``to_dict`` formats of ``makoto.merkle.proofs``::
+
+    GET  /windows/<id>                         the window's merkleTree
+    GET  /windows/<id>/proof?leaf=N            MerkleProof
+    GET  /windows/<id>/multiproof?leaves=1,2   MerkleMultiproof
+    GET  /windows/<id>/consistency?old_size=N  ConsistencyProof
+    POST /windows/<id>/proofs  {"leaves": [..]}  {"proofs": [MerkleProof, ...]}
+
+Trees are opened with ``mmap`` and kept in an LRU cache of open files.
+Requests for the same window that arrive together (in the same event
+loop iteration, or within ``batch_delay`` seconds) are answered in one
+executor call, so the event loop never blocks on page faults and a burst
+of requests costs one thread hop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from http import HTTPStatus
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+from .storage import MappedMerkleTree, MerkleTreeWriter, save_tree
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from types import TracebackType
+
+    from ..models.stream_window import HashAlgorithm, LeafEncoding, LeafOrder
+    from .tree import MerkleTree
+
+    _Request = tuple[Callable[[MappedMerkleTree], Any], asyncio.Future[Any]]
+
+TREE_FILE_SUFFIX = ".mktree"
+
+# Largest accepted request body (a POST of leaf indices)
+_MAX_BODY_SIZE = 1024 * 1024
+
+
+class TreeStore:
+    """A directory of tree files, one per window, with an LRU cache of open trees.
+
+    Window IDs are percent-encoded into file names, so any ID (such as
+    ``stream:iot_sensors:window_20250101_120000``) maps to one file in the
+    directory. A file replaced on disk (a re-attested window) is reopened
+    on its next use.
+
+    Example:
+        ```python
+        store = TreeStore("/var/lib/makoto/trees")
+        with store.writer(window_id) as writer:
+            writer.extend(records)
+        ```
+    """
+
+    def __init__(self, directory: Path | str, *, max_open: int = 64) -> None:
+        """Create a store.
+
+        Args:
+            directory: Directory holding the tree files (created if missing)
+            max_open: Number of trees kept open (mapped) when not in use
+
+        Raises:
+            ValueError: If max_open is less than 1
+        """
+        if max_open < 1:
+            raise ValueError("max_open must be at least 1")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_open = max_open
+        self._open: OrderedDict[str, _OpenTree] = OrderedDict()
+        self._in_use: dict[int, _OpenTree] = {}
+        self._lock = threading.Lock()
+
+    def path(self, window_id: str) -> Path:
+        """Return the tree file path of a window.
+
+        Raises:
+            ValueError: If the window ID is empty
+        """
+        if not window_id:
+            raise ValueError("Window ID must not be empty")
+        return self.directory / (quote(window_id, safe="") + TREE_FILE_SUFFIX)
+
+    def writer(
+        self,
+        window_id: str,
+        algorithm: HashAlgorithm = "sha256",
+        *,
+        leaf_algorithm: HashAlgorithm | None = None,
+        encoding: LeafEncoding = "raw",
+        leaf_order: LeafOrder | None = None,
+    ) -> MerkleTreeWriter:
+        """Start streaming a window's tree into the store (see ``MerkleTreeWriter``)."""
+        return MerkleTreeWriter(
+            self.path(window_id),
+            algorithm,
+            leaf_algorithm=leaf_algorithm,
+            encoding=encoding,
+            leaf_order=leaf_order,
+        )
+
+    def save(self, window_id: str, tree: MerkleTree) -> Path:
+        """Store an in-memory tree for a window.
+
+        Returns:
+            The tree file path
+        """
+        path = self.path(window_id)
+        save_tree(tree, path)
+        return path
+
+    def acquire(self, window_id: str) -> MappedMerkleTree:
+        """Open (or reuse) a window's tree; pair with ``release``.
+
+        Raises:
+            KeyError: If the store has no tree for the window
+            ValueError: If the tree file is invalid
+        """
+        path = self.path(window_id)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            raise KeyError(window_id) from None
+        version = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            entry = self._open.get(window_id)
+            if entry is not None and entry.version != version:
+                del self._open[window_id]
+                entry.retire()
+                entry = None
+            if entry is None:
+                entry = _OpenTree(MappedMerkleTree.open(path), version)
+                self._open[window_id] = entry
+            self._open.move_to_end(window_id)
+            entry.refs += 1
+            self._in_use[id(entry.tree)] = entry
+            self._evict()
+            return entry.tree
+
+    def release(self, tree: MappedMerkleTree) -> None:
+        """Return a tree obtained from ``acquire``."""
+        with self._lock:
+            entry = self._in_use[id(tree)]
+            entry.refs -= 1
+            if entry.refs == 0:
+                del self._in_use[id(tree)]
+                if entry.retired:
+                    tree.close()
+            self._evict()
+
+    def _evict(self) -> None:
+        """Close least recently used trees that are not in use."""
+        excess = len(self._open) - self.max_open
+        for window_id in list(self._open):
+            if excess <= 0:
+                break
+            if self._open[window_id].refs == 0:
+                self._open.pop(window_id).retire()
+                excess -= 1
+
+    @property
+    def open_count(self) -> int:
+        """Number of trees currently open."""
+        return len(self._open)
+
+    def close(self) -> None:
+        """Close every open tree (trees in use are closed when released)."""
+        with self._lock:
+            for entry in self._open.values():
+                entry.retire()
+            self._open.clear()
+
+
+class _OpenTree:
+    """A cached open tree, its file version and its number of users."""
+
+    def __init__(self, tree: MappedMerkleTree, version: tuple[int, int, int]) -> None:
+        self.tree = tree
+        self.version = version
+        self.refs = 0
+        self.retired = False
+
+    def retire(self) -> None:
+        """Close the tree now, or once its last user releases it."""
+        self.retired = True
+        if self.refs == 0:
+            self.tree.close()
+
+
+class _HttpError(Exception):
+    """A request error with an HTTP status."""
+
+    def __init__(self, status: HTTPStatus, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+def _int_param(query: dict[str, list[str]], name: str) -> int:
+    """Parse a required integer query parameter."""
+    try:
+        return int(query[name][0])
+    except (KeyError, ValueError):
+        raise _HttpError(
+            HTTPStatus.BAD_REQUEST, f"Query parameter {name!r} must be an integer"
+        ) from None
+
+
+def _int_list_param(query: dict[str, list[str]], name: str) -> list[int]:
+    """Parse a required comma-separated integer list query parameter."""
+    try:
+        return [int(value) for value in query[name][0].split(",")]
+    except (KeyError, ValueError):
+        raise _HttpError(
+            HTTPStatus.BAD_REQUEST, f"Query parameter {name!r} must be a list of integers"
+        ) from None
+
+
+def _leaf_list(values: Any) -> list[int]:
+    """Check a list of leaf indices (from a query string or a JSON body)."""
+    if isinstance(values, list) and all(type(value) is int for value in values):
+        return values
+    raise _HttpError(HTTPStatus.BAD_REQUEST, "'leaves' must be a list of integers")
+
+
+def _run_batch(
+    tree: MappedMerkleTree, calls: list[Callable[[MappedMerkleTree], Any]]
+) -> list[tuple[bool, Any]]:
+    """Answer a batch of requests against one tree (in a worker thread)."""
+    results: list[tuple[bool, Any]] = []
+    for call in calls:
+        try:
+            results.append((True, call(tree)))
+        except (ValueError, IndexError) as e:
+            results.append((False, e))
+    return results
+
+
+def _run_window(
+    store: TreeStore, window_id: str, calls: list[Callable[[MappedMerkleTree], Any]]
+) -> list[tuple[bool, Any]]:
+    """Open a window's tree and answer a batch of requests (in a worker thread)."""
+    try:
+        tree = store.acquire(window_id)
+    except FileNotFoundError:
+        # Removed between the stat and the open
+        raise KeyError(window_id) from None
+    try:
+        return _run_batch(tree, calls)
+    finally:
+        store.release(tree)
+
+
+class ProofServer:
+    """Asyncio HTTP server answering proof requests from a ``TreeStore``.
+
+    Example:
+        ```python
+        async with ProofServer(TreeStore("trees"), port=8080) as server:
+            builder.with_proof_endpoint(server.endpoint(window_id))
+            await server.serve_forever()
+        ```
+    """
+
+    def __init__(
+        self,
+        store: TreeStore | Path | str,
+        *,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        batch_delay: float = 0.0,
+        max_batch: int = 1024,
+    ) -> None:
+        """Create a server (call ``start``, or use it as an async context manager).
+
+        Args:
+            store: Tree store, or the directory of one
+            host: Interface to listen on (local only by default)
+            port: Port to listen on (0 picks a free port)
+            batch_delay: Extra seconds to collect requests for a window
+                before answering them together
+            max_batch: Requests answered at once; a full batch is answered
+                without waiting for ``batch_delay``
+        """
+        self.store = store if isinstance(store, TreeStore) else TreeStore(store)
+        self.host = host
+        self.port = port
+        self.batch_delay = batch_delay
+        self.max_batch = max_batch
+        self._server: asyncio.Server | None = None
+        self._pending: dict[str, list[_Request]] = {}
+        self._tasks: set[asyncio.Task[None]] = set()
+        self._connections: dict[asyncio.Task[Any], asyncio.StreamWriter] = {}
+
+    async def start(self) -> None:
+        """Start listening."""
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    @property
+    def url(self) -> str:
+        """Base URL of the server."""
+        return f"http://{self.host}:{self.port}"
+
+    def endpoint(self, window_id: str) -> str:
+        """Return the proof endpoint URL of a window (for ``proofEndpoint``)."""
+        return f"{self.url}/windows/{quote(window_id, safe='')}"
+
+    async def serve_forever(self) -> None:
+        """Serve until cancelled."""
+        if self._server is None:
+            await self.start()
+        assert self._server is not None
+        await self._server.serve_forever()
+
+    async def close(self) -> None:
+        """Stop listening, finish pending batches and close the open trees."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        # Closing idle keep-alive connections ends their handlers
+        for writer in self._connections.values():
+            writer.close()
+        await asyncio.gather(*self._connections, return_exceptions=True)
+        self.store.close()
+
+    async def __aenter__(self) -> ProofServer:
+        await self.start()
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        await self.close()
+
+    async def _submit(self, window_id: str, call: Callable[[MappedMerkleTree], Any]) -> Any:
+        """Queue a request for a window's tree and await its answer."""
+        future: asyncio.Future[Any] = asyncio.get_running_loop().create_future()
+        pending = self._pending.setdefault(window_id, [])
+        pending.append((call, future))
+        if len(pending) >= self.max_batch:
+            del self._pending[window_id]
+            self._spawn(self._answer(window_id, pending))
+        elif len(pending) == 1:
+            self._spawn(self._answer_later(window_id))
+        return await future
+
+    def _spawn(self, coro: Any) -> None:
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _answer_later(self, window_id: str) -> None:
+        await asyncio.sleep(self.batch_delay)
+        batch = self._pending.pop(window_id, None)
+        if batch:
+            await self._answer(window_id, batch)
+
+    async def _answer(
+        self,
+        window_id: str,
+        batch: list[_Request],
+    ) -> None:
+        """Answer a batch of requests in one executor call.
+
+        The tree is opened in the executor too. Every request gets an
+        answer: a missing tree is a 404 and any other error a 500.
+        """
+        results: list[tuple[bool, Any]] = []
+        try:
+            calls = [call for call, _ in batch]
+            loop = asyncio.get_running_loop()
+            results = await loop.run_in_executor(None, _run_window, self.store, window_id, calls)
+        except KeyError:
+            error = _HttpError(HTTPStatus.NOT_FOUND, f"Unknown window: {window_id}")
+            results = [(False, error)] * len(batch)
+        except Exception as e:
+            error = _HttpError(HTTPStatus.INTERNAL_SERVER_ERROR, str(e) or type(e).__name__)
+            results = [(False, error)] * len(batch)
+        finally:
+            # Cancelled before any result: cancel the waiting requests too
+            for i, (_, future) in enumerate(batch):
+                if future.done():
+                    continue
+                if i >= len(results):
+                    future.cancel()
+                elif results[i][0]:
+                    future.set_result(results[i][1])
+                else:
+                    future.set_exception(results[i][1])
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve the requests of one connection (HTTP/1.1 keep-alive)."""
+        connection = asyncio.current_task()
+        assert connection is not None
+        self._connections[connection] = writer
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except _HttpError as e:
+                    await self._respond(writer, e.status, {"error": str(e)}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+                method, target, headers, body = request
+                try:
+                    payload = await self._dispatch(method, target, body)
+                    status = HTTPStatus.OK
+                except _HttpError as e:
+                    status, payload = e.status, {"error": str(e)}
+                except (ValueError, IndexError) as e:
+                    status, payload = HTTPStatus.BAD_REQUEST, {"error": str(e)}
+                keep_alive = headers.get("connection", "").lower() != "close"
+                await self._respond(writer, status, payload, keep_alive=keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._connections.pop(connection, None)
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+    @staticmethod
+    async def _read_request(
+        reader: asyncio.StreamReader,
+    ) -> tuple[str, str, dict[str, str], bytes] | None:
+        """Read one request (None when the client closed the connection)."""
+        line = await reader.readline()
+        if not line.strip():
+            return None
+        try:
+            method, target, _ = line.decode("latin-1").split()
+        except ValueError:
+            raise _HttpError(HTTPStatus.BAD_REQUEST, "Malformed request line") from None
+        headers: dict[str, str] = {}
+        while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError:
+            raise _HttpError(HTTPStatus.BAD_REQUEST, "Malformed Content-Length") from None
+        if length > _MAX_BODY_SIZE:
+            raise _HttpError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body too large")
+        body = await reader.readexactly(length) if length > 0 else b""
+        return method, target, headers, body
+
+    @staticmethod
+    async def _respond(
+        writer: asyncio.StreamWriter, status: HTTPStatus, payload: Any, *, keep_alive: bool
+    ) -> None:
+        body = json.dumps(payload, separators=(",", ":")).encode()
+        head = (
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    async def _dispatch(self, method: str, target: str, body: bytes) -> Any:
+        """Route a request and return its JSON payload."""
+        url = urlsplit(target)
+        parts = url.path.strip("/").split("/")
+        if len(parts) not in (2, 3) or parts[0] != "windows":
+            raise _HttpError(HTTPStatus.NOT_FOUND, f"Unknown path: {url.path}")
+        window_id = unquote(parts[1])
+        action = parts[2] if len(parts) == 3 else ""
+        query = parse_qs(url.query)
+        expected_method = "POST" if action == "proofs" else "GET"
+        if action not in ("", "proof", "multiproof", "consistency", "proofs"):
+            raise _HttpError(HTTPStatus.NOT_FOUND, f"Unknown path: {url.path}")
+        if method != expected_method:
+            raise _HttpError(HTTPStatus.METHOD_NOT_ALLOWED, f"Use {expected_method} {url.path}")
+
+        if action == "":
+            return await self._submit(
+                window_id, lambda tree: tree.to_model().model_dump(by_alias=True, exclude_none=True)
+            )
+        if action == "proof":
+            leaf = _int_param(query, "leaf")
+            return await self._submit(window_id, lambda tree: tree.proof(leaf).to_dict())
+        if action == "multiproof":
+            leaves = _int_list_param(query, "leaves")
+            return await self._submit(window_id, lambda tree: tree.multiproof(leaves).to_dict())
+        if action == "consistency":
+            old_size = _int_param(query, "old_size")
+            return await self._submit(
+                window_id, lambda tree: tree.consistency_proof(old_size).to_dict()
+            )
+        try:
+            request = json.loads(body)
+        except ValueError:
+            raise _HttpError(HTTPStatus.BAD_REQUEST, "Request body must be JSON") from None
+        leaves = _leaf_list(request.get("leaves") if isinstance(request, dict) else None)
+        return {
+            "proofs": await self._submit(
+                window_id, lambda tree: [tree.proof(leaf).to_dict() for leaf in leaves]
+            )
+        }
@@ -0,0 +1,472 @@
+"""On-disk Merkle tree files, opened with ``mmap``.
+
+A tree file is a fixed 96-byte header followed by every level of the tree,
+from the leaves up to the root, each as a flat array of fixed-width
+digests (the same layout ``MerkleTree`` keeps in memory)::
+
+    offset  size  field
+    0       8     magic  b"MKTMERK1"
+    8       4     format version (2)
+    12      16    algorithm name, ASCII, NUL-padded
+    28      4     digest size
+    32      8     leaf count
+    40      4     height (number of levels)
+    44      16    leaf hash algorithm name, ASCII, NUL-padded
+    60      4     leaf digest size
+    64      16    leaf encoding name, ASCII, NUL-padded
+    80      8     leaf order name, ASCII, NUL-padded (empty: not recorded)
+    88      8     reserved (zero)
+    96      ...   level 0 (leaf_count * leaf digest size), level 1, ..., root
+
+All integers are little-endian. Level offsets follow from the leaf count,
+so a proof lookup touches only the O(log n) pages holding its nodes, and
+the root is the last digest of the file.
+
+``MerkleTreeWriter`` streams leaves straight to disk and builds the upper
+levels from the file in bounded memory, so windows with tens of millions
+of records never need the whole tree in RAM.
+"""
+
+from __future__ import annotations
+
+import mmap
+import operator
+import os
+import struct
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, BinaryIO
+
+from ..models.stream_window import MerkleTree as MerkleTreeModel
+from ..models.stream_window import StreamWindowPredicate
+from .algorithms import build_level, hash_function
+from .encoding import encode_records, leaf_encoder
+from .proofs import level_sizes
+from .tree import MerkleTree
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from types import TracebackType
+
+    from ..models.stream_window import HashAlgorithm, LeafEncoding, LeafOrder
+
+TREE_FILE_MAGIC = b"MKTMERK1"
+TREE_FILE_VERSION = 2
+HEADER_SIZE = 96
+
+_HEADER = struct.Struct("<8sI16sIQI16sI16s8s8x")
+
+_LEAF_ORDERS = ("arrival", "key")
+
+# Leaf hashes buffered before each write, and digests read per block when
+# building the upper levels (an even count, so pairs never straddle blocks)
+_WRITE_BUFFER_SIZE = 1024 * 1024
+_BUILD_BLOCK_NODES = 32768
+
+
+def _pack_header(tree: MerkleTree | MerkleTreeWriter, leaf_count: int, height: int) -> bytes:
+    """Encode a tree file header."""
+    algorithm, leaf_algorithm = tree.algorithm, tree.leaf_algorithm
+    return _HEADER.pack(
+        TREE_FILE_MAGIC,
+        TREE_FILE_VERSION,
+        algorithm.encode("ascii"),
+        hash_function(algorithm)().digest_size,
+        leaf_count,
+        height,
+        leaf_algorithm.encode("ascii"),
+        hash_function(leaf_algorithm)().digest_size,
+        tree.leaf_encoding.encode("ascii"),
+        (tree.leaf_order or "").encode("ascii"),
+    )
+
+
+def _unpack_header(
+    data: bytes,
+) -> tuple[HashAlgorithm, HashAlgorithm, int, int, LeafEncoding, LeafOrder | None]:
+    """Decode a tree file header.
+
+    Returns:
+        Tuple of (algorithm, leaf_algorithm, leaf_count, height,
+        leaf_encoding, leaf_order)
+
+    Raises:
+        ValueError: If the header is not a supported tree file header
+    """
+    if len(data) < HEADER_SIZE:
+        raise ValueError("Not a Merkle tree file: truncated header")
+    fields = _HEADER.unpack_from(data)
+    magic, version, algorithm, digest_size, leaf_count, height = fields[:6]
+    leaf_algorithm, leaf_digest_size, leaf_encoding, leaf_order = fields[6:]
+    if magic != TREE_FILE_MAGIC:
+        raise ValueError("Not a Merkle tree file: bad magic")
+    if version != TREE_FILE_VERSION:
+        raise ValueError(f"Unsupported Merkle tree file version: {version}")
+    names: list[Any] = []
+    for raw, size in ((algorithm, digest_size), (leaf_algorithm, leaf_digest_size)):
+        name = raw.rstrip(b"\0").decode("ascii")
+        if hash_function(name)().digest_size != size:
+            raise ValueError(f"Tree file digest size does not match {name}")
+        names.append(name)
+    encoding: Any = leaf_encoding.rstrip(b"\0").decode("ascii")
+    leaf_encoder(encoding)
+    order: Any = leaf_order.rstrip(b"\0").decode("ascii") or None
+    if order is not None and order not in _LEAF_ORDERS:
+        raise ValueError(f"Unknown tree file leaf order: {order!r}")
+    return names[0], names[1], leaf_count, height, encoding, order
+
+
+class MerkleTreeWriter:
+    """Build a tree file by streaming records, in bounded memory.
+
+    Leaves are written as they arrive; ``close`` then builds each upper
+    level from the one below it on disk and atomically moves the finished
+    file into place.
+
+    Example:
+        ```python
+        with MerkleTreeWriter("window.mktree") as writer:
+            for batch in consumer:
+                writer.extend(batch)
+        builder.stream_window(...).with_merkle_tree(writer)
+        ```
+    """
+
+    def __init__(
+        self,
+        path: Path | str,
+        algorithm: HashAlgorithm = "sha256",
+        *,
+        leaf_algorithm: HashAlgorithm | None = None,
+        encoding: LeafEncoding = "raw",
+        leaf_order: LeafOrder | None = None,
+    ) -> None:
+        """Start a tree file.
+
+        Args:
+            path: Destination path (written as ``<path>.tmp`` until closed)
+            algorithm: Hash algorithm of the internal nodes
+            leaf_algorithm: Hash algorithm of the leaves (default: algorithm)
+            encoding: Leaf encoding applied to each record before hashing
+            leaf_order: Order the leaves are appended in (arrival if None)
+        """
+        self.path = Path(path)
+        self.algorithm: HashAlgorithm = algorithm
+        self.leaf_algorithm: HashAlgorithm = leaf_algorithm or algorithm
+        self.leaf_encoding: LeafEncoding = encoding
+        self.leaf_order: LeafOrder | None = leaf_order
+        self._encoder = leaf_encoder(encoding)
+        self._new = hash_function(algorithm)
+        self._leaf_new = hash_function(self.leaf_algorithm)
+        self.digest_size: int = self._new().digest_size
+        self.leaf_digest_size: int = self._leaf_new().digest_size
+        self._tmp = self.path.with_name(self.path.name + ".tmp")
+        self._file: BinaryIO | None = open(self._tmp, "w+b")  # noqa: SIM115
+        self._file.write(bytes(HEADER_SIZE))
+        self._pending: list[bytes] = []
+        self._pending_size = 0
+        self.leaf_count = 0
+        self._root: bytes | None = None
+        self._height = 0
+
+    def append(self, record: Any) -> None:
+        """Encode and hash a record and add it as the next leaf."""
+        if self.leaf_encoding != "raw":
+            record = self._encoder.encode(record)
+        self.append_leaf_hash(self._leaf_new(record).digest())
+
+    def extend(self, records: Iterable[Any]) -> None:
+        """Encode and hash a batch of records and add them as leaves."""
+        new = self._leaf_new
+        for record in encode_records(records, self.leaf_encoding):
+            self.append_leaf_hash(new(record).digest())
+
+    def append_leaf_hash(self, leaf: bytes) -> None:
+        """Add a precomputed leaf hash.
+
+        Raises:
+            ValueError: If the writer is closed or the hash has the wrong size
+        """
+        if self._file is None:
+            raise ValueError("Merkle tree writer is closed")
+        if len(leaf) != self.leaf_digest_size:
+            raise ValueError(f"Leaf hashes must be {self.leaf_digest_size} bytes")
+        self._pending.append(leaf)
+        self._pending_size += len(leaf)
+        self.leaf_count += 1
+        if self._pending_size >= _WRITE_BUFFER_SIZE:
+            self._flush()
+
+    def _flush(self) -> None:
+        """Write buffered leaf hashes."""
+        assert self._file is not None
+        self._file.write(b"".join(self._pending))
+        self._pending.clear()
+        self._pending_size = 0
+
+    def close(self) -> None:
+        """Build the upper levels, write the header and move the file into place."""
+        file = self._file
+        if file is None:
+            return
+        self._flush()
+        node_size = self.leaf_digest_size
+        sizes = level_sizes(self.leaf_count) if self.leaf_count else []
+        offset = HEADER_SIZE
+        for size in sizes[:-1]:
+            block = _BUILD_BLOCK_NODES * node_size
+            end = offset + size * node_size
+            read = offset
+            while read < end:
+                # Reads are block-aligned and the last block is the only odd
+                # one, so build_level pairs exactly as over the whole level
+                file.seek(read)
+                chunk = file.read(min(block, end - read))
+                file.seek(0, os.SEEK_END)
+                file.write(build_level(chunk, node_size, self._new))
+                read += len(chunk)
+            offset = end
+            node_size = self.digest_size
+        if sizes:
+            file.seek(offset)
+            self._root = file.read(node_size)
+        self._height = len(sizes)
+        file.seek(0)
+        file.write(_pack_header(self, self.leaf_count, self._height))
+        file.flush()
+        os.fsync(file.fileno())
+        file.close()
+        self._file = None
+        os.replace(self._tmp, self.path)
+
+    def abort(self) -> None:
+        """Discard the partial file."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._tmp.unlink(missing_ok=True)
+
+    def __enter__(self) -> MerkleTreeWriter:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    @property
+    def tree_height(self) -> int:
+        """Height of the finished tree (0 until closed)."""
+        return self._height
+
+    def root(self) -> bytes | None:
+        """Return the root of the finished tree (None until closed or if empty)."""
+        return self._root
+
+    def root_hex(self) -> str | None:
+        """Return the root as lowercase hex (None until closed or if empty)."""
+        return self._root.hex() if self._root is not None else None
+
+    def to_model(self) -> MerkleTreeModel:
+        """Describe the finished tree for a stream window predicate.
+
+        Raises:
+            ValueError: If the writer is not closed or the tree is empty
+        """
+        if self._file is not None:
+            raise ValueError("Close the Merkle tree writer before describing it")
+        root = self.root_hex()
+        if root is None:
+            raise ValueError("An empty Merkle tree has no root")
+        return MerkleTreeModel(
+            algorithm=self.algorithm,
+            leaf_count=self.leaf_count,
+            root=root,
+            tree_height=self._height,
+            leaf_hash_algorithm=(
+                self.leaf_algorithm if self.leaf_algorithm != self.algorithm else None
+            ),
+            leaf_encoding=self.leaf_encoding if self.leaf_encoding != "raw" else None,
+            leaf_order=self.leaf_order,
+        )
+
+
+class MappedMerkleTree(MerkleTree):
+    """A ``MerkleTree`` backed by a memory-mapped tree file.
+
+    Levels are memoryviews over the mapping, so opening is O(1) and proofs
+    only read the pages holding their nodes.
+
+    Example:
+        ```python
+        with MappedMerkleTree.open("window.mktree") as tree:
+            tree.check(predicate)
+            proof = tree.proof(123456)
+        ```
+    """
+
+    def __init__(
+        self,
+        mapping: mmap.mmap,
+        levels: list[memoryview],
+        algorithm: HashAlgorithm,
+        leaf_algorithm: HashAlgorithm,
+        leaf_encoding: LeafEncoding = "raw",
+        leaf_order: LeafOrder | None = None,
+    ) -> None:
+        """Wrap a mapping; use ``open``."""
+        super().__init__(
+            levels,
+            algorithm,
+            leaf_algorithm=leaf_algorithm,
+            leaf_encoding=leaf_encoding,
+            leaf_order=leaf_order,
+        )
+        self._mmap = mapping
+        self._views = levels
+
+    @classmethod
+    def open(cls, path: Path | str, *, verify: bool = False) -> MappedMerkleTree:
+        """Map a tree file read-only.
+
+        Args:
+            path: Path of a file written by ``MerkleTreeWriter`` or ``save``
+            verify: Recompute every level from the leaves (reads the whole
+                file) instead of trusting the stored internal nodes
+
+        Returns:
+            The mapped tree (close it, or use it as a context manager)
+
+        Raises:
+            ValueError: If the file is not a valid tree file
+        """
+        with open(path, "rb") as file:
+            header = file.read(HEADER_SIZE)
+            algorithm, leaf_algorithm, leaf_count, height, encoding, order = _unpack_header(header)
+            sizes = level_sizes(leaf_count) if leaf_count else []
+            if height != len(sizes):
+                raise ValueError("Tree file height does not match its leaf count")
+            node_sizes = [hash_function(leaf_algorithm)().digest_size]
+            node_sizes += [hash_function(algorithm)().digest_size] * (len(sizes) - 1)
+            expected = HEADER_SIZE + sum(map(operator.mul, sizes, node_sizes))
+            actual = os.fstat(file.fileno()).st_size
+            if actual != expected:
+                raise ValueError(f"Tree file is {actual} bytes, expected {expected}")
+            mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        view = memoryview(mapping)
+        levels = []
+        offset = HEADER_SIZE
+        for size, node_size in zip(sizes, node_sizes, strict=True):
+            levels.append(view[offset : offset + size * node_size])
+            offset += size * node_size
+        view.release()
+        tree = cls(mapping, levels, algorithm, leaf_algorithm, encoding, order)
+        if verify:
+            try:
+                tree._verify_levels()
+            except ValueError:
+                tree.close()
+                raise
+        return tree
+
+    def _verify_levels(self) -> None:
+        """Check that every stored level is built from the one below.
+
+        Raises:
+            ValueError: If a level does not match
+        """
+        new = hash_function(self.algorithm)
+        for index in range(self.height - 1):
+            below, above = self._views[index], self._views[index + 1]
+            node_size = self.leaf_digest_size if index == 0 else self.digest_size
+            block = _BUILD_BLOCK_NODES * node_size
+            for start in range(0, len(below), block):
+                parents = build_level(below[start : start + block], node_size, new)
+                offset = start // node_size // 2 * self.digest_size
+                if above[offset : offset + len(parents)] != parents:
+                    raise ValueError(f"Tree file level {index + 1} does not match its children")
+
+    def check(self, expected: StreamWindowPredicate | MerkleTreeModel) -> None:
+        """Check the stored tree against a stream window's ``merkleTree``.
+
+        Args:
+            expected: The window's predicate, or its ``integrity.merkle_tree``
+
+        Raises:
+            ValueError: If the algorithms, leaf encoding or order, leaf count,
+                root or height differ
+        """
+        if isinstance(expected, StreamWindowPredicate):
+            expected = expected.integrity.merkle_tree
+        if expected.algorithm != self.algorithm:
+            raise ValueError(
+                f"Tree file uses {self.algorithm}, attestation records {expected.algorithm}"
+            )
+        leaf_algorithm = expected.leaf_hash_algorithm or expected.algorithm
+        if leaf_algorithm != self.leaf_algorithm:
+            raise ValueError(
+                f"Tree file leaves use {self.leaf_algorithm}, attestation records {leaf_algorithm}"
+            )
+        leaf_encoding = expected.leaf_encoding or "raw"
+        if leaf_encoding != self.leaf_encoding:
+            raise ValueError(
+                f"Tree file leaves are {self.leaf_encoding}, attestation records {leaf_encoding}"
+            )
+        leaf_order = expected.leaf_order or "arrival"
+        if leaf_order != (self.leaf_order or "arrival"):
+            raise ValueError(
+                f"Tree file leaf order is {self.leaf_order}, attestation records {leaf_order}"
+            )
+        if expected.leaf_count != self.leaf_count:
+            raise ValueError(
+                f"Tree file has {self.leaf_count} leaves, attestation records {expected.leaf_count}"
+            )
+        if expected.root != self.root_hex():
+            raise ValueError("Tree file root does not match the attestation")
+        if expected.tree_height is not None and expected.tree_height != self.height:
+            raise ValueError(
+                f"Tree file height is {self.height}, attestation records {expected.tree_height}"
+            )
+
+    def close(self) -> None:
+        """Release the views and unmap the file."""
+        for view in self._views:
+            view.release()
+        self._views = []
+        self._levels = []
+        self._mmap.close()
+
+    def __enter__(self) -> MappedMerkleTree:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+
+def save_tree(tree: MerkleTree, path: Path | str) -> None:
+    """Atomically write an in-memory tree as a tree file.
+
+    Args:
+        tree: The tree
+        path: Destination path
+    """
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as file:
+        file.write(_pack_header(tree, tree.leaf_count, tree.height))
+        for index in range(tree.height):
+            file.write(tree.level(index))
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp, path)
@@ -0,0 +1,340 @@
+"""Merkle trees over stream-window records.
+
+The construction is bit-identical to ``MerkleTree`` in the Rust SDK
+(``sdks/rust/src/hash.rs``):
+
+- A leaf is ``H(record)``.
+- An internal node is ``H(left || right)``; when a level has an odd number
+  of nodes, the last node is paired with itself.
+- ``height`` is the number of levels including the leaves and the root.
+- An empty tree has no root.
+
+``H`` is the tree's hash algorithm (any ``HashAlgorithm`` literal; the
+Rust SDK only builds SHA-256 trees). Leaves may use a different algorithm
+(``leafHashAlgorithm``), e.g. a fast BLAKE3 leaf hash under SHA-256
+nodes; the leaf level then has that algorithm's digest size. Records may
+be canonicalized before hashing (``leafEncoding``, see
+``makoto.merkle.encoding``). Each level is stored as one
+contiguous ``bytes`` buffer of ``node count * digest size`` bytes, so
+sibling pairs are hashed straight out of the buffer without concatenation.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+from ..models.stream_window import MerkleTree as MerkleTreeModel
+from .algorithms import build_level, hash_function
+from .encoding import encode_records
+from .parallel import DEFAULT_SUBTREE_LEAVES, build_levels_parallel
+from .proofs import (
+    ConsistencyProof,
+    MerkleMultiproof,
+    MerkleProof,
+    level_sizes,
+    old_peak_heights,
+    sibling_hashes,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Sequence
+
+    from typing_extensions import Buffer
+
+    from ..models.stream_window import HashAlgorithm, LeafEncoding, LeafOrder
+    from .proofs import SiblingPosition
+
+
+class MerkleTree:
+    """A Merkle tree with levels stored in contiguous buffers.
+
+    Example:
+        ```python
+        tree = MerkleTree.from_records(records)
+        builder.stream_window(...).with_merkle_tree(tree)
+        ```
+    """
+
+    def __init__(
+        self,
+        levels: Sequence[bytes | memoryview],
+        algorithm: HashAlgorithm = "sha256",
+        *,
+        leaf_algorithm: HashAlgorithm | None = None,
+        leaf_encoding: LeafEncoding = "raw",
+        leaf_order: LeafOrder | None = None,
+    ) -> None:
+        """Wrap precomputed levels; use ``from_records`` or ``from_leaf_hashes``.
+
+        Args:
+            levels: Level buffers from the leaves up to the root (``bytes``,
+                or memoryviews e.g. over a memory-mapped tree file)
+            algorithm: Hash algorithm of the internal nodes
+            leaf_algorithm: Hash algorithm of the leaves (default: algorithm)
+            leaf_encoding: Encoding the records were hashed in
+            leaf_order: Order of the leaves (arrival if None)
+        """
+        self._levels = list(levels)
+        self.algorithm: HashAlgorithm = algorithm
+        self.leaf_algorithm: HashAlgorithm = leaf_algorithm or algorithm
+        self.leaf_encoding: LeafEncoding = leaf_encoding
+        self.leaf_order: LeafOrder | None = leaf_order
+        self.digest_size: int = hash_function(algorithm)().digest_size
+        self.leaf_digest_size: int = hash_function(self.leaf_algorithm)().digest_size
+
+    @classmethod
+    def from_records(
+        cls,
+        records: Iterable[Any],
+        algorithm: HashAlgorithm = "sha256",
+        *,
+        leaf_algorithm: HashAlgorithm | None = None,
+        encoding: LeafEncoding = "raw",
+    ) -> MerkleTree:
+        """Build a tree whose leaves are the hashes of records.
+
+        Args:
+            records: Record bytes (any buffer-protocol objects), or records
+                in the input format of ``encoding``
+            algorithm: Hash algorithm of the internal nodes
+            leaf_algorithm: Hash algorithm of the leaves (default: algorithm)
+            encoding: Leaf encoding applied to each record before hashing
+
+        Returns:
+            The tree
+
+        Raises:
+            ValueError: If a record cannot be encoded
+        """
+        new = hash_function(leaf_algorithm or algorithm)
+        leaves = b"".join([new(record).digest() for record in encode_records(records, encoding)])
+        tree = cls._build(leaves, algorithm, leaf_algorithm)
+        tree.leaf_encoding = encoding
+        return tree
+
+    @classmethod
+    def from_records_parallel(
+        cls,
+        records: Sequence[bytes],
+        algorithm: HashAlgorithm = "sha256",
+        *,
+        leaf_algorithm: HashAlgorithm | None = None,
+        workers: int | None = None,
+        processes: bool = True,
+        subtree_leaves: int = DEFAULT_SUBTREE_LEAVES,
+    ) -> MerkleTree:
+        """Build a tree with a pool of workers (same root as ``from_records``).
+
+        Aligned subtrees of ``subtree_leaves`` records are built in parallel
+        and joined (see ``makoto.merkle.parallel``).
+
+        Args:
+            records: Record bytes (picklable when ``processes`` is True)
+            algorithm: Hash algorithm of the internal nodes
+            leaf_algorithm: Hash algorithm of the leaves (default: algorithm)
+            workers: Maximum number of workers (executor default if None)
+            processes: Use a process pool instead of a thread pool
+            subtree_leaves: Leaves per worker task, a power of two
+
+        Returns:
+            The tree
+
+        Raises:
+            ValueError: If subtree_leaves is not a power of two
+        """
+        levels = build_levels_parallel(
+            records,
+            algorithm,
+            leaf_algorithm=leaf_algorithm,
+            workers=workers,
+            processes=processes,
+            subtree_leaves=subtree_leaves,
+        )
+        return cls(levels, algorithm, leaf_algorithm=leaf_algorithm)
+
+    @classmethod
+    def from_leaf_hashes(
+        cls,
+        leaf_hashes: Iterable[bytes] | Buffer,
+        algorithm: HashAlgorithm = "sha256",
+        *,
+        leaf_algorithm: HashAlgorithm | None = None,
+    ) -> MerkleTree:
+        """Build a tree from precomputed leaf hashes.
+
+        Args:
+            leaf_hashes: Leaf hashes, either individually or concatenated in
+                one buffer
+            algorithm: Hash algorithm of the internal nodes
+            leaf_algorithm: Hash algorithm the leaves were hashed with
+                (default: algorithm)
+
+        Returns:
+            The tree
+
+        Raises:
+            ValueError: If a leaf hash has the wrong size
+        """
+        digest_size = hash_function(leaf_algorithm or algorithm)().digest_size
+        if isinstance(leaf_hashes, (bytes, bytearray, memoryview)):
+            leaves = bytes(leaf_hashes)
+            if len(leaves) % digest_size:
+                raise ValueError(f"Leaf buffer is not a multiple of {digest_size} bytes")
+        else:
+            hashes = list(leaf_hashes)  # type: ignore[arg-type]
+            if any(len(leaf) != digest_size for leaf in hashes):
+                raise ValueError(f"Leaf hashes must be {digest_size} bytes")
+            leaves = b"".join(hashes)
+        return cls._build(leaves, algorithm, leaf_algorithm)
+
+    @classmethod
+    def _build(
+        cls, leaves: bytes, algorithm: HashAlgorithm, leaf_algorithm: HashAlgorithm | None
+    ) -> MerkleTree:
+        """Build every level above a leaf buffer."""
+        tree = cls([leaves] if leaves else [], algorithm, leaf_algorithm=leaf_algorithm)
+        new = hash_function(algorithm)
+        node_size = tree.leaf_digest_size
+        while leaves and len(tree._levels[-1]) > node_size:
+            tree._levels.append(build_level(tree._levels[-1], node_size, new))
+            node_size = tree.digest_size
+        return tree
+
+    @property
+    def leaf_count(self) -> int:
+        """Number of leaves."""
+        return len(self._levels[0]) // self.leaf_digest_size if self._levels else 0
+
+    @property
+    def height(self) -> int:
+        """Number of levels, including the leaves and the root."""
+        return len(self._levels)
+
+    def root(self) -> bytes | None:
+        """Return the root hash (None for an empty tree)."""
+        return bytes(self._levels[-1]) if self._levels else None
+
+    def root_hex(self) -> str | None:
+        """Return the root hash as lowercase hex (None for an empty tree)."""
+        root = self.root()
+        return root.hex() if root is not None else None
+
+    def level(self, index: int) -> bytes | memoryview:
+        """Return the contiguous buffer of a level (0 is the leaves)."""
+        return self._levels[index]
+
+    def node(self, level: int, index: int) -> bytes:
+        """Return one node hash.
+
+        Raises:
+            IndexError: If the level or index is out of range
+        """
+        buffer = self._levels[level]
+        size = self.leaf_digest_size if level == 0 else self.digest_size
+        start = index * size
+        if index < 0 or start >= len(buffer):
+            raise IndexError(f"Node {index} out of range on level {level}")
+        return bytes(buffer[start : start + size])
+
+    def leaf_hash(self, index: int) -> bytes:
+        """Return the hash of a leaf."""
+        return self.node(0, index)
+
+    def proof(self, leaf_index: int) -> MerkleProof:
+        """Generate an inclusion proof for a leaf.
+
+        Args:
+            leaf_index: Index of the leaf
+
+        Returns:
+            The proof (same format as the Rust SDK)
+
+        Raises:
+            ValueError: If the index is out of bounds
+        """
+        if not 0 <= leaf_index < self.leaf_count:
+            raise ValueError(
+                f"Leaf index {leaf_index} out of bounds (tree has {self.leaf_count} leaves)"
+            )
+        siblings = []
+        positions: list[SiblingPosition] = []
+        index = leaf_index
+        for level, size in enumerate(level_sizes(self.leaf_count)[:-1]):
+            sibling_index = index + 1 if index % 2 == 0 else index - 1
+            if sibling_index < size:
+                siblings.append(self.node(level, sibling_index))
+            else:
+                siblings.append(self.node(level, index))  # Odd level: sibling is self
+            positions.append("left" if index % 2 else "right")
+            index //= 2
+        return MerkleProof(
+            leaf_index, self.leaf_hash(leaf_index), tuple(siblings), tuple(positions)
+        )
+
+    def multiproof(self, leaf_indices: Iterable[int]) -> MerkleMultiproof:
+        """Generate a compact proof for several leaves.
+
+        Args:
+            leaf_indices: Indices of the leaves (any order, duplicates ignored)
+
+        Returns:
+            The multiproof
+
+        Raises:
+            ValueError: If no index is given or an index is out of bounds
+        """
+        indices = sorted(set(leaf_indices))
+        if not indices:
+            raise ValueError("At least one leaf index is required")
+        if indices[0] < 0 or indices[-1] >= self.leaf_count:
+            raise ValueError(f"Leaf index out of bounds (tree has {self.leaf_count} leaves)")
+        return MerkleMultiproof(
+            leaf_count=self.leaf_count,
+            leaf_indices=tuple(indices),
+            leaf_hashes=tuple(self.leaf_hash(index) for index in indices),
+            hashes=tuple(sibling_hashes(self.node, self.leaf_count, {0: indices})),
+        )
+
+    def consistency_proof(self, old_size: int) -> ConsistencyProof:
+        """Prove that this tree extends the tree of its first ``old_size`` leaves.
+
+        Args:
+            old_size: Number of leaves in the earlier tree
+
+        Returns:
+            The consistency proof
+
+        Raises:
+            ValueError: If old_size is not between 1 and the leaf count
+        """
+        if not 0 < old_size <= self.leaf_count:
+            raise ValueError(
+                f"Old size {old_size} out of bounds (tree has {self.leaf_count} leaves)"
+            )
+        known = {height: [(old_size >> height) - 1] for height in old_peak_heights(old_size)}
+        peaks = [self.node(height, indices[0]) for height, indices in known.items()]
+        if old_size == self.leaf_count:
+            return ConsistencyProof(old_size, old_size, tuple(peaks))
+        path = sibling_hashes(self.node, self.leaf_count, known)
+        return ConsistencyProof(old_size, self.leaf_count, (*peaks, *path))
+
+    def to_model(self) -> MerkleTreeModel:
+        """Describe the tree for a stream window predicate.
+
+        Raises:
+            ValueError: If the tree is empty
+        """
+        root = self.root_hex()
+        if root is None:
+            raise ValueError("An empty Merkle tree has no root")
+        return MerkleTreeModel(
+            algorithm=self.algorithm,
+            leaf_count=self.leaf_count,
+            root=root,
+            tree_height=self.height,
+            leaf_hash_algorithm=(
+                self.leaf_algorithm if self.leaf_algorithm != self.algorithm else None
+            ),
+            leaf_encoding=self.leaf_encoding if self.leaf_encoding != "raw" else None,
+            leaf_order=self.leaf_order,
+        )
@@ -70,6 +70,8 @@ from .stream_window import (
     Chain,
     HashAlgorithm,
     Integrity,
+    LeafEncoding,
+    LeafOrder,
     MerkleTree,
     Statistics,
     Stream,
@@ -125,6 +127,8 @@ __all__ = [
     "Chain",
     "HashAlgorithm",
     "Integrity",
+    "LeafEncoding",
+    "LeafOrder",
     "MerkleTree",
     "Statistics",
     "Stream",
@@ -26,6 +26,12 @@ TimeAlignment = Literal["wall-clock", "event-time", "processing-time"]
 HashAlgorithm = Literal["sha256", "sha384", "sha512", "blake2b", "blake3"]
 """Hash algorithm for Merkle trees."""
 
+LeafOrder = Literal["arrival", "key"]
+"""Order of Merkle tree leaves: arrival order, or sorted by record key."""
+
+LeafEncoding = Literal["raw", "json-jcs", "length-prefixed"]
+"""How a record is encoded into the bytes of its Merkle leaf."""
+
 
 class Stream(BaseModel):
     """Information about the data stream."""
@@ -42,6 +48,8 @@ class Stream(BaseModel):
 class Window(BaseModel):
     """Window definition and boundaries."""
 
+    model_config = ConfigDict(populate_by_name=True)
+
     type: Annotated[WindowType, Field(description="Type of window")]
     duration: Annotated[str, Field(description="Window duration (ISO 8601 duration)")]
     slide: Annotated[
@@ -96,11 +104,39 @@ class MerkleTree(BaseModel):
             description="Height of the Merkle tree",
         ),
     ] = None
+    leaf_order: Annotated[
+        LeafOrder | None,
+        Field(
+            default=None,
+            alias="leafOrder",
+            description="Order of the leaves: arrival (default) or sorted by record key",
+        ),
+    ] = None
+    leaf_encoding: Annotated[
+        LeafEncoding | None,
+        Field(
+            default=None,
+            alias="leafEncoding",
+            description="Encoding of records into leaf bytes: raw (default), json-jcs "
+            "or length-prefixed",
+        ),
+    ] = None
+    pane_leaf_counts: Annotated[
+        list[Annotated[int, Field(ge=1)]] | None,
+        Field(
+            default=None,
+            alias="paneLeafCounts",
+            description="Record counts of the non-empty panes whose subtree roots are the "
+            "leaves of the tree (pane-composed sliding windows)",
+        ),
+    ] = None
 
 
 class Chain(BaseModel):
     """Chaining information linking to previous windows."""
 
+    model_config = ConfigDict(populate_by_name=True)
+
     previous_window_id: Annotated[
         str | None,
         Field(
@@ -148,7 +184,7 @@ class Integrity(BaseModel):
 class Statistics(BaseModel):
     """Statistical summary of window data."""
 
-    model_config = ConfigDict(extra="allow")
+    model_config = ConfigDict(extra="allow", populate_by_name=True)
 
     min_timestamp: Annotated[
         datetime | None,
@@ -200,6 +236,8 @@ class StreamCollector(BaseModel):
 class StreamMetadata(BaseModel):
     """Processing metrics for the window."""
 
+    model_config = ConfigDict(populate_by_name=True)
+
     processing_latency: Annotated[
         str | None,
         Field(
@@ -240,6 +278,8 @@ class StreamMetadata(BaseModel):
 class StreamVerification(BaseModel):
     """Verification endpoint information."""
 
+    model_config = ConfigDict(populate_by_name=True)
+
     merkle_proof_available: Annotated[
         bool | None,
         Field(
@@ -0,0 +1,19 @@
+"""Stream window attestation for Makoto.
+
+This package turns a stream of records into stream window attestations:
+``StreamWindowAttestor`` assigns records to tumbling, sliding, session
+or global windows and, as each window closes, emits its complete
+``StreamWindowPredicate`` (Merkle tree, chain link to the previous
+window, statistics) with a subject carrying the window's Merkle root.
+"""
+
+from .attestor import StreamWindowAttestor, WindowAttestation, default_window_id
+from .durations import format_duration, parse_duration
+
+__all__ = [
+    "StreamWindowAttestor",
+    "WindowAttestation",
+    "default_window_id",
+    "format_duration",
+    "parse_duration",
+]
@@ -0,0 +1,799 @@
+"""Windowing engine that turns a record stream into stream window attestations.
+
+``StreamWindowAttestor`` assigns records to windows by timestamp, folds
+each window's records into a ``MerkleAccumulator`` (O(log n) hashes per
+open window, whatever its size) and, when a window closes, emits its
+complete ``StreamWindowPredicate``: Merkle tree, chain link to the
+previous window, statistics and a subject carrying the Merkle root,
+window bounds and record count.
+
+Window types follow ``WindowType``:
+
+- ``tumbling``: fixed, non-overlapping windows of ``duration``, aligned
+  to the Unix epoch.
+- ``sliding``: windows of ``duration`` starting every ``slide``; a record
+  belongs to every window covering its timestamp and is hashed into each
+  of their trees. With ``panes``, records are hashed once, into the
+  Merkle tree of their pane (the gcd of ``duration`` and ``slide``), and
+  each window's tree is built over the roots of its panes
+  (``paneLeafCounts``), so the hashing cost per record does not grow with
+  the overlap; such roots cannot be checked with standard inclusion
+  proofs.
+- ``session``: records closer than ``gap`` to each other; a session ends
+  ``gap`` after its last record. With ``out_of_orderness`` or
+  ``allowed_lateness``, a record can arrive between two open sessions and
+  merge them; such sessions keep their leaf hashes (32 bytes per record)
+  until they close, and a merged session's leaves are those of the earlier
+  session followed by those of the later one.
+- ``global``: one window over the whole stream, closed by ``flush``.
+
+The watermark trails the latest timestamp seen by ``out_of_orderness``.
+A window closes when the watermark passes its end plus
+``allowed_lateness`` (and all of them on ``flush``); records that arrive
+after the watermark passed their window's end but within the lateness
+are still added and counted in ``metadata.lateRecords``. Records for
+windows that have already closed are dropped and counted in the next
+window's ``metadata.droppedRecords``, or, with ``late_output``, collected
+into a side-output window attested after the next windows close. Only
+open windows hold state, each O(log n) hashes, whatever the stream volume.
+Consecutive records that fall into the same windows are hashed as one
+batch, so the per-record work is a timestamp comparison and a list
+append.
+
+``process_async`` reads batches of records from an async iterator (an
+MQTT or Kafka consumer) through a bounded queue and hashes them in the
+event loop's default executor. When hashing falls behind and the queue
+is full, ingestion waits; each wait is counted in the next window's
+``metadata.backpressureEvents``, and each window reports the longest
+time one of its batches spent between ingestion and hashing as
+``metadata.processingLatency``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Any
+
+from ..attestation.statement import InTotoStatement, Subject
+from ..merkle.accumulator import MerkleAccumulator
+from ..merkle.algorithms import hash_function
+from ..merkle.encoding import leaf_encoder
+from ..models import stream_window
+from ..models.stream_window import (
+    Aggregates,
+    Chain,
+    Integrity,
+    MerkleTree,
+    Statistics,
+    Stream,
+    StreamCollector,
+    StreamMetadata,
+    StreamWindowPredicate,
+    Window,
+)
+from .durations import format_duration, parse_duration
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterable, AsyncIterator, Callable, Iterable, Iterator
+
+    from ..models.stream_window import HashAlgorithm, LeafEncoding, TimeAlignment, WindowType
+
+# Records hashed together at most, bounding the memory of pending records
+_BATCH_RECORDS = 4096
+
+# Marks the end of the batches in the ingestion queue
+_END = object()
+
+
+def _seconds(timestamp: datetime | float) -> float:
+    """Convert a record timestamp to seconds since the Unix epoch.
+
+    Naive datetimes are taken as UTC.
+    """
+    if isinstance(timestamp, datetime):
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=timezone.utc)
+        return timestamp.timestamp()
+    return float(timestamp)
+
+
+def _datetime(seconds: float) -> datetime:
+    return datetime.fromtimestamp(seconds, timezone.utc)
+
+
+def _iso(moment: datetime) -> str:
+    return moment.isoformat().replace("+00:00", "Z")
+
+
+def default_window_id(stream_id: str, start: datetime) -> str:
+    """Name a window ``stream:<stream id>:window_<start as YYYYmmdd_HHMMSS>``.
+
+    Sub-second starts get a ``_<microseconds>`` suffix.
+    """
+    window_id = f"stream:{stream_id}:window_{start:%Y%m%d_%H%M%S}"
+    return window_id + f"_{start:%f}" if start.microsecond else window_id
+
+
+@dataclass(frozen=True)
+class WindowAttestation:
+    """A closed window and its attestation.
+
+    Attributes:
+        window_id: Window ID (the subject name, and the chain link target)
+        start: Start of the window (inclusive)
+        end: End of the window (exclusive)
+        predicate: The stream window predicate
+        statement: The unsigned in-toto statement
+        late: Whether this is a side-output window of records that arrived
+            after their window closed (ID suffix ``:late``, own chain)
+    """
+
+    window_id: str
+    start: datetime
+    end: datetime
+    predicate: StreamWindowPredicate
+    statement: InTotoStatement
+    late: bool = False
+
+    @property
+    def record_count(self) -> int:
+        """Number of records in the window."""
+        return self.predicate.integrity.merkle_tree.leaf_count
+
+    @property
+    def root(self) -> str:
+        """Merkle root of the window's records (hex)."""
+        return self.predicate.integrity.merkle_tree.root
+
+
+class _OpenWindow:
+    """State of a window that has not closed yet."""
+
+    __slots__ = (
+        "start",
+        "end",
+        "accumulator",
+        "leaves",
+        "min_ts",
+        "max_ts",
+        "latency",
+        "late",
+        "root",
+    )
+
+    def __init__(self, start: float, end: float, accumulator: MerkleAccumulator | None) -> None:
+        self.start = start
+        self.end = end
+        self.accumulator = accumulator
+        # Leaf hashes of a session that may still merge with another
+        self.leaves: bytearray | None = None
+        self.min_ts = math.inf
+        self.max_ts = -math.inf
+        self.latency: float | None = None
+        self.late = 0
+        # Root of the accumulator, cached for the windows sharing a pane
+        self.root: bytes | None = None
+
+
+class _ChainState:
+    """Links each window attested to the one before it."""
+
+    __slots__ = ("previous", "length", "genesis")
+
+    def __init__(self, previous: WindowAttestation | None = None) -> None:
+        self.previous: tuple[str, str] | None = None
+        self.length = 0
+        self.genesis: str | None = None
+        if previous is not None:
+            chain = previous.predicate.integrity.chain
+            self.previous = (previous.window_id, previous.root)
+            self.length = (chain.chain_length or 1) if chain else 1
+            self.genesis = (chain.genesis_window_id if chain else None) or previous.window_id
+
+    def link(self, window_id: str, root: str) -> Chain:
+        """Return the chain entry of the next window."""
+        self.length += 1
+        if self.genesis is None:
+            self.genesis = window_id
+        previous_id, previous_root = self.previous or (None, None)
+        self.previous = (window_id, root)
+        return Chain(
+            previous_window_id=previous_id,
+            previous_merkle_root=previous_root,
+            chain_length=self.length,
+            genesis_window_id=self.genesis,
+        )
+
+
+class StreamWindowAttestor:
+    """Assign records to windows and attest each window when it closes.
+
+    Example:
+        ```python
+        attestor = StreamWindowAttestor(
+            "iot_sensors",
+            "mqtt://sensors.example.com:1883",
+            "edge-collector-01",
+            window_type="tumbling",
+            duration="PT1M",
+            timestamp=lambda message: message.timestamp,
+            value=lambda message: message.payload,
+        )
+        for window in attestor.attest(consumer):
+            signer.sign(window.statement)
+        ```
+    """
+
+    def __init__(
+        self,
+        stream_id: str,
+        stream_source: str,
+        collector_id: str,
+        *,
+        window_type: WindowType = "tumbling",
+        duration: str | timedelta | None = None,
+        slide: str | timedelta | None = None,
+        gap: str | timedelta | None = None,
+        allowed_lateness: str | timedelta | None = None,
+        out_of_orderness: str | timedelta | None = None,
+        late_output: bool = False,
+        panes: bool = False,
+        timestamp: Callable[[Any], datetime | float] | None = None,
+        value: Callable[[Any], Any] | None = None,
+        algorithm: HashAlgorithm = "sha256",
+        leaf_algorithm: HashAlgorithm | None = None,
+        encoding: LeafEncoding = "raw",
+        topic: str | None = None,
+        window_id: Callable[[str, datetime], str] = default_window_id,
+        previous: WindowAttestation | None = None,
+    ) -> None:
+        """Configure the windows.
+
+        Args:
+            stream_id: Unique identifier for the stream
+            stream_source: Source URI (mqtt://, kafka://, etc.)
+            collector_id: Unique identifier for the collector
+            window_type: Window type (tumbling, sliding, session, global)
+            duration: Window length (ISO 8601 or timedelta; tumbling and sliding)
+            slide: Interval between sliding window starts
+            gap: Inactivity that ends a session window
+            allowed_lateness: How long after the watermark passes a window's
+                end its late records are still accepted
+            out_of_orderness: How far the watermark trails the latest
+                timestamp seen (records this much out of order are not late)
+            late_output: Collect records too late for their window into
+                side-output windows instead of dropping them
+            panes: Build sliding windows' trees over pane subtrees, hashing
+                each record once (no standard inclusion proofs); by default
+                each window has one flat tree over its records, and each
+                record is hashed into every window covering it
+            timestamp: Returns a record's event time (datetime, or seconds
+                since the epoch); records are timestamped on arrival
+                (processing time) if None
+            value: Returns the data hashed for a record (default: the record)
+            algorithm: Merkle tree hash algorithm
+            leaf_algorithm: Hash algorithm of the leaves (default: algorithm)
+            encoding: Leaf encoding applied to each value before hashing
+            topic: Topic or channel name
+            window_id: Names a window from the stream ID and window start
+            previous: Last window attested before, to continue its chain
+
+        Raises:
+            ValueError: If the durations required by the window type are
+                missing or invalid, or panes are used with a separate
+                leaf_algorithm
+        """
+        self.stream_id = stream_id
+        self.stream_source = stream_source
+        self.collector_id = collector_id
+        self.topic = topic
+        self.window_type: WindowType = window_type
+        self.algorithm: HashAlgorithm = algorithm
+        self.leaf_algorithm: HashAlgorithm = leaf_algorithm or algorithm
+        self.encoding: LeafEncoding = encoding
+        self._window_id = window_id
+
+        self._duration = self._length(duration, "duration", window_type in ("tumbling", "sliding"))
+        self._slide = self._length(slide, "slide", window_type == "sliding")
+        self._gap = self._length(gap, "gap", window_type == "session")
+        self._lateness = self._length(allowed_lateness, "allowed_lateness", False, zero=True)
+        self._out_of_orderness = self._length(
+            out_of_orderness, "out_of_orderness", False, zero=True
+        )
+        self._late_output = late_output
+        # Out-of-order sessions can be bridged by a later record
+        self._merging = window_type == "session" and bool(self._lateness or self._out_of_orderness)
+        self._pane_size = 0.0
+        if window_type == "sliding" and panes:
+            # Panes split no window: window starts and ends are multiples of them
+            micros = math.gcd(round(self._duration * 1e6), round(self._slide * 1e6))
+            self._pane_size = micros / 1e6
+        if window_type == "sliding" and self._slide > self._duration:
+            raise ValueError("slide must not be longer than duration")
+        if self._pane_size and self.leaf_algorithm != algorithm:
+            # A single-record pane's root is a leaf hash, not a node hash
+            raise ValueError("panes require leaf_algorithm to match algorithm")
+        self._route: Callable[[float], tuple[list[_OpenWindow], float, float] | None] = {
+            "tumbling": self._route_tumbling,
+            "sliding": self._route_sliding,
+            "session": self._route_session,
+            "global": self._route_global,
+        }[window_type]
+
+        self._alignment: TimeAlignment = (
+            "event-time" if timestamp is not None else "processing-time"
+        )
+        if timestamp is None:
+            self._timestamp: Callable[[Any], float] = lambda record: time.time()
+        else:
+            self._timestamp = lambda record: _seconds(timestamp(record))
+        self._value = value
+        self._leaf_new = hash_function(self.leaf_algorithm)
+        self._encoder = leaf_encoder(encoding) if encoding != "raw" else None
+
+        self._windows: dict[float, _OpenWindow] = {}
+        self._panes: dict[int, _OpenWindow] = {}
+        self._late_window: _OpenWindow | None = None
+        self.watermark = -math.inf
+        # End of the latest closed window; a record before it would extend a
+        # session that was already attested
+        self._closed_until = -math.inf
+        self._dropped = 0
+        self._backpressure = 0
+        # Monotonic ingestion time of the batch being hashed (async only)
+        self._ingested: float | None = None
+
+        self._chain = _ChainState(previous)
+        self._late_chain = _ChainState()
+
+    @staticmethod
+    def _length(
+        value: str | timedelta | None, name: str, required: bool, *, zero: bool = False
+    ) -> float:
+        """Parse a window length into seconds (0 when unused)."""
+        if value is None:
+            if required:
+                raise ValueError(f"{name} is required for this window type")
+            return 0.0
+        length = parse_duration(value) if isinstance(value, str) else value
+        if length < timedelta(0) or (length == timedelta(0) and not zero):
+            raise ValueError(f"{name} must be positive")
+        return length.total_seconds()
+
+    @property
+    def open_windows(self) -> int:
+        """Number of windows currently open."""
+        return len(self._windows)
+
+    def attest(self, records: Iterable[Any]) -> Iterator[WindowAttestation]:
+        """Process a finite stream and then close every window.
+
+        Yields:
+            Each window's attestation as it closes
+        """
+        yield from self.process(records)
+        yield from self.flush()
+
+    def process(self, records: Iterable[Any]) -> Iterator[WindowAttestation]:
+        """Add records, yielding the windows they close.
+
+        Windows still open when the records run out stay open for the
+        next call (or ``flush``).
+
+        Yields:
+            Each window's attestation as it closes
+        """
+        timestamp_of = self._timestamp
+        value_of = self._value
+        values: list[Any] = []
+        targets: list[_OpenWindow] = []
+        low = high = 0.0
+        batch_min, batch_max = math.inf, -math.inf
+        for record in records:
+            ts = timestamp_of(record)
+            if not low <= ts < high or len(values) >= _BATCH_RECORDS:
+                if values:
+                    self._add(targets, values, batch_min, batch_max)
+                    self._advance(batch_max)
+                    values = []
+                    batch_min, batch_max = math.inf, -math.inf
+                    # Close before routing, so no record joins an expired window
+                    yield from self._close(self.watermark)
+                routed = self._route(ts)
+                if routed is None:
+                    self._too_late(record, ts)
+                    low = high = 0.0
+                    continue
+                targets, low, high = routed
+                yield from self._close(self.watermark)
+            values.append(value_of(record) if value_of is not None else record)
+            if ts < batch_min:
+                batch_min = ts
+            if ts > batch_max:
+                batch_max = ts
+        if values:
+            self._add(targets, values, batch_min, batch_max)
+            self._advance(batch_max)
+        yield from self._close(self.watermark)
+
+    async def attest_async(
+        self, batches: AsyncIterable[Iterable[Any]], *, queue_size: int = 16
+    ) -> AsyncIterator[WindowAttestation]:
+        """Process a finite async stream of batches and then close every window.
+
+        Yields:
+            Each window's attestation as it closes
+        """
+        async for window in self.process_async(batches, queue_size=queue_size):
+            yield window
+        for window in self.flush():
+            yield window
+
+    async def process_async(
+        self, batches: AsyncIterable[Iterable[Any]], *, queue_size: int = 16
+    ) -> AsyncIterator[WindowAttestation]:
+        """Add batches of records from an async iterator, yielding closed windows.
+
+        A task reads the batches into a queue of at most ``queue_size``
+        batches while they are hashed, one at a time, in the default
+        executor. When the queue is full the task waits for hashing to
+        catch up, and the wait is counted as a backpressure event.
+
+        Args:
+            batches: Async iterator of record batches
+            queue_size: Maximum number of batches waiting to be hashed
+
+        Yields:
+            Each window's attestation as it closes
+
+        Raises:
+            ValueError: If queue_size is less than 1
+        """
+        if queue_size < 1:
+            raise ValueError("queue_size must be at least 1")
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue[Any] = asyncio.Queue(queue_size)
+
+        async def ingest() -> None:
+            async for batch in batches:
+                item = (batch, time.monotonic(), queue.full())
+                await queue.put(item)
+            await queue.put(_END)
+
+        ingestion = asyncio.create_task(ingest())
+        try:
+            while True:
+                item = await self._next_batch(queue, ingestion)
+                if item is _END:
+                    break
+                batch, self._ingested, pressured = item
+                self._backpressure += pressured
+                closed = await loop.run_in_executor(None, self._process_list, batch)
+                for window in closed:
+                    yield window
+        finally:
+            self._ingested = None
+            ingestion.cancel()
+            await asyncio.gather(ingestion, return_exceptions=True)
+
+    @staticmethod
+    async def _next_batch(queue: asyncio.Queue[Any], ingestion: asyncio.Task[None]) -> Any:
+        """Wait for the next queued batch, or raise the error that ended ingestion."""
+        getting = asyncio.ensure_future(queue.get())
+        try:
+            if not ingestion.done():
+                await asyncio.wait((getting, ingestion), return_when=asyncio.FIRST_COMPLETED)
+            error = ingestion.exception() if ingestion.done() and not getting.done() else None
+            if error is not None:
+                raise error
+            return await getting
+        finally:
+            getting.cancel()
+
+    def _process_list(self, records: Iterable[Any]) -> list[WindowAttestation]:
+        return list(self.process(records))
+
+    def flush(self) -> list[WindowAttestation]:
+        """Close every open window.
+
+        Returns:
+            The attestations of the windows, in order of their end
+        """
+        return list(self._close(math.inf))
+
+    def _add(self, targets: list[_OpenWindow], values: list[Any], low: float, high: float) -> None:
+        """Hash a batch of values once and add the leaves to their windows."""
+        new = self._leaf_new
+        encoded = values if self._encoder is None else self._encoder.encode_batch(values)
+        leaves = b"".join([new(value).digest() for value in encoded])
+        for window in targets:
+            if window.accumulator is not None:
+                window.accumulator.extend_leaf_hashes(leaves)
+                window.root = None
+            elif window.leaves is not None:
+                window.leaves += leaves
+            if window.end <= self.watermark:
+                window.late += len(values)
+            if low < window.min_ts:
+                window.min_ts = low
+            if high > window.max_ts:
+                window.max_ts = high
+                if self.window_type == "session":
+                    window.end = high + self._gap
+        if self._ingested is not None:
+            latency = time.monotonic() - self._ingested
+            for window in targets:
+                if window.latency is None or latency > window.latency:
+                    window.latency = latency
+
+    def _too_late(self, record: Any, ts: float) -> None:
+        """Drop a record whose windows have closed, or add it to the side output."""
+        if not self._late_output:
+            self._dropped += 1
+            return
+        window = self._late_window
+        accumulator = window.accumulator if window is not None else None
+        if window is None or accumulator is None:
+            accumulator = self._accumulator()
+            window = self._late_window = _OpenWindow(ts, math.inf, accumulator)
+        accumulator.append(self._value(record) if self._value is not None else record)
+        window.late += 1
+        window.min_ts = min(window.min_ts, ts)
+        window.max_ts = max(window.max_ts, ts)
+
+    def _window(self, start: float, end: float) -> _OpenWindow:
+        """Return the open window starting at ``start``, creating it if needed."""
+        window = self._windows.get(start)
+        if window is None:
+            accumulator = None if self._pane_size or self._merging else self._accumulator()
+            window = self._windows[start] = _OpenWindow(start, end, accumulator)
+            if self._merging:
+                window.leaves = bytearray()
+        return window
+
+    def _accumulator(self) -> MerkleAccumulator:
+        return MerkleAccumulator(
+            self.algorithm, leaf_algorithm=self.leaf_algorithm, encoding=self.encoding
+        )
+
+    def _advance(self, ts: float) -> None:
+        """Move the watermark up to ``out_of_orderness`` behind an event time."""
+        watermark = ts - self._out_of_orderness
+        if watermark > self.watermark:
+            self.watermark = watermark
+
+    def _route_tumbling(self, ts: float) -> tuple[list[_OpenWindow], float, float] | None:
+        duration = self._duration
+        start = math.floor(ts / duration) * duration
+        end = start + duration
+        if end + self._lateness <= self.watermark:
+            return None
+        self._advance(ts)
+        return [self._window(start, end)], start, end
+
+    def _route_sliding(self, ts: float) -> tuple[list[_OpenWindow], float, float] | None:
+        duration, slide = self._duration, self._slide
+        latest = math.floor(ts / slide) * slide
+        low, high = latest, latest + slide
+        targets = []
+        start = latest
+        while start + duration > ts:
+            end = start + duration
+            high = min(high, end)
+            if end + self._lateness > self.watermark:
+                targets.append(self._window(start, end))
+            start -= slide
+        # The next older window ended at or before ts
+        low = max(low, start + duration)
+        if not targets:
+            return None
+        self._advance(ts)
+        targets.reverse()
+        if self._pane_size:
+            # Hash into the pane; the windows only keep statistics
+            index = math.floor(ts / self._pane_size)
+            pane = self._panes.get(index)
+            low = index * self._pane_size
+            if pane is None:
+                pane = self._panes[index] = _OpenWindow(low, latest + duration, self._accumulator())
+            return [pane, *targets], low, low + self._pane_size
+        return targets, low, high
+
+    def _route_session(self, ts: float) -> tuple[list[_OpenWindow], float, float] | None:
+        gap = self._gap
+        if ts < self._closed_until:
+            return None
+        # Several sessions are open only while earlier ones wait for late records
+        matched = [s for s in self._windows.values() if s.min_ts - gap < ts < s.max_ts + gap]
+        if not matched:
+            if ts + gap + self._lateness <= self.watermark:
+                return None
+            session = self._window(ts, ts + gap)
+        else:
+            session = self._merge(matched) if len(matched) > 1 else matched[0]
+        self._advance(ts)
+        low = max(min(ts, session.min_ts), self._closed_until)
+        high = max(ts, session.max_ts) + gap
+        # Records that would bridge to another session are routed one by one
+        for other in self._windows.values():
+            if other is session:
+                continue
+            if other.min_ts > ts:
+                high = min(high, other.min_ts - gap)
+            else:
+                low = max(low, other.max_ts + gap)
+        return [session], low, high
+
+    def _merge(self, sessions: list[_OpenWindow]) -> _OpenWindow:
+        """Merge sessions bridged by a record into the earliest of them."""
+        sessions.sort(key=lambda session: session.min_ts)
+        merged, *rest = sessions
+        for session in rest:
+            del self._windows[session.start]
+            if merged.leaves is not None and session.leaves is not None:
+                merged.leaves += session.leaves
+            merged.min_ts = min(merged.min_ts, session.min_ts)
+            merged.max_ts = max(merged.max_ts, session.max_ts)
+            merged.late += session.late
+            if session.latency is not None and (
+                merged.latency is None or session.latency > merged.latency
+            ):
+                merged.latency = session.latency
+        merged.end = merged.max_ts + self._gap
+        return merged
+
+    def _route_global(self, ts: float) -> tuple[list[_OpenWindow], float, float] | None:
+        self._advance(ts)
+        return [self._window(-math.inf, math.inf)], -math.inf, math.inf
+
+    def _close(self, watermark: float) -> Iterator[WindowAttestation]:
+        """Attest and forget the windows whose lateness has passed the watermark.
+
+        The side-output window, if it has records, follows the windows closed.
+        """
+        lateness = self._lateness
+        closed = [w for w in self._windows.values() if w.end + lateness <= watermark]
+        closed.sort(key=lambda window: (window.end, window.start))
+        window_id = None
+        for window in closed:
+            del self._windows[window.start]
+            self._closed_until = max(self._closed_until, window.end)
+            start, end = self._bounds(window)
+            window_id = self._window_id(self.stream_id, _datetime(start))
+            yield self._attest(window, window_id, start, end, self._chain)
+        # A pane is forgotten with the last window covering it
+        for index in [i for i, pane in self._panes.items() if pane.end + lateness <= watermark]:
+            del self._panes[index]
+        late = self._late_window
+        if late is not None and (closed or watermark == math.inf):
+            self._late_window = None
+            if window_id is None:
+                window_id = self._window_id(self.stream_id, _datetime(late.min_ts))
+            yield self._attest(
+                late, f"{window_id}:late", late.min_ts, late.max_ts, self._late_chain
+            )
+
+    def _tree(self, window: _OpenWindow) -> MerkleTree:
+        """Describe the Merkle tree of a window, composing it from its panes."""
+        if window.accumulator is not None:
+            return window.accumulator.to_model()
+        if window.leaves is not None:
+            accumulator = self._accumulator()
+            accumulator.extend_leaf_hashes(bytes(window.leaves))
+            return accumulator.to_model()
+        size = self._pane_size
+        panes = [
+            pane
+            for index in range(round(window.start / size), round(window.end / size))
+            if (pane := self._panes.get(index)) is not None
+        ]
+        accumulators = [pane.accumulator for pane in panes if pane.accumulator is not None]
+        for pane, accumulator in zip(panes, accumulators, strict=True):
+            if pane.root is None:
+                pane.root = accumulator.root()
+        composed = MerkleAccumulator(self.algorithm)
+        composed.extend_leaf_hashes(b"".join(pane.root or b"" for pane in panes))
+        return (
+            accumulators[0]
+            .to_model()
+            .model_copy(
+                update={
+                    "leaf_count": sum(acc.count for acc in accumulators),
+                    "root": composed.root_hex(),
+                    # The pane roots are the leaves of the composed tree
+                    "tree_height": composed.tree_height
+                    + max(acc.tree_height for acc in accumulators)
+                    - 1,
+                    "pane_leaf_counts": [acc.count for acc in accumulators],
+                }
+            )
+        )
+
+    def _bounds(self, window: _OpenWindow) -> tuple[float, float]:
+        """Return the reported start and end of a window."""
+        if self.window_type == "session":
+            return window.min_ts, window.max_ts + self._gap
+        if self.window_type == "global":
+            return window.min_ts, window.max_ts
+        return window.start, window.end
+
+    def _metadata(self, window: _OpenWindow) -> StreamMetadata | None:
+        """Return the processing metrics of a window, if there are any."""
+        dropped, pressure, latency = self._dropped, self._backpressure, window.latency
+        if not dropped and not pressure and latency is None and not window.late:
+            return None
+        return StreamMetadata(
+            processing_latency=(
+                format_duration(timedelta(seconds=latency)) if latency is not None else None
+            ),
+            late_records=window.late or None,
+            dropped_records=dropped or None,
+            backpressure_events=pressure if latency is not None else None,
+        )
+
+    def _attest(
+        self,
+        window: _OpenWindow,
+        window_id: str,
+        start_ts: float,
+        end_ts: float,
+        chain_state: _ChainState,
+    ) -> WindowAttestation:
+        """Build the attestation of a closed window."""
+        start, end = _datetime(start_ts), _datetime(end_ts)
+        merkle_tree = self._tree(window)
+        count = merkle_tree.leaf_count
+        chain = chain_state.link(window_id, merkle_tree.root)
+
+        late = chain_state is self._late_chain
+        window_type: WindowType = "global" if late else self.window_type
+        length = self._duration if window_type in ("tumbling", "sliding") else 0.0
+        predicate = StreamWindowPredicate(
+            stream=Stream(id=self.stream_id, source=self.stream_source, topic=self.topic),
+            window=Window(
+                type=window_type,
+                duration=format_duration(timedelta(seconds=length or end_ts - start_ts)),
+                slide=(
+                    format_duration(timedelta(seconds=self._slide))
+                    if window_type == "sliding"
+                    else None
+                ),
+                alignment=self._alignment,
+                watermark=_datetime(self.watermark) if math.isfinite(self.watermark) else None,
+                allowed_lateness=(
+                    format_duration(timedelta(seconds=self._lateness)) if self._lateness else None
+                ),
+            ),
+            integrity=Integrity(merkle_tree=merkle_tree, chain=chain),
+            collector=StreamCollector(id=self.collector_id),
+            aggregates=Aggregates(
+                statistics=Statistics(
+                    min_timestamp=_datetime(window.min_ts),
+                    max_timestamp=_datetime(window.max_ts),
+                    avg_interval_ms=(
+                        (window.max_ts - window.min_ts) * 1000 / (count - 1) if count > 1 else None
+                    ),
+                )
+            ),
+            metadata=self._metadata(window),
+        )
+        self._dropped = self._backpressure = 0
+        subject = Subject.from_digests(
+            window_id,
+            {
+                "merkleRoot": merkle_tree.root,
+                "windowStart": _iso(start),
+                "windowEnd": _iso(end),
+                "recordCount": str(count),
+            },
+        )
+        statement = InTotoStatement(
+            subjects=[subject],
+            predicate_type=stream_window.PREDICATE_TYPE,
+            predicate=predicate.model_dump(by_alias=True, exclude_none=True),
+        )
+        return WindowAttestation(window_id, start, end, predicate, statement, late=late)
@@ -0,0 +1,59 @@
+"""ISO 8601 durations, as used by ``Window.duration`` and ``Window.slide``."""
+
+from __future__ import annotations
+
+import re
+from datetime import timedelta
+
+# Years and months have no fixed length, so window durations use days and below
+_DURATION = re.compile(
+    r"P(?:(?P<weeks>\d+(?:\.\d+)?)W)?(?:(?P<days>\d+(?:\.\d+)?)D)?"
+    r"(?:T(?:(?P<hours>\d+(?:\.\d+)?)H)?(?:(?P<minutes>\d+(?:\.\d+)?)M)?"
+    r"(?:(?P<seconds>\d+(?:\.\d+)?)S)?)?"
+)
+
+
+def parse_duration(text: str) -> timedelta:
+    """Parse an ISO 8601 duration such as ``PT1M`` or ``P1DT12H``.
+
+    Args:
+        text: Duration using weeks, days, hours, minutes and seconds
+
+    Returns:
+        The duration
+
+    Raises:
+        ValueError: If the text is not such a duration (years and months,
+            which have no fixed length, are rejected)
+    """
+    match = _DURATION.fullmatch(text.strip().upper())
+    if match is None or text.strip().upper() in ("P", "PT") or text.strip().endswith("T"):
+        raise ValueError(f"Invalid ISO 8601 duration: {text!r}")
+    parts = {name: float(value) for name, value in match.groupdict().items() if value}
+    return timedelta(**parts)
+
+
+def format_duration(duration: timedelta) -> str:
+    """Format a duration as ISO 8601 (e.g. ``PT1M``, ``P1DT12H``, ``PT0.5S``).
+
+    Raises:
+        ValueError: If the duration is negative
+    """
+    if duration < timedelta(0):
+        raise ValueError("Durations must not be negative")
+    days = duration.days
+    seconds = duration.seconds
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    text = f"P{days}D" if days else "P"
+    time = ""
+    if hours:
+        time += f"{hours}H"
+    if minutes:
+        time += f"{minutes}M"
+    if seconds or duration.microseconds:
+        fraction = f"{duration.microseconds:06d}".rstrip("0")
+        time += f"{seconds}.{fraction}S" if fraction else f"{seconds}S"
+    if time:
+        text += "T" + time
+    return text if text != "P" else "PT0S"
@@ -1,11 +1,13 @@
 """Tests for attestation builder and verifier."""
 
+import asyncio
 import tempfile
 from pathlib import Path
 
 import pytest
 
 from makoto import AttestationBuilder, AttestationVerifier, InTotoStatement, Subject
+from makoto.hashing import chunked_digest
 from makoto.models import origin, stream_window, transform
 
 
@@ -24,6 +26,11 @@ class TestSubject:
         assert restored.name == subject.name
         assert restored.digest.sha256 == subject.digest.sha256
 
+    def test_from_digests(self) -> None:
+        subject = Subject.from_digests("test.csv", {"sha512": "c" * 128, "blake2b": "d" * 128})
+        data = subject.model_dump(by_alias=True, exclude_none=True)
+        assert data["digest"] == {"sha512": "c" * 128, "blake2b": "d" * 128}
+
 
 class TestInTotoStatement:
     """Tests for InTotoStatement class."""
@@ -137,6 +144,158 @@ class TestAttestationBuilder:
         finally:
             Path(temp_path).unlink()
 
+    def test_with_subject_files_preserves_order(self, tmp_path: Path) -> None:
+        import hashlib
+
+        contents = [f"file {i}".encode() * (i + 1) for i in range(20)]
+        paths = []
+        for i, data in enumerate(contents):
+            path = tmp_path / f"part-{i:03d}.parquet"
+            path.write_bytes(data)
+            paths.append(path)
+
+        statement = (
+            AttestationBuilder()
+            .origin(source="test", collector_id="test")
+            .with_subject_files(reversed(paths), workers=4)
+            .build()
+        )
+        assert [s.name for s in statement.subjects] == [p.name for p in reversed(paths)]
+        assert [s.digest.sha256 for s in statement.subjects] == [
+            hashlib.sha256(data).hexdigest() for data in reversed(contents)
+        ]
+
+    def test_with_subject_directory(self, tmp_path: Path) -> None:
+        import hashlib
+
+        root = tmp_path / "table"
+        (root / "date=2025-01-01").mkdir(parents=True)
+        (root / "date=2025-01-01" / "part-0.parquet").write_bytes(b"rows")
+        (root / "_SUCCESS").write_bytes(b"")
+
+        manifest = (
+            AttestationBuilder()
+            .origin(source="test", collector_id="test")
+            .with_subject_directory(root)
+            .build()
+        )
+        assert [s.name for s in manifest.subjects] == ["table"]
+        assert (manifest.subjects[0].digest.model_extra or {})["dirHash"].startswith("h1:")
+
+        per_file = (
+            AttestationBuilder()
+            .origin(source="test", collector_id="test")
+            .with_subject_directory(root, mode="files", include=["*.parquet"])
+            .build()
+        )
+        assert [s.name for s in per_file.subjects] == ["table/date=2025-01-01/part-0.parquet"]
+        assert per_file.subjects[0].digest.sha256 == hashlib.sha256(b"rows").hexdigest()
+
+    def test_hashing_writer_and_reader(self, tmp_path: Path) -> None:
+        import hashlib
+        import io
+
+        builder = AttestationBuilder().origin(source="test", collector_id="test")
+        path = tmp_path / "upload.csv"
+        with open(path, "wb") as f, builder.hashing_writer("upload.csv", f) as writer:
+            for i in range(10):
+                writer.write(f"row {i}\n".encode())
+        with builder.hashing_reader("download.csv", io.BytesIO(b"a,b\n")) as reader:
+            reader.read()
+        for chunk in builder.hashing_iter("generated.csv", [b"x", b"y"]):
+            assert chunk
+        statement = builder.build()
+
+        assert [s.name for s in statement.subjects] == [
+            "upload.csv",
+            "download.csv",
+            "generated.csv",
+        ]
+        assert statement.subjects[0].digest.sha256 == hashlib.sha256(path.read_bytes()).hexdigest()
+        assert statement.subjects[1].digest.sha256 == hashlib.sha256(b"a,b\n").hexdigest()
+        assert statement.subjects[2].digest.sha256 == hashlib.sha256(b"xy").hexdigest()
+
+    def test_with_subject_data_buffers(self) -> None:
+        import array
+        import hashlib
+
+        samples = array.array("f", [0.5] * 256)
+        statement = (
+            AttestationBuilder()
+            .origin(source="test", collector_id="test")
+            .with_subject_data("samples.bin", memoryview(samples), algorithms=("sha256", "sha512"))
+            .with_subject_data("parts.bin", [b"head", samples])
+            .build()
+        )
+        assert statement.subjects[0].digest.sha512 == hashlib.sha512(samples.tobytes()).hexdigest()
+        assert (
+            statement.subjects[1].digest.sha256
+            == hashlib.sha256(b"head" + samples.tobytes()).hexdigest()
+        )
+
+    def test_with_subject_file_multiple_algorithms(self, tmp_path: Path) -> None:
+        import hashlib
+
+        path = tmp_path / "data.csv"
+        path.write_bytes(b"test data")
+        statement = (
+            AttestationBuilder()
+            .origin(source="test", collector_id="test")
+            .with_subject_file(path, algorithms=("sha256", "sha512", "blake2b"))
+            .build()
+        )
+        digest = statement.model_dump(by_alias=True, exclude_none=True)["subject"][0]["digest"]
+        assert digest == {
+            "sha256": hashlib.sha256(b"test data").hexdigest(),
+            "sha512": hashlib.sha512(b"test data").hexdigest(),
+            "blake2b": hashlib.blake2b(b"test data").hexdigest(),
+        }
+
+    def test_with_subject_files_async(self, tmp_path: Path) -> None:
+        import hashlib
+
+        paths = []
+        for i in range(6):
+            path = tmp_path / f"upload-{i}.bin"
+            path.write_bytes(bytes([i]) * 5000)
+            paths.append(path)
+
+        async def main() -> AttestationBuilder:
+            builder = AttestationBuilder().origin(source="test", collector_id="test")
+            await builder.with_subject_files_async(paths, concurrency=2)
+            return await builder.with_subject_file_async(paths[0], name="again")
+
+        statement = asyncio.run(main()).build()
+        assert [s.name for s in statement.subjects] == [p.name for p in paths] + ["again"]
+        assert statement.subjects[3].digest.sha256 == hashlib.sha256(b"\x03" * 5000).hexdigest()
+
+    def test_with_input_files(self, tmp_path: Path) -> None:
+        import hashlib
+
+        paths = []
+        for i in range(3):
+            path = tmp_path / f"input-{i}.csv"
+            path.write_bytes(f"input {i}".encode())
+            paths.append(path)
+
+        statement = (
+            AttestationBuilder()
+            .transform(transform_type="test", transform_name="Test", executor_id="test")
+            .with_input_files(paths, workers=2, makoto_level="L1")
+            .with_subject("output", "a" * 64)
+            .build()
+        )
+        inputs = statement.predicate["inputs"]
+        assert [inp["name"] for inp in inputs] == ["input-0.csv", "input-1.csv", "input-2.csv"]
+        assert inputs[2]["digest"]["sha256"] == hashlib.sha256(b"input 2").hexdigest()
+        assert inputs[0]["makotoLevel"] == "L1"
+
+    def test_with_input_files_on_non_transform_raises(self) -> None:
+        builder = AttestationBuilder()
+        builder.origin(source="test", collector_id="test")
+        with pytest.raises(ValueError, match="can only be used with transform"):
+            builder.with_input_files([])
+
     def test_build_without_predicate_raises(self) -> None:
         builder = AttestationBuilder()
         builder.with_subject("test", "a" * 64)
@@ -283,6 +442,270 @@ class TestAttestationVerifier:
         finally:
             Path(temp_path).unlink()
 
+    def test_verify_with_files_checks_every_digest(self, tmp_path: Path) -> None:
+        import hashlib
+
+        path = tmp_path / "data.csv"
+        path.write_bytes(b"test data")
+        predicate = {
+            "origin": {"source": "test", "collectionTimestamp": "2025-01-01T00:00:00Z"},
+            "collector": {"id": "test"},
+        }
+        good = InTotoStatement(
+            subjects=[
+                Subject.from_digests(
+                    "data.csv",
+                    {
+                        "sha256": hashlib.sha256(b"test data").hexdigest(),
+                        "sha512": hashlib.sha512(b"test data").hexdigest(),
+                    },
+                )
+            ],
+            predicate_type=origin.PREDICATE_TYPE,
+            predicate=predicate,
+        )
+        bad = InTotoStatement(
+            subjects=[
+                Subject.from_digests(
+                    "data.csv",
+                    {"sha256": hashlib.sha256(b"test data").hexdigest(), "sha512": "0" * 128},
+                )
+            ],
+            predicate_type=origin.PREDICATE_TYPE,
+            predicate=predicate,
+        )
+
+        verifier = AttestationVerifier()
+        assert verifier.verify_with_files(good, files={"data.csv": path}).all_subjects_verified
+        result = verifier.verify_with_files(bad, files={"data.csv": path})
+        assert not result.valid
+        assert any("Hash mismatch for data.csv (sha512)" in e for e in result.errors)
+
+    def test_verify_with_files_uses_digest_cache(self, tmp_path: Path) -> None:
+        import hashlib
+
+        from makoto.hashing import DigestCache, file_identity
+
+        path = tmp_path / "data.csv"
+        path.write_bytes(b"test data")
+        with DigestCache(":memory:") as cache:
+            statement = (
+                AttestationBuilder(digest_cache=cache)
+                .origin(source="test", collector_id="test")
+                .with_subject_file(path)
+                .build()
+            )
+            assert len(cache) == 1
+
+            # Poison the cache: a cached verify trusts it, a rehash does not
+            cache.put(file_identity(path.stat()), {"sha256": "0" * 64})
+            verifier = AttestationVerifier(digest_cache=cache)
+            assert not verifier.verify_with_files(statement, files={"data.csv": path}).valid
+            result = verifier.verify_with_files(statement, files={"data.csv": path}, rehash=True)
+            assert result.valid
+            assert cache.get(file_identity(path.stat()), ["sha256"]) == {
+                "sha256": hashlib.sha256(b"test data").hexdigest()
+            }
+
+    def test_chunked_merkle_digest_round_trip(self, tmp_path: Path) -> None:
+        import os
+
+        path = tmp_path / "large.bin"
+        path.write_bytes(os.urandom(200_000))
+        statement = (
+            AttestationBuilder()
+            .origin(source="test", collector_id="test")
+            .with_subject_file(path, algorithms=(), merkle_chunk_size=16384, workers=4)
+            .build()
+        )
+        digest = statement.model_dump(by_alias=True, exclude_none=True)["subject"][0]["digest"]
+        assert set(digest) == {"merkleRoot", "merkleChunkSize", "merkleChunkCount"}
+
+        verifier = AttestationVerifier()
+        restored = InTotoStatement.from_json(statement.to_json())
+        assert verifier.verify_with_files(restored, files={"large.bin": path}).all_subjects_verified
+
+        with open(path, "r+b") as f:
+            f.seek(100_000)
+            f.write(b"tampered")
+        result = verifier.verify_with_files(restored, files={"large.bin": path})
+        assert not result.valid
+        assert any("(merkleRoot)" in e for e in result.errors)
+
+    def test_chunked_merkle_digest_binds_chunk_count(self, tmp_path: Path) -> None:
+        # A|B|C and A|B|C|C share a root: the odd last node is paired with itself
+        chunks = [bytes([i]) * 1024 for i in range(3)]
+        original = tmp_path / "original.bin"
+        original.write_bytes(b"".join(chunks))
+        repeated = tmp_path / "repeated.bin"
+        repeated.write_bytes(b"".join([*chunks, chunks[-1]]))
+        assert (
+            chunked_digest(original, chunk_size=1024).root
+            == chunked_digest(repeated, chunk_size=1024).root
+        )
+
+        statement = (
+            AttestationBuilder()
+            .origin(source="test", collector_id="test")
+            .with_subject_file(original, name="data.bin", algorithms=(), merkle_chunk_size=1024)
+            .build()
+        )
+        verifier = AttestationVerifier()
+        assert verifier.verify_with_files(statement, files={"data.bin": original}).valid
+        result = verifier.verify_with_files(statement, files={"data.bin": repeated})
+        assert not result.valid
+        assert any("Chunk count mismatch" in e for e in result.errors)
+
+    def test_subject_with_only_another_digest_is_valid(self) -> None:
+        statement = InTotoStatement(
+            subjects=[Subject.from_digests("data.bin", {"sha512": "a" * 128})],
+            predicate_type="https://example.com/unknown/v1",
+            predicate={},
+        )
+        assert AttestationVerifier().verify(statement).valid
+
+    def test_directory_round_trip(self, tmp_path: Path) -> None:
+        root = tmp_path / "dataset"
+        (root / "a").mkdir(parents=True)
+        (root / "a" / "x.csv").write_bytes(b"x")
+        (root / "y.csv").write_bytes(b"y")
+        statement = (
+            AttestationBuilder()
+            .origin(source="test", collector_id="test")
+            .with_subject_directory(root, workers=2)
+            .build()
+        )
+        verifier = AttestationVerifier()
+        restored = InTotoStatement.from_json(statement.to_json())
+        assert verifier.verify(restored).valid
+        assert verifier.verify_with_files(restored, files={"dataset": root}).all_subjects_verified
+
+        (root / "a" / "z.csv").write_bytes(b"added")
+        result = verifier.verify_with_files(restored, files={"dataset": root})
+        assert not result.valid
+        assert any("(dirHash)" in e for e in result.errors)
+
+    def test_filtered_directory_round_trip(self, tmp_path: Path) -> None:
+        root = tmp_path / "dataset"
+        (root / "a").mkdir(parents=True)
+        (root / "a" / "x.csv").write_bytes(b"x")
+        (root / "a" / "_SUCCESS").write_bytes(b"")
+        (root / "y.json").write_bytes(b"y")
+        statement = (
+            AttestationBuilder()
+            .origin(source="test", collector_id="test")
+            .with_subject_directory(root, include=["*.csv", "*.json"], exclude=["y.*"])
+            .build()
+        )
+        digest = statement.subjects[0].digest.model_extra or {}
+        assert (digest["dirInclude"], digest["dirExclude"]) == ('["*.csv", "*.json"]', '["y.*"]')
+        verifier = AttestationVerifier()
+        restored = InTotoStatement.from_json(statement.to_json())
+        assert verifier.verify_with_files(restored, files={"dataset": root}).all_subjects_verified
+
+        (root / "y.json").write_bytes(b"excluded")
+        assert verifier.verify_with_files(restored, files={"dataset": root}).valid
+        (root / "a" / "x.csv").write_bytes(b"changed")
+        assert not verifier.verify_with_files(restored, files={"dataset": root}).valid
+
+        tampered = Subject.from_digests("dataset", {**digest, "dirInclude": "*.csv"})
+        restored.subjects[0] = tampered
+        result = verifier.verify_with_files(restored, files={"dataset": root})
+        assert any("dirInclude must be a JSON array" in e for e in result.errors)
+
+    def test_unknown_directory_mode_is_rejected_before_hashing(self, tmp_path: Path) -> None:
+        builder = AttestationBuilder().origin(source="test", collector_id="test")
+        with pytest.raises(ValueError, match="Unknown directory subject mode"):
+            builder.with_subject_directory(tmp_path / "missing", mode="tree")  # type: ignore[arg-type]
+
+    def test_append_only_file(self, tmp_path: Path) -> None:
+        import os
+
+        log = tmp_path / "app.log"
+        state = tmp_path / "app.state"
+        log.write_bytes(os.urandom(5000))
+
+        def attest() -> InTotoStatement:
+            return (
+                AttestationBuilder()
+                .origin(source="test", collector_id="test")
+                .with_subject_appending_file(log, state, chunk_size=1024)
+                .build()
+            )
+
+        first = attest()
+        with open(log, "ab") as f:
+            f.write(os.urandom(3000))
+        second = attest()
+        assert (second.subjects[0].digest.model_extra or {})["merkleSize"] == "8000"
+
+        verifier = AttestationVerifier()
+        with open(log, "ab") as f:
+            f.write(b"still growing")
+        # Append-mode digests verify against the attested prefix
+        assert verifier.verify_with_files(first, files={"app.log": log}).all_subjects_verified
+        result = verifier.verify_append_only(first, second, files={"app.log": log})
+        assert result.valid, result.errors
+        assert result.subjects_verified == 1
+
+        with open(log, "r+b") as f:
+            f.write(b"rewritten")
+        result = verifier.verify_append_only(first, second, files={"app.log": log})
+        assert not result.valid
+        assert any("attested prefix" in e for e in result.errors)
+
+    def test_append_only_shrink_detected_without_files(self) -> None:
+        def statement(root: str, size: int) -> InTotoStatement:
+            digests = {"merkleRoot": root, "merkleChunkSize": "1024", "merkleSize": str(size)}
+            return InTotoStatement(
+                subjects=[Subject.from_digests("app.log", digests)],
+                predicate_type=origin.PREDICATE_TYPE,
+                predicate={},
+            )
+
+        verifier = AttestationVerifier()
+        result = verifier.verify_append_only(statement("a" * 64, 2000), statement("b" * 64, 1000))
+        assert not result.valid
+        assert any("shrank" in e for e in result.errors)
+        assert verifier.verify_append_only(
+            statement("a" * 64, 1000), statement("b" * 64, 2000)
+        ).valid
+
+    def test_merkle_root_without_chunk_size_fails(self, tmp_path: Path) -> None:
+        path = tmp_path / "data.bin"
+        path.write_bytes(b"data")
+        statement = InTotoStatement(
+            subjects=[Subject.from_digests("data.bin", {"merkleRoot": "a" * 64})],
+            predicate_type="https://example.com/unknown/v1",
+            predicate={},
+        )
+        result = AttestationVerifier().verify_with_files(statement, files={"data.bin": path})
+        assert any("merkleChunkSize" in e for e in result.errors)
+
+    def test_verify_with_files_async(self, tmp_path: Path) -> None:
+        good = tmp_path / "good.csv"
+        good.write_bytes(b"good")
+        bad = tmp_path / "bad.csv"
+        bad.write_bytes(b"bad")
+        statement = (
+            AttestationBuilder()
+            .origin(source="test", collector_id="test")
+            .with_subject_files([good, bad])
+            .build()
+        )
+        bad.write_bytes(b"tampered")
+
+        result = asyncio.run(
+            AttestationVerifier().verify_with_files_async(
+                statement,
+                files={"good.csv": good, "bad.csv": bad, "missing.csv": tmp_path / "nope"},
+                concurrency=2,
+            )
+        )
+        assert not result.valid
+        assert result.subjects_verified == 1
+        assert any("Hash mismatch for bad.csv" in e for e in result.errors)
+
     def test_verify_unknown_predicate_type_warns(self) -> None:
         statement = InTotoStatement(
             subjects=[Subject.from_file("test.csv", "a" * 64)],
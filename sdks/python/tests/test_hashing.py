@@ -0,0 +1,586 @@
+"""Tests for the hashing engine."""
+
+import asyncio
+import hashlib
+import os
+import threading
+from pathlib import Path
+
+import pytest
+
+from makoto.hashing import (
+    AppendState,
+    DigestCache,
+    HashingCancelledError,
+    HashingReader,
+    HashingWriter,
+    append_digest,
+    buffer_blocks,
+    buffer_size_for,
+    chunk_hashes,
+    chunked_digest,
+    digest_buffer,
+    digest_directory,
+    digest_file,
+    digest_files,
+    dir_hash,
+    file_identity,
+    hash_file,
+    hashing_iter,
+    map_concurrently,
+    prefix_roots,
+    read_blocks,
+    run_hashing,
+    walk_directory,
+)
+from makoto.hashing.files import MAX_BUFFER_SIZE, MIN_BUFFER_SIZE
+
+
+@pytest.fixture
+def data_file(tmp_path: Path) -> Path:
+    path = tmp_path / "data.bin"
+    path.write_bytes(os.urandom(300_000))
+    return path
+
+
+class TestBufferSize:
+    """Tests for adaptive buffer sizing."""
+
+    def test_bounds(self) -> None:
+        assert buffer_size_for(0) == MIN_BUFFER_SIZE
+        assert buffer_size_for(10 * 1024**3) == MAX_BUFFER_SIZE
+
+    def test_page_aligned(self) -> None:
+        import mmap
+
+        for size in (1, 1_000_001, 123_456_789):
+            assert buffer_size_for(size) % mmap.PAGESIZE == 0
+
+
+class TestHashFile:
+    """Tests for hash_file."""
+
+    @pytest.mark.parametrize("use_mmap", [None, True, False])
+    def test_matches_hashlib(self, data_file: Path, use_mmap: bool | None) -> None:
+        expected = hashlib.sha256(data_file.read_bytes()).hexdigest()
+        assert hash_file(data_file, use_mmap=use_mmap) == expected
+
+    @pytest.mark.parametrize("use_mmap", [True, False])
+    def test_small_buffer(self, data_file: Path, use_mmap: bool) -> None:
+        expected = hashlib.sha256(data_file.read_bytes()).hexdigest()
+        assert hash_file(data_file, buffer_size=4096, use_mmap=use_mmap) == expected
+
+    def test_other_algorithm(self, data_file: Path) -> None:
+        expected = hashlib.sha512(data_file.read_bytes()).hexdigest()
+        assert hash_file(data_file, "sha512") == expected
+
+    @pytest.mark.parametrize("use_mmap", [True, False])
+    def test_empty_file(self, tmp_path: Path, use_mmap: bool) -> None:
+        path = tmp_path / "empty"
+        path.write_bytes(b"")
+        assert hash_file(path, use_mmap=use_mmap) == hashlib.sha256(b"").hexdigest()
+
+
+class TestDigestFile:
+    """Tests for single-pass multi-algorithm digests."""
+
+    def test_all_algorithms(self, data_file: Path) -> None:
+        data = data_file.read_bytes()
+        digests = digest_file(data_file, ("sha256", "sha384", "sha512", "blake2b"))
+        assert digests == {
+            "sha256": hashlib.sha256(data).hexdigest(),
+            "sha384": hashlib.sha384(data).hexdigest(),
+            "sha512": hashlib.sha512(data).hexdigest(),
+            "blake2b": hashlib.blake2b(data).hexdigest(),
+        }
+
+    def test_unsupported_algorithm(self, data_file: Path) -> None:
+        with pytest.raises(ValueError, match="Unsupported digest algorithm"):
+            digest_file(data_file, ("md5",))
+
+    def test_no_algorithms(self, data_file: Path) -> None:
+        with pytest.raises(ValueError, match="At least one"):
+            digest_file(data_file, ())
+
+    def test_digest_files_order(self, tmp_path: Path) -> None:
+        paths = []
+        for i in range(8):
+            path = tmp_path / f"{i}.bin"
+            path.write_bytes(bytes([i]) * 1000)
+            paths.append(path)
+        results = digest_files(paths, ("sha256", "sha512"), workers=3)
+        assert [r["sha512"] for r in results] == [
+            hashlib.sha512(bytes([i]) * 1000).hexdigest() for i in range(8)
+        ]
+
+    def test_digest_files_invalid_workers(self, data_file: Path) -> None:
+        with pytest.raises(ValueError, match="workers"):
+            digest_files([data_file], workers=0)
+
+
+class TestReadBlocks:
+    """Tests for read_blocks."""
+
+    @pytest.mark.parametrize("use_mmap", [True, False])
+    def test_blocks_cover_file(self, data_file: Path, use_mmap: bool) -> None:
+        data = b"".join(
+            bytes(b) for b in read_blocks(data_file, buffer_size=8192, use_mmap=use_mmap)
+        )
+        assert data == data_file.read_bytes()
+
+    def test_abandoned_iteration_releases_map(self, data_file: Path) -> None:
+        blocks = read_blocks(data_file, buffer_size=4096, use_mmap=True)
+        block = next(blocks)
+        blocks.close()
+        with pytest.raises(ValueError):
+            bytes(block)
+
+
+class TestDigestCache:
+    """Tests for the persistent digest cache."""
+
+    def test_hit_skips_read(self, data_file: Path, tmp_path: Path) -> None:
+        with DigestCache(tmp_path / "cache.db") as cache:
+            first = digest_file(data_file, ("sha256",), cache=cache)
+            # Seed a fake digest for the same identity: a hit must return it
+            cache.put(file_identity(data_file.stat()), {"sha256": "f" * 64})
+            assert digest_file(data_file, ("sha256",), cache=cache) == {"sha256": "f" * 64}
+            refreshed = digest_file(data_file, ("sha256",), cache=cache, refresh=True)
+            assert refreshed == first
+            assert digest_file(data_file, ("sha256",), cache=cache) == first
+
+    def test_partial_hit_hashes_missing_only(self, data_file: Path) -> None:
+        data = data_file.read_bytes()
+        with DigestCache(":memory:") as cache:
+            digest_file(data_file, ("sha256",), cache=cache)
+            digests = digest_file(data_file, ("sha512", "sha256"), cache=cache)
+            assert list(digests) == ["sha512", "sha256"]
+            assert digests["sha512"] == hashlib.sha512(data).hexdigest()
+            assert len(cache) == 2
+
+    def test_modified_file_misses(self, data_file: Path) -> None:
+        with DigestCache(":memory:") as cache:
+            digest_file(data_file, cache=cache)
+            data_file.write_bytes(b"changed")
+            assert digest_file(data_file, cache=cache) == {
+                "sha256": hashlib.sha256(b"changed").hexdigest()
+            }
+
+    def test_persists_across_instances(self, data_file: Path, tmp_path: Path) -> None:
+        db = tmp_path / "nested" / "cache.db"
+        with DigestCache(db) as cache:
+            digest_file(data_file, cache=cache)
+        with DigestCache(db) as cache:
+            assert cache.get(file_identity(data_file.stat()), ["sha256"])
+
+    def test_lru_eviction(self) -> None:
+        with DigestCache(":memory:", max_entries=3) as cache:
+            for inode in range(3):
+                cache.put((1, inode, 10, 0), {"sha256": "a" * 64})
+            cache.get((1, 0, 10, 0), ["sha256"])  # Make inode 0 recently used
+            cache.put((1, 3, 10, 0), {"sha256": "a" * 64})
+            assert len(cache) == 3
+            assert cache.get((1, 0, 10, 0), ["sha256"])
+            assert not cache.get((1, 1, 10, 0), ["sha256"])
+
+    def test_invalidate(self, data_file: Path) -> None:
+        with DigestCache(":memory:") as cache:
+            digest_file(data_file, cache=cache)
+            cache.invalidate(data_file)
+            assert len(cache) == 0
+
+    def test_invalid_max_entries(self) -> None:
+        with pytest.raises(ValueError, match="max_entries"):
+            DigestCache(":memory:", max_entries=0)
+
+
+class TestChunkedDigest:
+    """Tests for chunked Merkle digests."""
+
+    def test_single_chunk_equals_sha256(self, data_file: Path) -> None:
+        digest = chunked_digest(data_file, chunk_size=1024 * 1024)
+        assert digest.chunk_count == 1
+        assert digest.root == hashlib.sha256(data_file.read_bytes()).hexdigest()
+
+    def test_empty_file(self, tmp_path: Path) -> None:
+        path = tmp_path / "empty"
+        path.write_bytes(b"")
+        assert chunked_digest(path).root == hashlib.sha256(b"").hexdigest()
+
+    def test_matches_reference_construction(self, data_file: Path) -> None:
+        data = data_file.read_bytes()
+        chunk_size = 65536  # 5 chunks: exercises odd-level duplication
+        level = [
+            hashlib.sha256(data[i : i + chunk_size]).digest()
+            for i in range(0, len(data), chunk_size)
+        ]
+        assert chunk_hashes(data_file, chunk_size=chunk_size, workers=3) == level
+        while len(level) > 1:
+            if len(level) % 2:
+                level.append(level[-1])
+            level = [
+                hashlib.sha256(a + b).digest() for a, b in zip(level[::2], level[1::2], strict=True)
+            ]
+
+        digest = chunked_digest(data_file, chunk_size=chunk_size, workers=3)
+        assert digest.root == level[0].hex()
+        assert digest.chunk_count == 5
+        assert digest.to_digests() == {
+            "merkleRoot": level[0].hex(),
+            "merkleChunkSize": "65536",
+            "merkleChunkCount": "5",
+        }
+
+    def test_parallel_matches_sequential(self, data_file: Path) -> None:
+        sequential = chunked_digest(data_file, chunk_size=4096, workers=1)
+        assert chunked_digest(data_file, chunk_size=4096, workers=8) == sequential
+
+    def test_cached(self, data_file: Path) -> None:
+        with DigestCache(":memory:") as cache:
+            digest = chunked_digest(data_file, chunk_size=4096, cache=cache)
+            assert len(cache) == 1
+            assert chunked_digest(data_file, chunk_size=4096, cache=cache) == digest
+
+    def test_invalid_chunk_size(self, data_file: Path) -> None:
+        with pytest.raises(ValueError, match="chunk_size"):
+            chunked_digest(data_file, chunk_size=0)
+
+
+class TestAsyncHashing:
+    """Tests for asyncio hashing helpers."""
+
+    def test_preset_cancel_event_stops_hashing(self, data_file: Path) -> None:
+        cancel = threading.Event()
+        cancel.set()
+        with pytest.raises(HashingCancelledError):
+            digest_file(data_file, cancel=cancel)
+        with pytest.raises(HashingCancelledError):
+            chunked_digest(data_file, chunk_size=4096, cancel=cancel)
+
+    def test_run_hashing(self, data_file: Path) -> None:
+        digests = asyncio.run(run_hashing(digest_file, data_file, ("sha512",)))
+        assert digests == {"sha512": hashlib.sha512(data_file.read_bytes()).hexdigest()}
+
+    def test_cancellation_sets_event(self) -> None:
+        started = threading.Event()
+        seen: list[threading.Event] = []
+
+        def blocking(*, cancel: threading.Event) -> None:
+            seen.append(cancel)
+            started.set()
+            cancel.wait(timeout=5)
+
+        async def main() -> None:
+            task = asyncio.ensure_future(run_hashing(blocking))
+            await asyncio.get_running_loop().run_in_executor(None, started.wait)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(main())
+        assert seen[0].is_set()
+
+    def test_map_concurrently_limits_and_orders(self) -> None:
+        in_flight = 0
+        peak = 0
+
+        async def work(i: int) -> int:
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.001 * (10 - i))
+            in_flight -= 1
+            return i * i
+
+        results = asyncio.run(map_concurrently(work, range(10), concurrency=3))
+        assert results == [i * i for i in range(10)]
+        assert peak == 3
+
+
+@pytest.fixture
+def dataset(tmp_path: Path) -> Path:
+    root = tmp_path / "table"
+    for partition in ("date=2025-01-02", "date=2025-01-01"):
+        (root / partition).mkdir(parents=True)
+        for part in ("part-1.parquet", "part-0.parquet"):
+            (root / partition / part).write_bytes(f"{partition}/{part}".encode())
+    (root / "_SUCCESS").write_bytes(b"")
+    (root / "B.txt").write_bytes(b"upper")
+    return root
+
+
+class TestDirectoryDigest:
+    """Tests for directory hashing."""
+
+    def test_canonical_order(self, dataset: Path) -> None:
+        entries = walk_directory(dataset, workers=4)
+        assert [e.relative_path for e in entries] == [
+            "B.txt",
+            "_SUCCESS",
+            "date=2025-01-01/part-0.parquet",
+            "date=2025-01-01/part-1.parquet",
+            "date=2025-01-02/part-0.parquet",
+            "date=2025-01-02/part-1.parquet",
+        ]
+
+    def test_include_exclude(self, dataset: Path) -> None:
+        entries = walk_directory(dataset, include=["*.parquet"], exclude=["date=2025-01-02/*"])
+        assert [e.relative_path for e in entries] == [
+            "date=2025-01-01/part-0.parquet",
+            "date=2025-01-01/part-1.parquet",
+        ]
+
+    def test_nfc_normalization(self, tmp_path: Path) -> None:
+        decomposed = "cafe\u0301.csv"
+        (tmp_path / decomposed).write_bytes(b"data")
+        assert [e.relative_path for e in walk_directory(tmp_path)] == ["caf\u00e9.csv"]
+
+    def test_dir_hash_format(self) -> None:
+        import base64
+
+        a = hashlib.sha256(b"a").hexdigest()
+        b = hashlib.sha256(b"b").hexdigest()
+        manifest = f"{a}  a.txt\n{b}  sub/b.txt\n".encode()
+        expected = "h1:" + base64.b64encode(hashlib.sha256(manifest).digest()).decode()
+        assert dir_hash([("sub/b.txt", b), ("a.txt", a)]) == expected
+
+    def test_dir_hash_rejects_newline(self) -> None:
+        with pytest.raises(ValueError, match="newline"):
+            dir_hash([("a\nb", "0" * 64)])
+
+    def test_digest_directory(self, dataset: Path) -> None:
+        result = digest_directory(dataset, algorithms=("sha512",), workers=3)
+        assert len(result.files) == 6
+        relative, digests = result.files[2]
+        expected = f"{relative}".encode()
+        assert digests == {
+            "sha256": hashlib.sha256(expected).hexdigest(),
+            "sha512": hashlib.sha512(expected).hexdigest(),
+        }
+        assert result.dir_hash == dir_hash((r, d["sha256"]) for r, d in result.files)
+
+    def test_content_change_changes_dir_hash(self, dataset: Path) -> None:
+        before = digest_directory(dataset).dir_hash
+        (dataset / "date=2025-01-01" / "part-0.parquet").write_bytes(b"changed")
+        assert digest_directory(dataset).dir_hash != before
+
+    def test_not_a_directory(self, data_file: Path) -> None:
+        with pytest.raises(NotADirectoryError):
+            walk_directory(data_file)
+
+
+class TestStreams:
+    """Tests for hash-while-streaming wrappers."""
+
+    def test_writer_tees_and_reports(self) -> None:
+        import io
+
+        reported: list[dict[str, str]] = []
+        destination = io.BytesIO()
+        with HashingWriter(destination, ("sha256", "sha512"), on_complete=reported.append) as w:
+            w.write(b"hello ")
+            w.write(memoryview(b"world"))
+        assert destination.getvalue() == b"hello world"
+        assert w.size == 11
+        assert reported == [
+            {
+                "sha256": hashlib.sha256(b"hello world").hexdigest(),
+                "sha512": hashlib.sha512(b"hello world").hexdigest(),
+            }
+        ]
+
+    def test_writer_hashes_non_byte_buffers(self) -> None:
+        import array
+
+        data = array.array("I", range(100))
+        writer = HashingWriter()
+        writer.write(data)
+        assert writer.digests()["sha256"] == hashlib.sha256(data.tobytes()).hexdigest()
+
+    def test_writer_error_does_not_report(self) -> None:
+        reported: list[dict[str, str]] = []
+        with pytest.raises(RuntimeError), HashingWriter(on_complete=reported.append) as w:
+            w.write(b"partial")
+            raise RuntimeError("upload failed")
+        assert reported == []
+        assert w.closed
+
+    def test_reader_reports_at_eof(self, data_file: Path) -> None:
+        import io
+        import shutil
+
+        reported: list[dict[str, str]] = []
+        destination = io.BytesIO()
+        with (
+            open(data_file, "rb") as f,
+            HashingReader(f, on_complete=reported.append) as r,
+        ):
+            shutil.copyfileobj(r, destination)
+        assert destination.getvalue() == data_file.read_bytes()
+        assert reported == [{"sha256": hashlib.sha256(destination.getvalue()).hexdigest()}]
+
+    def test_reader_without_readinto(self) -> None:
+        class Source:
+            def __init__(self) -> None:
+                self.chunks = [b"ab", b"cd"]
+
+            def read(self, size: int = -1) -> bytes:
+                return self.chunks.pop(0) if self.chunks else b""
+
+        reader = HashingReader(Source())  # type: ignore[arg-type]
+        assert reader.read() == b"abcd"
+        assert reader.digests()["sha256"] == hashlib.sha256(b"abcd").hexdigest()
+
+    def test_reader_closed_early_raises(self) -> None:
+        import io
+
+        reader = HashingReader(io.BytesIO(b"data"), on_complete=lambda digests: None)
+        reader.read(2)
+        with pytest.raises(ValueError, match="before the end"):
+            reader.close()
+
+    def test_hashing_iter(self) -> None:
+        reported: list[dict[str, str]] = []
+        chunks = [b"a", b"b", b"c"]
+        assert list(hashing_iter(iter(chunks), on_complete=reported.append)) == chunks
+        assert reported == [{"sha256": hashlib.sha256(b"abc").hexdigest()}]
+
+
+class TestDigestBuffer:
+    """Tests for zero-copy buffer hashing."""
+
+    def test_contiguous_is_not_copied(self) -> None:
+        import array
+
+        data = array.array("d", [float(i) for i in range(1000)])
+        blocks = list(buffer_blocks(data))
+        assert len(blocks) == 1
+        assert isinstance(blocks[0], memoryview)
+        assert digest_buffer(data) == {"sha256": hashlib.sha256(data.tobytes()).hexdigest()}
+
+    def test_multidimensional(self) -> None:
+        import array
+
+        data = array.array("I", range(24))
+        view = memoryview(data).cast("B").cast("I", (4, 6))
+        assert digest_buffer(view)["sha256"] == hashlib.sha256(data.tobytes()).hexdigest()
+
+    def test_strided_rows_hash_in_c_order(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        from makoto.hashing import buffers
+
+        monkeypatch.setattr(buffers, "COPY_BLOCK_SIZE", 6)
+        view = memoryview(bytes(range(48))).cast("B", (8, 6))[::2]
+        assert not view.c_contiguous
+        expected = hashlib.sha256(view.tobytes()).hexdigest()
+        assert digest_buffer(view)["sha256"] == expected
+        # Rows fill a block each and are contiguous, so nothing is copied
+        assert all(isinstance(block, memoryview) for block in buffer_blocks(view))
+
+    def test_strided_1d_is_copied_in_bounded_blocks(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        from makoto.hashing import buffers
+
+        monkeypatch.setattr(buffers, "COPY_BLOCK_SIZE", 100)
+        view = memoryview(os.urandom(1000))[::3]
+        sizes = [len(block) for block in buffer_blocks(view)]
+        assert max(sizes) <= 100
+        assert sum(sizes) == len(view)
+        assert digest_buffer(view)["sha256"] == hashlib.sha256(view.tobytes()).hexdigest()
+
+    def test_list_is_one_stream(self) -> None:
+        parts = [b"ab", bytearray(b"cd"), memoryview(b"xxefxx")[2:4]]
+        expected = {
+            "sha256": hashlib.sha256(b"abcdef").hexdigest(),
+            "blake2b": hashlib.blake2b(b"abcdef").hexdigest(),
+        }
+        assert digest_buffer(parts, ("sha256", "blake2b")) == expected
+
+    def test_rejects_non_buffer(self) -> None:
+        with pytest.raises(TypeError):
+            digest_buffer("text")  # type: ignore[arg-type]
+
+
+def _reference_root(data: bytes, chunk_size: int) -> str:
+    level = [
+        hashlib.sha256(data[i : i + chunk_size]).digest() for i in range(0, len(data), chunk_size)
+    ] or [hashlib.sha256(b"").digest()]
+    while len(level) > 1:
+        if len(level) % 2:
+            level.append(level[-1])
+        level = [
+            hashlib.sha256(a + b).digest() for a, b in zip(level[::2], level[1::2], strict=True)
+        ]
+    return level[0].hex()
+
+
+class TestAppendDigest:
+    """Tests for incremental digests of append-only files."""
+
+    def test_incremental_matches_full(self, tmp_path: Path) -> None:
+        path = tmp_path / "app.log"
+        data = b""
+        state = None
+        for size in (0, 10, 100, 100, 256, 1000, 1024, 3000):
+            extra = os.urandom(size - len(data))
+            data += extra
+            with open(path, "ab") as f:
+                f.write(extra)
+            digest, state = append_digest(path, state, chunk_size=64)
+            assert digest.root == _reference_root(data, 64)
+            assert digest.root == chunked_digest(path, chunk_size=64).root
+            assert digest.size == len(data)
+            assert state.size == len(data) // 64 * 64
+
+    def test_only_tail_is_read(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        path = tmp_path / "app.log"
+        path.write_bytes(os.urandom(64 * 100))
+        _, state = append_digest(path, chunk_size=64)
+        with open(path, "ab") as f:
+            f.write(os.urandom(10))
+
+        hashed: list[int] = []
+        real_sha256 = hashlib.sha256
+
+        def counting_sha256(data: bytes = b"") -> object:
+            hashed.append(len(data))
+            return real_sha256(data)
+
+        from makoto.hashing import incremental
+
+        monkeypatch.setattr(incremental.hashlib, "sha256", counting_sha256)
+        append_digest(path, state)
+        # Last complete chunk (guard), the new tail, and O(log n) root nodes
+        assert sum(hashed) < 64 * 2 + 64 * 16
+
+    def test_state_round_trip(self, tmp_path: Path) -> None:
+        path = tmp_path / "app.log"
+        path.write_bytes(os.urandom(1000))
+        digest, state = append_digest(path, chunk_size=64)
+        state.save(tmp_path / "state.json")
+        loaded = AppendState.load(tmp_path / "state.json")
+        assert loaded == state
+        assert append_digest(path, loaded)[0] == digest
+
+    def test_rejects_rewrite_and_truncation(self, tmp_path: Path) -> None:
+        path = tmp_path / "app.log"
+        path.write_bytes(b"a" * 200)
+        _, state = append_digest(path, chunk_size=64)
+        path.write_bytes(b"b" * 300)
+        with pytest.raises(ValueError, match="modified"):
+            append_digest(path, state)
+        path.write_bytes(b"a" * 100)
+        with pytest.raises(ValueError, match="shrank"):
+            append_digest(path, state)
+
+    def test_chunk_size_mismatch(self, data_file: Path) -> None:
+        _, state = append_digest(data_file, chunk_size=64)
+        with pytest.raises(ValueError, match="does not match"):
+            append_digest(data_file, state, chunk_size=128)
+
+    def test_prefix_roots(self, data_file: Path) -> None:
+        data = data_file.read_bytes()
+        sizes = [len(data), 0, 64, 1000, 64 * 7]
+        assert prefix_roots(data_file, sizes, chunk_size=64) == [
+            _reference_root(data[:size], 64) for size in sizes
+        ]
+        with pytest.raises(ValueError, match="exceeds"):
+            prefix_roots(data_file, [len(data) + 1], chunk_size=64)
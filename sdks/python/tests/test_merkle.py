@@ -0,0 +1,990 @@
+"""Tests for Merkle trees."""
+
+import asyncio
+import hashlib
+import json
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from makoto import AttestationBuilder
+from makoto.attestation.verifier import AttestationVerifier
+from makoto.merkle import (
+    ConsistencyProof,
+    JcsEncoder,
+    KeyedMerkleTree,
+    KeyedProof,
+    MappedMerkleTree,
+    MerkleAccumulator,
+    MerkleMultiproof,
+    MerkleProof,
+    MerkleTree,
+    MerkleTreeWriter,
+    NonInclusionProof,
+    ProofClient,
+    ProofServer,
+    TreeStore,
+    hash_leaf,
+    hash_pair,
+    leaf_encoder,
+    save_tree,
+    server,
+    storage,
+)
+from makoto.merkle.encoding import format_number
+from makoto.models.stream_window import StreamWindowPredicate
+
+
+def reference_root(
+    records: list[bytes],
+    new: Callable[..., Any] = hashlib.sha256,
+    leaf_new: Callable[..., Any] | None = None,
+) -> bytes:
+    """Straightforward port of ``MerkleTree::from_leaves`` in the Rust SDK."""
+    level = [(leaf_new or new)(record).digest() for record in records]
+    while len(level) > 1:
+        level = [
+            new(chunk[0] + (chunk[1] if len(chunk) == 2 else chunk[0])).digest()
+            for chunk in (level[i : i + 2] for i in range(0, len(level), 2))
+        ]
+    return level[0]
+
+
+class TestMerkleTree:
+    """Tests for MerkleTree."""
+
+    def test_known_roots(self) -> None:
+        # Same vectors as the Rust SDK construction
+        tree = MerkleTree.from_records([b"a", b"b", b"c", b"d"])
+        assert tree.root_hex() == "14ede5e8e97ad9372327728f5099b95604a39593cac3bd38a343ad76205213e7"
+        assert tree.height == 3
+        odd = MerkleTree.from_records([b"a", b"b", b"c"])
+        assert odd.root_hex() == "d31a37ef6ac14a2db1470c4316beb5592e6afd4465022339adafda76a18ffabe"
+
+    @pytest.mark.parametrize("count", [1, 2, 3, 5, 8, 13, 100])
+    def test_matches_reference(self, count: int) -> None:
+        records = [f"record-{i}".encode() for i in range(count)]
+        tree = MerkleTree.from_records(records)
+        assert tree.root() == reference_root(records)
+        assert tree.leaf_count == count
+        assert tree.height == (count - 1).bit_length() + 1
+
+    @pytest.mark.parametrize("algorithm", ["sha384", "sha512", "blake2b"])
+    def test_other_algorithms(self, algorithm: str) -> None:
+        records = [bytes([i]) * i for i in range(7)]
+        tree = MerkleTree.from_records(records, algorithm)  # type: ignore[arg-type]
+        new = getattr(hashlib, algorithm)
+        assert tree.root() == reference_root(records, new)
+        assert tree.digest_size == new().digest_size
+
+    def test_separate_leaf_algorithm(self, tmp_path: Path) -> None:
+        records = [bytes([i]) * 3 for i in range(11)]
+        tree = MerkleTree.from_records(records, "sha256", leaf_algorithm="blake2b")
+        assert tree.root() == reference_root(records, hashlib.sha256, hashlib.blake2b)
+        assert tree.leaf_hash(3) == hashlib.blake2b(records[3]).digest()
+        assert tree.leaf_count == 11
+        assert tree.height == 5
+        model = tree.to_model()
+        assert model.leaf_hash_algorithm == "blake2b"
+        assert MerkleTree.from_records(records).to_model().leaf_hash_algorithm is None
+
+        acc = MerkleAccumulator("sha256", leaf_algorithm="blake2b")
+        acc.extend(records)
+        assert acc.to_model() == model
+        parallel = MerkleTree.from_records_parallel(
+            records, "sha256", leaf_algorithm="blake2b", processes=False, subtree_leaves=4
+        )
+        assert parallel.root() == tree.root()
+        path = tmp_path / "t.mktree"
+        with MerkleTreeWriter(path, "sha256", leaf_algorithm="blake2b") as writer:
+            writer.extend(records)
+        with MappedMerkleTree.open(path, verify=True) as mapped:
+            assert mapped.to_model() == model
+            assert mapped.proof(10) == tree.proof(10)
+        assert tree.proof(7).verify(tree.root() or b"", "sha256", leaf_count=11)
+
+    def test_blake3_missing_is_clean_error(self) -> None:
+        try:
+            import blake3  # noqa: F401
+        except ImportError:
+            with pytest.raises(ImportError, match="optional 'blake3' package"):
+                MerkleTree.from_records([b"a"], "blake3")
+        else:
+            assert MerkleTree.from_records([b"a"], "blake3").root_hex()
+
+    def test_unknown_algorithm(self) -> None:
+        with pytest.raises(ValueError, match="Unsupported"):
+            MerkleTree.from_records([b"a"], "md5")  # type: ignore[arg-type]
+
+    def test_levels_are_contiguous(self) -> None:
+        tree = MerkleTree.from_records([b"a", b"b", b"c"])
+        assert [len(tree.level(i)) for i in range(tree.height)] == [96, 64, 32]
+        assert tree.node(1, 1) == hash_pair(hash_leaf(b"c"), hash_leaf(b"c"))
+        assert tree.leaf_hash(2) == hashlib.sha256(b"c").digest()
+        with pytest.raises(IndexError):
+            tree.leaf_hash(3)
+
+    @pytest.mark.parametrize("count", [1, 4, 5, 8, 9, 31, 33, 100])
+    @pytest.mark.parametrize("subtree_leaves", [1, 4, 8])
+    def test_parallel_matches_sequential(self, count: int, subtree_leaves: int) -> None:
+        records = [f"record-{i}".encode() for i in range(count)]
+        tree = MerkleTree.from_records_parallel(
+            records, processes=False, workers=4, subtree_leaves=subtree_leaves
+        )
+        expected = MerkleTree.from_records(records)
+        assert tree.root() == expected.root()
+        assert [tree.level(i) for i in range(tree.height)] == [
+            expected.level(i) for i in range(expected.height)
+        ]
+
+    def test_parallel_with_processes(self) -> None:
+        records = [i.to_bytes(4, "big") for i in range(1000)]
+        tree = MerkleTree.from_records_parallel(records, "sha512", workers=2, subtree_leaves=128)
+        assert tree.root() == MerkleTree.from_records(records, "sha512").root()
+        assert MerkleTree.from_records_parallel([]).root() is None
+        with pytest.raises(ValueError, match="power of two"):
+            MerkleTree.from_records_parallel(records, subtree_leaves=100)
+
+    def test_from_leaf_hashes(self) -> None:
+        leaves = [hashlib.sha256(bytes([i])).digest() for i in range(5)]
+        expected = MerkleTree.from_records([bytes([i]) for i in range(5)]).root()
+        assert MerkleTree.from_leaf_hashes(leaves).root() == expected
+        assert MerkleTree.from_leaf_hashes(b"".join(leaves)).root() == expected
+        with pytest.raises(ValueError, match="32 bytes"):
+            MerkleTree.from_leaf_hashes([b"short"])
+
+    def test_empty_tree(self) -> None:
+        tree = MerkleTree.from_records([])
+        assert tree.leaf_count == 0
+        assert tree.height == 0
+        assert tree.root() is None
+        with pytest.raises(ValueError, match="empty"):
+            tree.to_model()
+
+    def test_builder_records_tree(self) -> None:
+        tree = MerkleTree.from_records([b"r1", b"r2", b"r3"])
+        statement = (
+            AttestationBuilder()
+            .stream_window(
+                stream_id="s",
+                stream_source="kafka://broker/topic",
+                window_type="tumbling",
+                window_duration="PT1M",
+                merkle_algorithm="sha256",
+                merkle_root="",
+                leaf_count=0,
+                collector_id="c",
+            )
+            .with_merkle_tree(tree)
+            .with_subject("window", "0" * 64)
+            .build()
+        )
+        merkle = statement.predicate["integrity"]["merkleTree"]
+        assert merkle == {
+            "algorithm": "sha256",
+            "leafCount": 3,
+            "root": tree.root_hex(),
+            "treeHeight": 3,
+        }
+
+    def test_with_merkle_tree_requires_stream_window(self) -> None:
+        builder = AttestationBuilder().origin(source="test", collector_id="test")
+        with pytest.raises(ValueError, match="stream window"):
+            builder.with_merkle_tree(MerkleTree.from_records([b"a"]))
+
+
+class TestMerkleAccumulator:
+    """Tests for the constant-memory accumulator."""
+
+    @pytest.mark.parametrize("count", [1, 2, 3, 5, 6, 7, 8, 13, 100, 1025])
+    def test_matches_full_tree(self, count: int) -> None:
+        records = [f"record-{i}".encode() for i in range(count)]
+        acc = MerkleAccumulator()
+        acc.append(records[0])
+        acc.extend(records[1:])
+        tree = MerkleTree.from_records(records)
+        assert acc.root() == tree.root()
+        assert acc.to_model() == tree.to_model()
+        assert len(acc.peaks) == bin(count).count("1")
+
+    @pytest.mark.parametrize("algorithm", ["sha384", "blake2b"])
+    def test_other_algorithms(self, algorithm: str) -> None:
+        records = [bytes([i]) for i in range(11)]
+        acc = MerkleAccumulator(algorithm)  # type: ignore[arg-type]
+        acc.extend(records)
+        assert acc.root() == MerkleTree.from_records(records, algorithm).root()  # type: ignore[arg-type]
+
+    def test_root_is_available_while_appending(self) -> None:
+        acc = MerkleAccumulator()
+        records: list[bytes] = []
+        for i in range(20):
+            records.append(bytes([i]))
+            acc.append(records[-1])
+            assert acc.root() == MerkleTree.from_records(records).root()
+
+    def test_tail_leaf_is_not_added(self) -> None:
+        acc = MerkleAccumulator()
+        acc.extend([b"a", b"b"])
+        assert acc.root(hash_leaf(b"c")) == MerkleTree.from_records([b"a", b"b", b"c"]).root()
+        assert acc.leaf_count == 2
+
+    def test_resume_from_frontier(self) -> None:
+        acc = MerkleAccumulator()
+        acc.extend([b"a", b"b", b"c"])
+        resumed = MerkleAccumulator(count=acc.count, peaks=acc.peaks)
+        resumed.append(b"d")
+        assert resumed.root_hex() == MerkleTree.from_records([b"a", b"b", b"c", b"d"]).root_hex()
+        with pytest.raises(ValueError, match="peaks"):
+            MerkleAccumulator(count=3, peaks={1: b"x" * 32})
+
+    @pytest.mark.parametrize("split", [0, 1, 3, 4, 6, 8])
+    def test_extend_leaf_hashes(self, split: int) -> None:
+        records = [bytes([i]) for i in range(21)]
+        acc = MerkleAccumulator()
+        acc.extend(records[:split])
+        acc.extend_leaf_hashes(b"".join(hash_leaf(record) for record in records[split:]))
+        assert acc.root() == MerkleTree.from_records(records).root()
+        assert acc.leaf_count == 21
+        with pytest.raises(ValueError, match="multiple"):
+            acc.extend_leaf_hashes(b"x" * 31)
+
+    def test_empty(self) -> None:
+        acc = MerkleAccumulator()
+        assert acc.root() is None
+        assert acc.tree_height == 0
+        with pytest.raises(ValueError, match="empty"):
+            acc.to_model()
+
+
+def window_statement(tree: MerkleTree) -> Any:
+    """Build a stream window attestation recording a tree."""
+    return (
+        AttestationBuilder()
+        .stream_window(
+            stream_id="s",
+            stream_source="kafka://broker/topic",
+            window_type="tumbling",
+            window_duration="PT1M",
+            merkle_algorithm="sha256",
+            merkle_root="",
+            leaf_count=0,
+            collector_id="c",
+        )
+        .with_merkle_tree(tree)
+        .with_subject("window", "0" * 64)
+        .build()
+    )
+
+
+class TestMerkleProofs:
+    """Tests for inclusion proofs and multiproofs."""
+
+    @pytest.mark.parametrize("count", [1, 2, 3, 5, 7, 8, 13])
+    def test_every_leaf_verifies(self, count: int) -> None:
+        tree = MerkleTree.from_records([bytes([i]) for i in range(count)])
+        for index in range(count):
+            proof = tree.proof(index)
+            assert len(proof.siblings) == tree.height - 1
+            assert proof.verify(tree.root_hex() or "", leaf_count=count)
+            assert proof.compute_root() == tree.root()
+
+    def test_rust_positions_and_format(self) -> None:
+        # Leaf 2 of [a, b, c]: sibling is itself (right), then the left subtree
+        tree = MerkleTree.from_records([b"a", b"b", b"c"])
+        proof = tree.proof(2)
+        assert proof.positions == ("right", "left")
+        assert proof.siblings[0] == hash_leaf(b"c")
+        data = proof.to_dict()
+        assert set(data) == {"leaf_index", "leaf_hash", "siblings", "positions"}
+        assert MerkleProof.from_dict(data) == proof
+
+    def test_tampered_proofs_are_rejected(self) -> None:
+        tree = MerkleTree.from_records([bytes([i]) for i in range(6)])
+        root = tree.root() or b""
+        proof = tree.proof(3)
+        wrong_leaf = MerkleProof(3, hash_leaf(b"x"), proof.siblings, proof.positions)
+        assert not wrong_leaf.verify(root, leaf_count=6)
+        moved = MerkleProof(2, proof.leaf_hash, proof.siblings, proof.positions)
+        assert not moved.verify(root, leaf_count=6)
+        assert not proof.verify(root, leaf_count=12)
+        assert not proof.verify(root, leaf_count=3)
+        with pytest.raises(ValueError, match="out of bounds"):
+            tree.proof(6)
+
+    def test_positions_are_derived_from_index(self) -> None:
+        # Claiming leaf 1 with leaf 0's path flipped must fail when the
+        # leaf count is known, even though the hashes line up
+        tree = MerkleTree.from_records([b"a", b"b"])
+        proof = tree.proof(0)
+        forged = MerkleProof(1, tree.leaf_hash(1), (tree.leaf_hash(0),), ("left",))
+        assert forged.verify(tree.root() or b"", leaf_count=2)
+        lying = MerkleProof(0, proof.leaf_hash, proof.siblings, ("left",))
+        assert not lying.verify(tree.root() or b"", leaf_count=2)
+
+    @pytest.mark.parametrize("count", [1, 2, 5, 16, 33])
+    def test_multiproof(self, count: int) -> None:
+        tree = MerkleTree.from_records([bytes([i]) for i in range(count)])
+        indices = sorted({0, count // 2, count - 1})
+        multiproof = tree.multiproof(reversed(indices))
+        assert multiproof.leaf_indices == tuple(indices)
+        assert multiproof.verify(tree.root() or b"")
+        singles = sum(len(tree.proof(i).siblings) for i in indices)
+        assert len(multiproof.hashes) <= singles
+        assert MerkleMultiproof.from_dict(multiproof.to_dict()) == multiproof
+
+    def test_multiproof_shares_siblings(self) -> None:
+        tree = MerkleTree.from_records([bytes([i]) for i in range(64)])
+        multiproof = tree.multiproof(range(8))
+        # Only the path above the proven 8-leaf subtree is needed
+        assert len(multiproof.hashes) == 3
+        all_leaves = tree.multiproof(range(64))
+        assert all_leaves.hashes == ()
+        assert all_leaves.verify(tree.root() or b"")
+
+    def test_malformed_multiproof(self) -> None:
+        tree = MerkleTree.from_records([bytes([i]) for i in range(10)])
+        multiproof = tree.multiproof([1, 7])
+        root = tree.root() or b""
+        for bad in (
+            MerkleMultiproof(10, (1, 7), multiproof.leaf_hashes, multiproof.hashes[:-1]),
+            MerkleMultiproof(10, (1, 7), multiproof.leaf_hashes, (*multiproof.hashes, root)),
+            MerkleMultiproof(10, (7, 1), multiproof.leaf_hashes, multiproof.hashes),
+            MerkleMultiproof(10, (1, 10), multiproof.leaf_hashes, multiproof.hashes),
+            MerkleMultiproof(20, (1, 7), multiproof.leaf_hashes, multiproof.hashes),
+        ):
+            assert not bad.verify(root)
+        with pytest.raises(ValueError, match="too few"):
+            MerkleMultiproof(10, (1, 7), multiproof.leaf_hashes, ()).compute_root()
+        with pytest.raises(ValueError, match="out of bounds"):
+            tree.multiproof([10])
+
+    def test_verify_inclusion_against_attestation(self) -> None:
+        records = [f"record-{i}".encode() for i in range(9)]
+        tree = MerkleTree.from_records(records)
+        statement = window_statement(tree)
+        verifier = AttestationVerifier()
+
+        result = verifier.verify_inclusion(
+            statement, [tree.proof(4), tree.multiproof([0, 8])], records={4: records[4]}
+        )
+        assert result.valid, result.errors
+        assert (result.subjects_verified, result.subjects_total) == (3, 3)
+
+        result = verifier.verify_inclusion(statement, tree.proof(4), records={4: b"forged"})
+        assert not result.valid
+        assert "Record 4" in result.errors[0]
+
+        other = MerkleTree.from_records([*records, b"extra"])
+        result = verifier.verify_inclusion(statement, other.proof(4))
+        assert not result.valid
+        assert result.subjects_verified == 0
+
+    def test_verify_inclusion_uses_leaf_hash_algorithm(self) -> None:
+        records = [bytes([i]) for i in range(6)]
+        tree = MerkleTree.from_records(records, leaf_algorithm="blake2b")
+        statement = window_statement(tree)
+        merkle = statement.predicate["integrity"]["merkleTree"]
+        assert merkle["leafHashAlgorithm"] == "blake2b"
+        result = AttestationVerifier().verify_inclusion(
+            statement, tree.proof(2), records={2: records[2]}
+        )
+        assert result.valid, result.errors
+
+    def test_verify_inclusion_requires_stream_window(self) -> None:
+        statement = (
+            AttestationBuilder()
+            .origin(source="test", collector_id="test")
+            .with_subject("d", "0" * 64)
+            .build()
+        )
+        tree = MerkleTree.from_records([b"a"])
+        result = AttestationVerifier().verify_inclusion(statement, tree.proof(0))
+        assert not result.valid
+
+
+class TestConsistencyProofs:
+    """Tests for consistency proofs between tree sizes."""
+
+    def test_every_prefix_is_consistent(self) -> None:
+        records = [bytes([i]) for i in range(21)]
+        for new_size in range(1, len(records) + 1):
+            new_tree = MerkleTree.from_records(records[:new_size])
+            for old_size in range(1, new_size + 1):
+                old_tree = MerkleTree.from_records(records[:old_size])
+                proof = new_tree.consistency_proof(old_size)
+                assert proof.verify(old_tree.root() or b"", new_tree.root() or b"")
+                assert proof.compute_roots() == (old_tree.root(), new_tree.root())
+
+    def test_proof_is_logarithmic(self) -> None:
+        tree = MerkleTree.from_records([i.to_bytes(4, "big") for i in range(10_000)])
+        for old_size in (1, 777, 4096, 9_999):
+            assert len(tree.consistency_proof(old_size).hashes) <= 2 * tree.height
+
+    def test_rewritten_prefix_is_rejected(self) -> None:
+        records = [bytes([i]) for i in range(12)]
+        old_tree = MerkleTree.from_records(records[:7])
+        rewritten = MerkleTree.from_records([b"x", *records[1:]])
+        proof = rewritten.consistency_proof(7)
+        assert not proof.verify(old_tree.root() or b"", rewritten.root() or b"")
+
+    def test_malformed_proofs(self) -> None:
+        tree = MerkleTree.from_records([bytes([i]) for i in range(9)])
+        old_root = MerkleTree.from_records([bytes([i]) for i in range(5)]).root() or b""
+        root = tree.root() or b""
+        proof = tree.consistency_proof(5)
+        assert ConsistencyProof.from_dict(proof.to_dict()) == proof
+        for bad in (
+            ConsistencyProof(5, 9, proof.hashes[:-1]),
+            ConsistencyProof(5, 9, (*proof.hashes, root)),
+            ConsistencyProof(4, 9, proof.hashes),
+            ConsistencyProof(9, 5, proof.hashes),
+            ConsistencyProof(0, 9, ()),
+        ):
+            assert not bad.verify(old_root, root)
+        with pytest.raises(ValueError, match="out of bounds"):
+            tree.consistency_proof(10)
+
+    def test_verify_consistency_between_windows(self) -> None:
+        records = [f"record-{i}".encode() for i in range(30)]
+        old_tree = MerkleTree.from_records(records[:17])
+        new_tree = MerkleTree.from_records(records)
+        old, new = window_statement(old_tree), window_statement(new_tree)
+        verifier = AttestationVerifier()
+
+        result = verifier.verify_consistency(old, new, new_tree.consistency_proof(17))
+        assert result.valid, result.errors
+
+        result = verifier.verify_consistency(old, new, new_tree.consistency_proof(16))
+        assert not result.valid
+        assert "16 -> 30" in result.errors[0]
+
+        forked = MerkleTree.from_records([*records[:16], b"late", *records[17:]])
+        result = verifier.verify_consistency(
+            old, window_statement(forked), forked.consistency_proof(17)
+        )
+        assert not result.valid
+
+
+class TestTreeFiles:
+    """Tests for memory-mapped tree files."""
+
+    @pytest.mark.parametrize("count", [1, 2, 7, 100, 1001])
+    def test_writer_matches_in_memory_tree(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch, count: int
+    ) -> None:
+        # Small blocks so levels are built across many block boundaries
+        monkeypatch.setattr(storage, "_BUILD_BLOCK_NODES", 8)
+        records = [f"record-{i}".encode() for i in range(count)]
+        path = tmp_path / "window.mktree"
+        with MerkleTreeWriter(path) as writer:
+            writer.extend(records)
+        tree = MerkleTree.from_records(records)
+        assert writer.to_model() == tree.to_model()
+
+        with MappedMerkleTree.open(path, verify=True) as mapped:
+            assert mapped.root() == tree.root()
+            assert mapped.to_model() == tree.to_model()
+            assert all(mapped.level(i) == tree.level(i) for i in range(tree.height))
+            proof = mapped.proof(count // 2)
+            assert proof == tree.proof(count // 2)
+            assert proof.verify(tree.root() or b"", leaf_count=count)
+        assert not path.with_name("window.mktree.tmp").exists()
+
+    def test_save_tree_layout(self, tmp_path: Path) -> None:
+        tree = MerkleTree.from_records([b"a", b"b", b"c"], "sha512")
+        path = tmp_path / "t.mktree"
+        save_tree(tree, path)
+        data = path.read_bytes()
+        assert data[:8] == b"MKTMERK1"
+        assert len(data) == 96 + (3 + 2 + 1) * 64
+        assert data[-64:] == tree.root()
+        with MappedMerkleTree.open(path) as mapped:
+            assert mapped.algorithm == "sha512"
+            assert mapped.multiproof([0, 2]) == tree.multiproof([0, 2])
+
+    def test_check_against_predicate(self, tmp_path: Path) -> None:
+        tree = MerkleTree.from_records([bytes([i]) for i in range(9)])
+        path = tmp_path / "t.mktree"
+        save_tree(tree, path)
+        statement = window_statement(tree)
+        predicate = StreamWindowPredicate.model_validate(statement.predicate)
+        with MappedMerkleTree.open(path) as mapped:
+            mapped.check(predicate)
+            other = MerkleTree.from_records([bytes([i]) for i in range(8)]).to_model()
+            with pytest.raises(ValueError, match="8"):
+                mapped.check(other)
+
+    def test_leaf_encoding_and_order_round_trip(self, tmp_path: Path) -> None:
+        path = tmp_path / "jcs.mktree"
+        with MerkleTreeWriter(path, encoding="json-jcs") as writer:
+            writer.extend([{"b": 1, "a": 2}, {"c": [1, 2]}])
+        with MappedMerkleTree.open(path) as mapped:
+            assert mapped.to_model() == writer.to_model()
+            assert mapped.to_model().leaf_encoding == "json-jcs"
+            mapped.check(writer.to_model())
+            raw = MerkleTree.from_leaf_hashes([mapped.leaf_hash(0), mapped.leaf_hash(1)])
+            with pytest.raises(ValueError, match="json-jcs"):
+                mapped.check(raw.to_model())
+
+        keyed = KeyedMerkleTree.from_items([(b"k2", b"2"), (b"k1", b"1")])
+        path = tmp_path / "keyed.mktree"
+        save_tree(keyed.tree, path)
+        with MappedMerkleTree.open(path) as mapped:
+            assert mapped.to_model() == keyed.to_model()
+            assert mapped.to_model().leaf_order == "key"
+            with pytest.raises(ValueError, match="order"):
+                mapped.check(keyed.to_model().model_copy(update={"leaf_order": None}))
+
+    def test_corrupt_files_are_rejected(self, tmp_path: Path) -> None:
+        tree = MerkleTree.from_records([bytes([i]) for i in range(5)])
+        path = tmp_path / "t.mktree"
+        save_tree(tree, path)
+        data = bytearray(path.read_bytes())
+
+        path.write_bytes(data[:-1])
+        with pytest.raises(ValueError, match="expected"):
+            MappedMerkleTree.open(path)
+        path.write_bytes(b"NOTATREE" + data[8:])
+        with pytest.raises(ValueError, match="magic"):
+            MappedMerkleTree.open(path)
+        data[64 + 5 * 32] ^= 1  # First node of level 1
+        path.write_bytes(data)
+        MappedMerkleTree.open(path).close()
+        with pytest.raises(ValueError, match="level 1"):
+            MappedMerkleTree.open(path, verify=True)
+
+    def test_failed_write_leaves_no_file(self, tmp_path: Path) -> None:
+        path = tmp_path / "t.mktree"
+        with pytest.raises(RuntimeError), MerkleTreeWriter(path) as writer:
+            writer.append(b"a")
+            raise RuntimeError("consumer failed")
+        assert list(tmp_path.iterdir()) == []
+        with pytest.raises(ValueError, match="closed"):
+            writer.append(b"b")
+
+
+class TestKeyedMerkleTree:
+    """Tests for keyed trees and proofs by key."""
+
+    @staticmethod
+    def sensor_tree(count: int = 10) -> KeyedMerkleTree:
+        # Keys arrive out of order; even sensor numbers only
+        items = [
+            (f"sensor-{i:03d}".encode(), f"reading-{i}".encode()) for i in range(0, 2 * count, 2)
+        ]
+        return KeyedMerkleTree.from_items(reversed(items))
+
+    def test_leaves_are_sorted_keyed_leaves(self) -> None:
+        tree = self.sensor_tree(5)
+        assert tree.keys == sorted(tree.keys)
+        record_hash = hashlib.sha256(b"reading-4").digest()
+        expected = hashlib.sha256(b"\0\0\0\x0asensor-004" + record_hash).digest()
+        assert tree.tree.leaf_hash(2) == expected
+        assert tree.index(b"sensor-004") == 2
+        assert tree.index(b"sensor-005") is None
+        assert tree.to_model().leaf_order == "key"
+
+    def test_inclusion_by_key(self) -> None:
+        tree = self.sensor_tree()
+        root = tree.root() or b""
+        for key in tree.keys:
+            proof = tree.proof(key)
+            assert proof.verify(root, tree.leaf_count)
+            assert KeyedProof.from_dict(proof.to_dict()) == proof
+        proof = tree.proof(b"sensor-006")
+        assert proof.verify(root, tree.leaf_count, record=b"reading-6")
+        assert not proof.verify(root, tree.leaf_count, record=b"reading-7")
+        renamed = KeyedProof(b"sensor-008", proof.record_hash, proof.proof)
+        assert not renamed.verify(root, tree.leaf_count)
+        with pytest.raises(KeyError):
+            tree.proof(b"sensor-007")
+
+    @pytest.mark.parametrize("key", [b"a", b"sensor-000a", b"sensor-007", b"sensor-019", b"z"])
+    def test_non_inclusion(self, key: bytes) -> None:
+        tree = self.sensor_tree()
+        proof = tree.non_inclusion_proof(key)
+        assert proof.verify(tree.root() or b"", tree.leaf_count)
+        assert NonInclusionProof.from_dict(proof.to_dict()) == proof
+
+    def test_forged_non_inclusion_is_rejected(self) -> None:
+        tree = self.sensor_tree()
+        root, count = tree.root() or b"", tree.leaf_count
+        # Hiding sensor-006 by bracketing it with non-adjacent neighbours
+        left, right = tree.proof(b"sensor-004"), tree.proof(b"sensor-008")
+        assert not NonInclusionProof(b"sensor-006", left, right).verify(root, count)
+        # Claiming a key sorts last while later leaves exist
+        assert not NonInclusionProof(b"sensor-007", tree.proof(b"sensor-006"), None).verify(
+            root, count
+        )
+        # Neighbours that do not bracket the key
+        adjacent = tree.non_inclusion_proof(b"sensor-007")
+        assert not NonInclusionProof(b"sensor-009", adjacent.left, adjacent.right).verify(
+            root, count
+        )
+        with pytest.raises(ValueError, match="in the tree"):
+            tree.non_inclusion_proof(b"sensor-006")
+
+    def test_duplicate_keys_rejected(self) -> None:
+        with pytest.raises(ValueError, match="Duplicate"):
+            KeyedMerkleTree.from_items([(b"k", b"1"), (b"k", b"2")])
+
+    def test_from_records_with_leaf_algorithm(self) -> None:
+        records = [(b"k2", b"v2"), (b"k1", b"v1")]
+        tree = KeyedMerkleTree.from_records(
+            records,
+            key=lambda r: r[0],
+            encode=lambda r: r[1],
+            algorithm="sha256",
+            leaf_algorithm="blake2b",
+        )
+        assert tree.record_hashes[0] == hashlib.blake2b(b"v1").digest()
+        proof = tree.proof(b"k2")
+        assert proof.verify(tree.root() or b"", 2, "sha256", leaf_algorithm="blake2b")
+
+    def test_verify_key_proofs_against_attestation(self) -> None:
+        tree = self.sensor_tree()
+        statement = window_statement(tree)  # type: ignore[arg-type]
+        assert statement.predicate["integrity"]["merkleTree"]["leafOrder"] == "key"
+        verifier = AttestationVerifier()
+        result = verifier.verify_key_proofs(
+            statement,
+            [tree.proof(b"sensor-002"), tree.non_inclusion_proof(b"sensor-003")],
+            records={b"sensor-002": b"reading-2"},
+        )
+        assert result.valid, result.errors
+        assert (result.subjects_verified, result.subjects_total) == (2, 2)
+
+        result = verifier.verify_key_proofs(
+            statement, tree.proof(b"sensor-002"), records={b"sensor-002": b"forged"}
+        )
+        assert not result.valid
+
+        unkeyed = window_statement(MerkleTree.from_records([b"a"]))
+        result = verifier.verify_key_proofs(unkeyed, tree.proof(b"sensor-002"))
+        assert not result.valid
+        assert "keyed" in result.errors[0]
+
+
+class TestLeafEncoding:
+    """Tests for canonical leaf encodings."""
+
+    @pytest.mark.parametrize(
+        ("value", "expected"),
+        [
+            (0.0, "0"),
+            (-0.0, "0"),
+            (1.0, "1"),
+            (-1.5, "-1.5"),
+            (0.1, "0.1"),
+            (1e-6, "0.000001"),
+            (1e-7, "1e-7"),
+            (1e20, "100000000000000000000"),
+            (1e21, "1e+21"),
+            (123e-20, "1.23e-18"),
+            (5e-324, "5e-324"),
+            (1.7976931348623157e308, "1.7976931348623157e+308"),
+            (9007199254740994.0, "9007199254740994"),
+            (295147905179352830000.0, "295147905179352830000"),
+        ],
+    )
+    def test_number_formatting(self, value: float, expected: str) -> None:
+        assert format_number(value) == expected
+
+    def test_rfc8785_example(self) -> None:
+        text = (
+            '{"numbers": [333333333.33333329, 1E30, 4.50, 2e-3, 0.000000000000000000000000001], '
+            '"string": "\\u20ac$\\u000F\\u000aA\'\\u0042\\u0022\\u005c\\\\\\"\\/", '
+            '"literals": [null, true, false]}'
+        )
+        expected = (
+            '{"literals":[null,true,false],'
+            '"numbers":[333333333.3333333,1e+30,4.5,0.002,1e-27],'
+            '"string":"\u20ac$\\u000f\\nA\'B\\"\\\\\\\\\\"/"}'
+        ).encode()
+        encoder = JcsEncoder()
+        assert encoder.encode(text) == expected
+        assert encoder.encode(text.encode()) == expected
+        assert encoder.encode(json.loads(text)) == expected
+
+    def test_keys_sort_by_utf16_code_units(self) -> None:
+        # U+1F600 is a surrogate pair (0xD83D...) and sorts before U+FF61
+        record = {"\uff61": 1, "\U0001f600": 2, "a": 3}
+        assert JcsEncoder().encode(record).decode() == '{"a":3,"\U0001f600":2,"\uff61":1}'
+
+    def test_batch_matches_single_records(self) -> None:
+        records = [
+            json.dumps({"sensor": f"s{i}", "value": i / 3, "count": i, "tags": ["a", None]})
+            for i in range(50)
+        ]
+        records += ['"a\\u0000b"', "12345678901234567890", '{"\U0001f600": [1.0]}']
+        encoder = JcsEncoder()
+        batch = encoder.encode_batch(records)
+        assert batch == [encoder.encode(record) for record in records]
+        assert batch == [encoder._encode_slow(record) for record in records]
+        assert batch[-2] == b"12345678901234567000"
+
+    @pytest.mark.parametrize("text", ['{"a": NaN}', "[1e400]", "{", "1, 2", '"\\ud800"'])
+    def test_invalid_json_is_rejected(self, text: str) -> None:
+        with pytest.raises(ValueError):
+            JcsEncoder().encode(text)
+
+    def test_empty_batch(self) -> None:
+        assert JcsEncoder().encode_batch([]) == []
+
+    @pytest.mark.parametrize("text", ['{"a":1,"a":2}', '[{"\U0001f600":1,"\U0001f600":2}]'])
+    def test_duplicate_keys_are_rejected(self, text: str) -> None:
+        # The second record takes the slow path (non-BMP key)
+        with pytest.raises(ValueError, match="duplicate keys"):
+            JcsEncoder().encode(text)
+
+    def test_decoded_values_need_string_keys(self) -> None:
+        encoder = JcsEncoder()
+        with pytest.raises(ValueError, match="keys must be strings"):
+            encoder.encode({1: "x"})
+        with pytest.raises(ValueError, match="keys must be strings"):
+            encoder.encode_batch(['{"1":"x"}', [{2: "y"}]])
+        batch = encoder.encode_batch(['{"b": 1, "a": 2}', {"c": 1.0}, "[1]", ("x",)])
+        assert batch == [b'{"a":2,"b":1}', b'{"c":1}', b"[1]", b'["x"]']
+
+    def test_length_prefixed(self) -> None:
+        encoder = leaf_encoder("length-prefixed")
+        assert encoder.encode([b"ab", "\u00e9", b""]) == (
+            b"\0\0\0\x02ab" + b"\0\0\0\x02\xc3\xa9" + b"\0\0\0\0"
+        )
+        # Field boundaries are part of the leaf
+        assert encoder.encode([b"a", b"bc"]) != encoder.encode([b"ab", b"c"])
+
+    def test_unknown_encoding(self) -> None:
+        with pytest.raises(ValueError, match="Unsupported leaf encoding"):
+            leaf_encoder("xml")  # type: ignore[arg-type]
+
+    def test_equivalent_records_share_a_root(self) -> None:
+        a = ['{"b": 1, "a": 2.50}', '{"x": [1, 2]}']
+        b = [b'{"a":2.5,"b":1}', '{ "x" : [ 1.0, 2 ] }']
+        tree = MerkleTree.from_records(a, encoding="json-jcs")
+        assert tree.root() == MerkleTree.from_records(b, encoding="json-jcs").root()
+        assert tree.root() == reference_root([b'{"a":2.5,"b":1}', b'{"x":[1,2]}'])
+
+        acc = MerkleAccumulator(encoding="json-jcs")
+        acc.append(a[0])
+        acc.extend(b[1:])
+        assert acc.root() == tree.root()
+        assert acc.to_model().leaf_encoding == "json-jcs"
+
+    def test_writer_encodes_records(self, tmp_path: Path) -> None:
+        records = [json.dumps({"i": i, "v": i / 7}) for i in range(100)]
+        with MerkleTreeWriter(tmp_path / "w.mktree", encoding="json-jcs") as writer:
+            writer.extend(records)
+        tree = MerkleTree.from_records(records, encoding="json-jcs")
+        assert writer.root() == tree.root()
+        assert writer.to_model() == tree.to_model()
+
+    def test_encoding_is_recorded_and_verified(self) -> None:
+        records = ['{"id": 1, "v": 1.50}', '{"id": 2, "v": 2}', '{"id": 3, "v": 1e2}']
+        tree = MerkleTree.from_records(records, encoding="json-jcs")
+        statement = window_statement(tree)
+        merkle = statement.predicate["integrity"]["merkleTree"]
+        assert merkle["leafEncoding"] == "json-jcs"
+        raw = window_statement(MerkleTree.from_records([b"a"]))
+        assert "leafEncoding" not in raw.predicate["integrity"]["merkleTree"]
+
+        verifier = AttestationVerifier()
+        reformatted = {0: '{"v":1.5,"id":1}', 2: {"id": 3, "v": 100}}
+        result = verifier.verify_inclusion(statement, tree.multiproof([0, 2]), records=reformatted)
+        assert result.valid, result.errors
+        result = verifier.verify_inclusion(
+            statement, tree.proof(1), records={1: '{"id": 2, "v": 3}'}
+        )
+        assert not result.valid
+        result = verifier.verify_inclusion(statement, tree.proof(1), records={1: "{"})
+        assert not result.valid
+        assert "cannot be encoded" in result.errors[0]
+
+
+def serve(store: TreeStore, fn: Callable[[ProofServer], Any], **kwargs: Any) -> Any:
+    """Run ``fn(server)`` in a thread while a proof server runs."""
+
+    async def main() -> Any:
+        async with ProofServer(store, **kwargs) as proof_server:
+            return await asyncio.to_thread(fn, proof_server)
+
+    return asyncio.run(main())
+
+
+async def http_request(url: str, method: str = "GET", body: bytes = b"") -> tuple[int, Any]:
+    """Send one raw HTTP request and return the status and JSON body."""
+    parts = url.split("/", 3)
+    host, port = parts[2].split(":")
+    reader, writer = await asyncio.open_connection(host, int(port))
+    writer.write(
+        f"{method} /{parts[3]} HTTP/1.1\r\nConnection: close\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode()
+        + body
+    )
+    response = await reader.read()
+    writer.close()
+    head, _, payload = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(payload)
+
+
+class TestProofServer:
+    """Tests for serving proofs from stored trees."""
+
+    WINDOW = "stream:iot_sensors:window_20250101_120000"
+
+    def test_proof_workflow(self, tmp_path: Path) -> None:
+        store = TreeStore(tmp_path)
+        records = [f"record-{i}".encode() for i in range(100)]
+        with store.writer(self.WINDOW) as writer:
+            writer.extend(records)
+        assert store.path(self.WINDOW).parent == tmp_path
+
+        def audit(proof_server: ProofServer) -> Any:
+            statement = (
+                AttestationBuilder()
+                .stream_window(
+                    stream_id="s",
+                    stream_source="kafka://broker/topic",
+                    window_type="tumbling",
+                    window_duration="PT1M",
+                    merkle_algorithm="sha256",
+                    merkle_root="",
+                    leaf_count=0,
+                    collector_id="c",
+                )
+                .with_merkle_tree(writer)
+                .with_proof_endpoint(proof_server.endpoint(self.WINDOW))
+                .with_subject(self.WINDOW, "0" * 64)
+                .build()
+            )
+            assert statement.predicate["verification"]["merkleProofAvailable"] is True
+            client = ProofClient.for_statement(statement)
+            assert client.tree() == writer.to_model()
+            proofs = [client.proof(7), *client.proofs([0, 99]), client.multiproof(range(10, 60))]
+            return AttestationVerifier().verify_inclusion(
+                statement, proofs, records={7: records[7], 99: records[99], 42: records[42]}
+            )
+
+        result = serve(store, audit)
+        assert result.valid, result.errors
+        assert result.subjects_total == 53
+
+    def test_consistency_proof(self, tmp_path: Path) -> None:
+        store = TreeStore(tmp_path)
+        records = [bytes([i]) for i in range(20)]
+        store.save(self.WINDOW, MerkleTree.from_records(records))
+        old = window_statement(MerkleTree.from_records(records[:12]))
+        new = window_statement(MerkleTree.from_records(records))
+
+        proof = serve(store, lambda s: ProofClient(s.endpoint(self.WINDOW)).consistency_proof(12))
+        assert AttestationVerifier().verify_consistency(old, new, proof).valid
+
+    def test_errors(self, tmp_path: Path) -> None:
+        store = TreeStore(tmp_path)
+        store.save(self.WINDOW, MerkleTree.from_records([b"a", b"b"]))
+
+        async def main() -> list[tuple[int, Any]]:
+            async with ProofServer(store) as proof_server:
+                endpoint = proof_server.endpoint(self.WINDOW)
+                return [
+                    await http_request(proof_server.endpoint("missing") + "/proof?leaf=0"),
+                    await http_request(endpoint + "/proof?leaf=2"),
+                    await http_request(endpoint + "/proof?leaf=x"),
+                    await http_request(endpoint + "/proofs", "POST", b'{"leaves": "0"}'),
+                    await http_request(endpoint + "/proofs"),
+                    await http_request(proof_server.url + "/other"),
+                ]
+
+        statuses = [status for status, _ in asyncio.run(main())]
+        assert statuses == [404, 400, 400, 400, 405, 404]
+        with pytest.raises(ValueError, match="404"):
+            serve(store, lambda s: ProofClient(s.endpoint("missing")).proof(0))
+
+    def test_tree_route_reports_leaf_encoding(self, tmp_path: Path) -> None:
+        store = TreeStore(tmp_path)
+        with store.writer(self.WINDOW, encoding="length-prefixed") as writer:
+            writer.extend([b"a", b"bc"])
+
+        async def main() -> tuple[int, Any]:
+            async with ProofServer(store) as proof_server:
+                return await http_request(proof_server.endpoint(self.WINDOW))
+
+        status, body = asyncio.run(main())
+        assert status == 200
+        assert body["leafEncoding"] == "length-prefixed"
+
+    def test_unreadable_trees_are_server_errors(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        store = TreeStore(tmp_path)
+        store.path("directory").mkdir()
+        store.save(self.WINDOW, MerkleTree.from_records([b"a", b"b"]))
+
+        def removed(path: Any) -> Any:
+            raise FileNotFoundError(path)
+
+        async def main() -> list[tuple[int, Any]]:
+            async with ProofServer(store) as proof_server:
+                responses = [
+                    await http_request(proof_server.endpoint("directory") + "/proof?leaf=0")
+                ]
+                # The file disappears between the stat and the open
+                monkeypatch.setattr(server.MappedMerkleTree, "open", removed)
+                responses.append(await http_request(proof_server.endpoint(self.WINDOW)))
+                return responses
+
+        responses = asyncio.run(asyncio.wait_for(main(), timeout=10))
+        assert [status for status, _ in responses] == [500, 404]
+
+    def test_concurrent_requests_are_batched(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        store = TreeStore(tmp_path)
+        tree = MerkleTree.from_records([bytes([i]) for i in range(64)])
+        store.save(self.WINDOW, tree)
+        batches: list[int] = []
+        run_batch = server._run_batch
+
+        def counting(tree: Any, calls: list[Any]) -> Any:
+            batches.append(len(calls))
+            return run_batch(tree, calls)
+
+        monkeypatch.setattr(server, "_run_batch", counting)
+
+        async def main() -> list[tuple[int, Any]]:
+            async with ProofServer(store, batch_delay=0.05, max_batch=40) as proof_server:
+                endpoint = proof_server.endpoint(self.WINDOW)
+                return await asyncio.gather(
+                    *(http_request(f"{endpoint}/proof?leaf={i}") for i in range(64))
+                )
+
+        responses = asyncio.run(main())
+        assert [MerkleProof.from_dict(body) for _, body in responses] == [
+            tree.proof(i) for i in range(64)
+        ]
+        assert sum(batches) == 64
+        assert len(batches) < 64
+        assert max(batches) <= 40
+
+    def test_store_keeps_bounded_open_trees(self, tmp_path: Path) -> None:
+        store = TreeStore(tmp_path, max_open=2)
+        for i in range(3):
+            store.save(f"w{i}", MerkleTree.from_records([bytes([i])]))
+        in_use = store.acquire("w0")
+        for window_id in ("w1", "w2"):
+            store.release(store.acquire(window_id))
+        # The tree in use stays open; the least recently used idle one is closed
+        assert store.open_count == 2
+        assert in_use.root() == hash_leaf(b"\0")
+        store.release(in_use)
+
+        store.save("w0", MerkleTree.from_records([b"x", b"y"]))
+        reopened = store.acquire("w0")
+        assert reopened.leaf_count == 2
+        store.release(reopened)
+        with pytest.raises(KeyError):
+            store.acquire("missing")
+        store.close()
+        assert store.open_count == 0
@@ -0,0 +1,550 @@
+"""Tests for stream window attestation."""
+
+import asyncio
+import random
+from collections.abc import AsyncIterator
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+import pytest
+
+from makoto.attestation.statement import InTotoStatement, Subject
+from makoto.attestation.verifier import AttestationVerifier
+from makoto.merkle import MerkleTree
+from makoto.models import stream_window
+from makoto.streaming import (
+    StreamWindowAttestor,
+    WindowAttestation,
+    format_duration,
+    parse_duration,
+)
+
+Record = tuple[float, bytes]
+
+
+def records(timestamps: list[float]) -> list[Record]:
+    return [(ts, f"record-{i}".encode()) for i, ts in enumerate(timestamps)]
+
+
+def attestor(window_type: str = "tumbling", **kwargs: Any) -> StreamWindowAttestor:
+    kwargs.setdefault("timestamp", lambda record: record[0])
+    kwargs.setdefault("value", lambda record: record[1])
+    return StreamWindowAttestor(
+        "iot_sensors",
+        "mqtt://sensors.example.com:1883",
+        "edge-collector-01",
+        window_type=window_type,  # type: ignore[arg-type]
+        **kwargs,
+    )
+
+
+def expected_root(window: WindowAttestation, stream: list[Record]) -> str | None:
+    start, end = window.start.timestamp(), window.end.timestamp()
+    return MerkleTree.from_records([v for ts, v in stream if start <= ts < end]).root_hex()
+
+
+def expected_pane_root(window: WindowAttestation, stream: list[Record], pane: float) -> str | None:
+    start, end = window.start.timestamp(), window.end.timestamp()
+    panes: dict[int, list[bytes]] = {}
+    for ts, value in stream:
+        if start <= ts < end:
+            panes.setdefault(int(ts // pane), []).append(value)
+    roots = [MerkleTree.from_records(panes[index]).root() or b"" for index in sorted(panes)]
+    return MerkleTree.from_leaf_hashes(roots).root_hex()
+
+
+class TestDurations:
+    """Tests for ISO 8601 window durations."""
+
+    @pytest.mark.parametrize(
+        ("text", "duration"),
+        [
+            ("PT1M", timedelta(minutes=1)),
+            ("PT0.5S", timedelta(seconds=0.5)),
+            ("P1DT12H", timedelta(days=1, hours=12)),
+            ("P2W", timedelta(weeks=2)),
+        ],
+    )
+    def test_round_trip(self, text: str, duration: timedelta) -> None:
+        assert parse_duration(text) == duration
+        assert parse_duration(format_duration(duration)) == duration
+        assert format_duration(timedelta(0)) == "PT0S"
+
+    @pytest.mark.parametrize("text", ["", "P", "PT", "P1Y", "P1M", "1M", "PT1H30"])
+    def test_invalid(self, text: str) -> None:
+        with pytest.raises(ValueError, match="duration"):
+            parse_duration(text)
+
+
+class TestStreamWindowAttestor:
+    """Tests for the windowing engine."""
+
+    def test_tumbling_windows(self) -> None:
+        stream = records([i * 0.25 for i in range(1000)])
+        windows = list(attestor(duration="PT60S").attest(stream))
+        assert [w.record_count for w in windows] == [240, 240, 240, 240, 40]
+        assert windows[1].start == datetime(1970, 1, 1, 0, 1, tzinfo=timezone.utc)
+        assert windows[1].end - windows[1].start == timedelta(minutes=1)
+        for window in windows:
+            assert window.root == expected_root(window, stream)
+
+    def test_windows_close_as_the_stream_advances(self) -> None:
+        attest = attestor(duration="PT10S")
+        closed = list(attest.process(records([1, 2, 11, 12, 25])))
+        assert [w.record_count for w in closed] == [2, 2]
+        assert attest.open_windows == 1
+        assert [w.record_count for w in attest.flush()] == [1]
+        assert attest.open_windows == 0
+
+    def test_sliding_windows(self) -> None:
+        stream = records([i * 0.5 for i in range(200)])
+        windows = list(attestor("sliding", duration="PT30S", slide="PT10S").attest(stream))
+        assert [w.start.timestamp() for w in windows] == list(range(-20, 100, 10))
+        assert [w.record_count for w in windows[:4]] == [20, 40, 60, 60]
+        for window in windows:
+            assert window.root == expected_root(window, stream)
+            assert window.predicate.integrity.merkle_tree.pane_leaf_counts is None
+        window = windows[3].predicate.window
+        assert (window.duration, window.slide) == ("PT30S", "PT10S")
+
+    def test_session_windows(self) -> None:
+        stream = records([0, 1, 2, 10, 11, 30])
+        windows = list(attestor("session", gap="PT5S").attest(stream))
+        assert [w.record_count for w in windows] == [3, 2, 1]
+        assert [(w.start.timestamp(), w.end.timestamp()) for w in windows] == [
+            (0, 7),
+            (10, 16),
+            (30, 35),
+        ]
+        assert windows[0].predicate.window.duration == "PT7S"
+        for window in windows:
+            assert window.root == expected_root(window, stream)
+
+    def test_global_window(self) -> None:
+        stream = records([5, 6, 9])
+        attest = attestor("global")
+        assert list(attest.process(stream)) == []
+        (window,) = attest.flush()
+        assert (window.start.timestamp(), window.end.timestamp()) == (5, 9)
+        assert window.root == MerkleTree.from_records([v for _, v in stream]).root_hex()
+
+    def test_chain(self) -> None:
+        windows = list(attestor(duration="PT1S").attest(records([0, 1, 2])))
+        chains = [w.predicate.integrity.chain for w in windows]
+        assert [c.chain_length for c in chains if c] == [1, 2, 3]
+        assert all(c and c.genesis_window_id == windows[0].window_id for c in chains)
+        assert chains[0] and chains[0].previous_window_id is None
+        assert chains[2] and chains[2].previous_window_id == windows[1].window_id
+        assert chains[2].previous_merkle_root == windows[1].root
+
+        resumed = list(attestor(duration="PT1S", previous=windows[-1]).attest(records([3])))
+        chain = resumed[0].predicate.integrity.chain
+        assert chain and chain.chain_length == 4
+        assert chain.genesis_window_id == windows[0].window_id
+        assert chain.previous_merkle_root == windows[-1].root
+
+    def test_records_for_closed_windows_are_dropped(self) -> None:
+        windows = list(attestor(duration="PT10S").attest(records([1, 12, 3, 4, 13, 25])))
+        assert [w.record_count for w in windows] == [1, 2, 1]
+        assert windows[0].predicate.metadata is None
+        metadata = windows[1].predicate.metadata
+        assert metadata and metadata.dropped_records == 2
+        assert windows[2].predicate.metadata is None
+
+    def test_statement(self) -> None:
+        stream = records([0.0, 0.5, 2.0])
+        (window,) = attestor(duration="PT1M", topic="sensors/temp").attest(stream)
+        statement = window.statement
+        assert statement.predicate_type == stream_window.PREDICATE_TYPE
+        assert AttestationVerifier().verify(statement).valid
+        (subject,) = statement.subjects
+        assert subject.name == window.window_id == "stream:iot_sensors:window_19700101_000000"
+        assert subject.digest.model_extra == {
+            "merkleRoot": window.root,
+            "windowStart": "1970-01-01T00:00:00Z",
+            "windowEnd": "1970-01-01T00:01:00Z",
+            "recordCount": "3",
+        }
+        predicate = stream_window.StreamWindowPredicate.model_validate(statement.predicate)
+        assert predicate == window.predicate
+        assert predicate.stream.topic == "sensors/temp"
+        assert predicate.window.alignment == "event-time"
+        statistics = predicate.aggregates and predicate.aggregates.statistics
+        assert statistics and statistics.avg_interval_ms == 1000
+
+    def test_encoding_and_datetimes(self) -> None:
+        start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        stream = [{"at": start + timedelta(seconds=i), "n": i} for i in range(5)]
+        (window,) = StreamWindowAttestor(
+            "s",
+            "kafka://broker/topic",
+            "c",
+            duration="PT1M",
+            timestamp=lambda record: record["at"],
+            value=lambda record: {"n": record["n"]},
+            encoding="json-jcs",
+        ).attest(stream)
+        tree = MerkleTree.from_records([{"n": i} for i in range(5)], encoding="json-jcs")
+        assert window.root == tree.root_hex()
+        assert window.predicate.integrity.merkle_tree.leaf_encoding == "json-jcs"
+        assert window.window_id == "stream:s:window_20250101_000000"
+
+    def test_processing_time(self) -> None:
+        attest = StreamWindowAttestor("s", "mqtt://host", "c", duration="PT1H")
+        (window,) = attest.attest([b"a", b"b"])
+        assert window.predicate.window.alignment == "processing-time"
+        assert window.root == MerkleTree.from_records([b"a", b"b"]).root_hex()
+
+    @pytest.mark.parametrize(
+        ("window_type", "kwargs", "match"),
+        [
+            ("tumbling", {}, "duration"),
+            ("sliding", {"duration": "PT1M"}, "slide"),
+            ("sliding", {"duration": "PT1M", "slide": "PT2M"}, "longer"),
+            ("session", {}, "gap"),
+            ("tumbling", {"duration": "PT0S"}, "positive"),
+        ],
+    )
+    def test_invalid_windows(self, window_type: str, kwargs: dict[str, Any], match: str) -> None:
+        with pytest.raises(ValueError, match=match):
+            attestor(window_type, **kwargs)
+
+
+async def batches(
+    stream: list[Record], size: int, delay: float = 0.0
+) -> AsyncIterator[list[Record]]:
+    for i in range(0, len(stream), size):
+        yield stream[i : i + size]
+        await asyncio.sleep(delay)
+
+
+async def collect(windows: AsyncIterator[WindowAttestation]) -> list[WindowAttestation]:
+    return [window async for window in windows]
+
+
+class TestAsyncIngestion:
+    """Tests for async ingestion through a bounded queue."""
+
+    def test_same_windows_as_sync(self) -> None:
+        stream = records([i * 0.1 for i in range(1000)])
+        expected = list(attestor(duration="PT10S").attest(stream))
+        windows = asyncio.run(collect(attestor(duration="PT10S").attest_async(batches(stream, 64))))
+        assert [w.root for w in windows] == [w.root for w in expected]
+        assert [w.window_id for w in windows] == [w.window_id for w in expected]
+        for window in windows:
+            metadata = window.predicate.metadata
+            assert metadata and metadata.processing_latency
+            assert parse_duration(metadata.processing_latency) >= timedelta(0)
+
+    def test_backpressure_is_counted(self) -> None:
+        stream = records([i * 0.1 for i in range(1000)])
+        attest = attestor(duration="PT10S")
+
+        async def slow_hashing() -> list[WindowAttestation]:
+            windows = []
+            async for window in attest.attest_async(batches(stream, 10), queue_size=1):
+                windows.append(window)
+                await asyncio.sleep(0.01)  # a slow consumer of the windows
+            return windows
+
+        windows = asyncio.run(slow_hashing())
+        events = [w.predicate.metadata.backpressure_events for w in windows if w.predicate.metadata]
+        assert len(events) == len(windows) == 10
+        assert sum(e or 0 for e in events) > 0
+
+    def test_no_backpressure_with_a_slow_source(self) -> None:
+        stream = records([i * 0.1 for i in range(200)])
+        windows = asyncio.run(
+            collect(attestor(duration="PT10S").attest_async(batches(stream, 50, delay=0.01)))
+        )
+        assert [
+            w.predicate.metadata and w.predicate.metadata.backpressure_events for w in windows
+        ] == [
+            0,
+            0,
+        ]
+
+    def test_ingestion_errors_propagate(self) -> None:
+        async def failing() -> AsyncIterator[list[Record]]:
+            yield records([1.0])
+            raise RuntimeError("consumer disconnected")
+
+        with pytest.raises(RuntimeError, match="disconnected"):
+            asyncio.run(collect(attestor(duration="PT10S").attest_async(failing())))
+        with pytest.raises(ValueError, match="queue_size"):
+            asyncio.run(collect(attestor(duration="PT10S").attest_async(failing(), queue_size=0)))
+
+
+class TestLateness:
+    """Tests for event-time watermarks and allowed lateness."""
+
+    def test_late_records_within_lateness_are_added(self) -> None:
+        stream = records([1, 12, 3, 14, 16, 4, 30])
+        windows = list(attestor(duration="PT10S", allowed_lateness="PT5S").attest(stream))
+        assert [w.record_count for w in windows] == [2, 3, 1]
+        assert windows[0].root == MerkleTree.from_records([stream[0][1], stream[2][1]]).root_hex()
+        metadata = windows[0].predicate.metadata
+        assert metadata and (metadata.late_records, metadata.dropped_records) == (1, None)
+        # The record at 4 arrives after its window closed
+        metadata = windows[1].predicate.metadata
+        assert metadata and (metadata.late_records, metadata.dropped_records) == (None, 1)
+        window = windows[0].predicate.window
+        assert window.allowed_lateness == "PT5S"
+        assert window.watermark == datetime(1970, 1, 1, 0, 0, 16, tzinfo=timezone.utc)
+
+    def test_side_output(self) -> None:
+        stream = records([1, 12, 3, 14, 16, 4, 30])
+        attest = attestor(duration="PT10S", allowed_lateness="PT5S", late_output=True)
+        windows = list(attest.attest(stream))
+        assert [(w.record_count, w.late) for w in windows] == [
+            (2, False),
+            (3, False),
+            (1, True),
+            (1, False),
+        ]
+        late = windows[2]
+        assert late.window_id == windows[1].window_id + ":late"
+        assert late.root == MerkleTree.from_records([stream[5][1]]).root_hex()
+        assert late.predicate.window.type == "global"
+        assert late.start == late.end == datetime(1970, 1, 1, 0, 0, 4, tzinfo=timezone.utc)
+        metadata = late.predicate.metadata
+        assert metadata and (metadata.late_records, metadata.dropped_records) == (1, None)
+        chain = late.predicate.integrity.chain
+        assert chain and (chain.chain_length, chain.genesis_window_id) == (1, late.window_id)
+        main = windows[3].predicate.integrity.chain
+        assert main and main.previous_window_id == windows[1].window_id
+
+    def test_out_of_orderness(self) -> None:
+        attest = attestor(duration="PT10S", out_of_orderness="PT5S")
+        assert list(attest.process(records([1, 12, 3]))) == []
+        assert attest.watermark == 7
+        (window,) = attest.process(records([16]))
+        assert window.record_count == 2
+        assert window.predicate.metadata is None
+
+    def test_sessions_wait_for_late_records(self) -> None:
+        stream = records([0, 2, 20, 4, 40])
+        windows = list(attestor("session", gap="PT5S", allowed_lateness="PT15S").attest(stream))
+        assert [w.record_count for w in windows] == [3, 1, 1]
+        assert (windows[0].start.timestamp(), windows[0].end.timestamp()) == (0, 9)
+        metadata = windows[0].predicate.metadata
+        assert metadata and metadata.late_records == 1
+
+    def test_bridging_record_merges_sessions(self) -> None:
+        stream = records([0, 8, 4, 20])
+        windows = list(attestor("session", gap="PT5S", out_of_orderness="PT10S").attest(stream))
+        assert [w.record_count for w in windows] == [3, 1]
+        assert (windows[0].start.timestamp(), windows[0].end.timestamp()) == (0, 13)
+        leaves = [stream[0][1], stream[1][1], stream[2][1]]
+        assert windows[0].root == MerkleTree.from_records(leaves).root_hex()
+
+    @pytest.mark.parametrize(
+        ("window_type", "kwargs"),
+        [
+            ("tumbling", {"duration": "PT1S"}),
+            ("session", {"gap": "PT0.5S"}),
+        ],
+    )
+    def test_every_out_of_order_record_is_accounted_for(
+        self, window_type: str, kwargs: dict[str, Any]
+    ) -> None:
+        rng = random.Random(7)
+        stream = [(i * 0.05 + rng.uniform(-3, 3), b"x") for i in range(20_000)]
+        attest = attestor(window_type, out_of_orderness="PT1S", allowed_lateness="PT0.5S", **kwargs)
+        windows = list(attest.attest(stream))
+        dropped = sum(
+            (w.predicate.metadata.dropped_records or 0) for w in windows if w.predicate.metadata
+        )
+        assert sum(w.record_count for w in windows) + dropped == len(stream)
+        if window_type == "session":
+            bounds = sorted((w.start, w.end) for w in windows)
+            assert all(
+                end <= start for (_, end), (start, _) in zip(bounds, bounds[1:], strict=False)
+            )
+
+    def test_memory_is_bounded_by_open_windows(self) -> None:
+        attest = attestor(duration="PT1S", allowed_lateness="PT2S", late_output=True)
+        most_open = 0
+
+        def stream() -> Any:
+            nonlocal most_open
+            for i in range(20_000):
+                most_open = max(most_open, attest.open_windows)
+                yield (i * 0.01 - (5 if i % 100 == 0 else 0), b"x")
+
+        windows = list(attest.attest(stream()))
+        assert most_open <= 4
+        assert sum(w.record_count for w in windows) == 20_000
+        assert sum(w.record_count for w in windows if w.late) > 0
+
+
+class TestPanes:
+    """Tests for pane-composed sliding windows."""
+
+    def test_panes(self) -> None:
+        stream = records([i * 0.5 for i in range(200)])
+        attest = attestor("sliding", duration="PT30S", slide="PT10S", panes=True)
+        windows = list(attest.attest(stream))
+        for window in windows:
+            assert window.root == expected_pane_root(window, stream, 10)
+        tree = windows[3].predicate.integrity.merkle_tree
+        assert tree.pane_leaf_counts == [20, 20, 20]
+        # Panes of 20 leaves are 6 levels high, and 3 pane roots add 2 more
+        assert tree.tree_height == 8
+        assert windows[0].predicate.integrity.merkle_tree.tree_height == 6
+
+    def test_pane_size_is_the_gcd(self) -> None:
+        stream = records([i * 0.5 for i in range(200)])
+        attest = attestor("sliding", duration="PT25S", slide="PT10S", panes=True)
+        windows = list(attest.attest(stream))
+        for window in windows:
+            assert window.root == expected_pane_root(window, stream, 5)
+            tree = window.predicate.integrity.merkle_tree
+            assert tree.pane_leaf_counts and sum(tree.pane_leaf_counts) == tree.leaf_count
+        assert windows[3].predicate.integrity.merkle_tree.pane_leaf_counts == [10] * 5
+
+    def test_inclusion_proofs_need_flat_trees(self) -> None:
+        stream = records([1, 2, 11])
+        attest = attestor("sliding", duration="PT20S", slide="PT10S", panes=True)
+        window = next(attest.attest(stream))
+        proof = MerkleTree.from_records([stream[0][1]]).proof(0)
+        result = AttestationVerifier().verify_inclusion(window.statement, proof)
+        assert not result.valid
+        assert "pane-composed" in result.errors[0]
+
+    def test_records_recompute_pane_composed_roots(self) -> None:
+        stream = records([i * 0.5 for i in range(200)])
+        attest = attestor("sliding", duration="PT30S", slide="PT10S", panes=True)
+        verifier = AttestationVerifier()
+        for window in attest.attest(stream):
+            start, end = window.start.timestamp(), window.end.timestamp()
+            values = [v for ts, v in stream if start <= ts < end]
+            result = verifier.verify_window_records(window.statement, values)
+            assert result.valid, result.errors
+            assert not verifier.verify_window_records(window.statement, values[::-1]).valid
+            assert not verifier.verify_window_records(window.statement, values[1:]).valid
+
+    def test_flat_roots_are_recomputed_from_records(self) -> None:
+        stream = records([1, 2, 11])
+        window = next(attestor(duration="PT10S", leaf_algorithm="sha512").attest(stream))
+        values = [stream[0][1], stream[1][1]]
+        assert AttestationVerifier().verify_window_records(window.statement, values).valid
+
+    def test_panes_need_one_hash_algorithm(self) -> None:
+        with pytest.raises(ValueError, match="leaf_algorithm"):
+            attestor("sliding", duration="PT1M", slide="PT10S", panes=True, leaf_algorithm="sha512")
+
+    def test_late_records_reach_open_windows_only(self) -> None:
+        stream = records([1, 11, 21, 5, 31])
+        attest = attestor(
+            "sliding", duration="PT20S", slide="PT10S", allowed_lateness="PT5S", panes=True
+        )
+        windows = list(attest.attest(stream))
+        # The record at 5 arrives after [-10, 10) closed but before [0, 20) did
+        assert [w.record_count for w in windows] == [1, 3, 2, 2, 1]
+        metadata = windows[1].predicate.metadata
+        assert metadata and metadata.late_records == 1
+        assert windows[1].root == expected_pane_root(windows[1], stream, 10)
+        assert windows[0].root == MerkleTree.from_records([stream[0][1]]).root_hex()
+
+    def test_panes_are_forgotten_with_their_windows(self) -> None:
+        attest = attestor("sliding", duration="PT60S", slide="PT1S", panes=True)
+        for _ in attest.process(records([i * 0.1 for i in range(10_000)])):
+            assert len(attest._panes) <= 61
+        assert attest.open_windows == 60
+        attest.flush()
+        assert attest._panes == {}
+
+
+def window_chain(count: int, **kwargs: Any) -> list[InTotoStatement]:
+    stream = records([i * 0.5 for i in range(count * 2)])
+    return [w.statement for w in attestor(duration="PT1S", **kwargs).attest(stream)]
+
+
+def relink(statement: InTotoStatement, **chain: Any) -> InTotoStatement:
+    statement = statement.model_copy(deep=True)
+    statement.predicate["integrity"]["chain"].update(chain)
+    return statement
+
+
+class TestWindowChainVerification:
+    """Tests for verifying the chain links between windows."""
+
+    def test_valid_chain_in_any_order(self) -> None:
+        statements = window_chain(20)
+        for ordered in (statements, statements[::-1], statements[::2] + statements[1::2]):
+            result = AttestationVerifier().verify_window_chain(iter(ordered))
+            assert result.valid, result.errors
+            assert (result.subjects_total, result.subjects_verified) == (20, 20)
+            assert result.warnings == []
+
+    def test_partial_history(self) -> None:
+        statements = window_chain(20)[5:]
+        result = AttestationVerifier().verify_window_chain(statements)
+        assert result.valid, result.errors
+        (warning,) = result.warnings
+        assert "chainLength 6" in warning
+
+    def test_gap(self) -> None:
+        statements = window_chain(20)
+        del statements[7]
+        result = AttestationVerifier().verify_window_chain(statements)
+        assert not result.valid
+        assert result.errors == [
+            f"Gap: window {statements[7].subjects[0].name} follows missing window "
+            f"{statements[6].subjects[0].name[:-1]}7"
+        ]
+        assert result.subjects_verified == 18
+
+    def test_fork(self) -> None:
+        statements = window_chain(5)
+        rival = relink(statements[3], previousWindowId=statements[2].subjects[0].name)
+        rival.subjects[0].name += "-rival"
+        result = AttestationVerifier().verify_window_chain([*statements, rival])
+        assert not result.valid
+        assert any(error.startswith("Fork: windows") for error in result.errors)
+
+        statements[4] = statements[4].model_copy(deep=True)
+        statements[4].predicate["integrity"]["merkleTree"]["root"] = "0" * 64
+        result = AttestationVerifier().verify_window_chain([*statements, window_chain(5)[4]])
+        assert any("two roots" in error for error in result.errors)
+
+    @pytest.mark.parametrize(
+        ("chain", "match", "verified"),
+        [
+            ({"previousMerkleRoot": "f" * 64}, "previousMerkleRoot", 4),
+            # The next window's link breaks too
+            ({"chainLength": 9}, "chainLength 9", 3),
+            ({"genesisWindowId": "elsewhere"}, "genesisWindowId elsewhere", 3),
+        ],
+    )
+    def test_broken_links(self, chain: dict[str, Any], match: str, verified: int) -> None:
+        statements = window_chain(5)
+        statements[3] = relink(statements[3], **chain)
+        result = AttestationVerifier().verify_window_chain(statements)
+        assert not result.valid
+        assert any(match in error for error in result.errors)
+        assert result.subjects_verified == verified
+
+    def test_genesis_windows(self) -> None:
+        statements = window_chain(3)
+        statements[0] = relink(statements[0], chainLength=2)
+        result = AttestationVerifier().verify_window_chain(statements)
+        assert any("no previousWindowId" in error for error in result.errors)
+
+    def test_side_output_chain(self) -> None:
+        stream = records([1, 12, 3, 30, 2, 45])
+        attest = attestor(duration="PT10S", late_output=True)
+        windows = list(attest.attest(stream))
+        assert [w.late for w in windows].count(True) == 2
+        result = AttestationVerifier().verify_window_chain(w.statement for w in windows)
+        assert result.valid, result.errors
+
+    def test_not_a_window(self) -> None:
+        statement = InTotoStatement(
+            subjects=[Subject.from_file("data.csv", "a" * 64)],
+            predicate_type="https://makoto.dev/origin/v1",
+            predicate={},
+        )
+        result = AttestationVerifier().verify_window_chain([statement])
+        assert result.errors == ["Statement 0 is not a stream window attestation"]